@@ -18,6 +18,8 @@ class ApiRequester(object):
         Remove a VM from node
     info_of()
         Return info of a node
+    simulate_on()
+        Simulate deployments on a node
     """
     
     def __init__(self, **kwargs):
@@ -25,6 +27,7 @@ class ApiRequester(object):
         for req_attribute in req_attributes:
             if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
             setattr(self, req_attribute, kwargs[req_attribute])
+        self.response_cache = dict() # url -> (ETag, json content), to send conditional requests
 
 
     def deploy_on(self, host_url : str, name : str, cpu : str, memory : str, ratio : str, disk : str):
@@ -113,6 +116,34 @@ class ApiRequester(object):
             return {'success':False, 'reason': str(e)}
         
 
+    def simulate_on(self,  host_url : str, cpu : str, memory : str, ratio : str):
+        """Simulate the deployment of VMs on specified host, without deploying them
+        ----------
+
+        Parameters
+        ----------
+        host_url : str
+            Host targeted
+        cpu : str
+            Number of vcpu as str (comma separated if multiple VMs)
+        memory : str
+            Memory (gb) as str (comma separated if multiple VMs)
+        ratio :  str
+            Premium policy to apply (comma separated if multiple VMs)
+
+        Returns
+        -------
+        response : dict
+            Simulation result per VM and resulting status, None if failed
+        """
+        constructed_url = host_url + '/simulate?cpu=' + str(cpu) + '&mem=' + str(memory) + '&oc=' + str(ratio)
+        try:
+            response = requests.get(constructed_url)
+            return response.json()
+        except Exception as e:
+            print('SCG Warning: Error with url', constructed_url, str(e))
+            return None
+
     def status_of(self, host_url : str):
         """Return the state of requested host
         ----------
@@ -129,8 +160,7 @@ class ApiRequester(object):
         """
         constructed_url = host_url + '/status'
         try:
-            response = requests.get(constructed_url)
-            return response.json()
+            return self.__get_cached(constructed_url)
         except Exception as e:
             print('SCG Warning: Error with url', constructed_url, str(e))
             return None
@@ -151,8 +181,30 @@ class ApiRequester(object):
         """
         constructed_url = host_url + '/listvm'
         try:
-            response = requests.get(constructed_url)
-            return response.json()
+            return self.__get_cached(constructed_url)
         except Exception as e:
             print('SCG Warning: Error with url', constructed_url, str(e))
             return list()
+
+    def __get_cached(self, constructed_url : str):
+        """Get the json content of an url with a conditional request: if the content did not change since the previous call
+        (304 response), the previous content is returned
+        ----------
+
+        Parameters
+        ----------
+        constructed_url : str
+            Url to request
+
+        Returns
+        -------
+        content : object
+            json content
+        """
+        headers = dict()
+        if constructed_url in self.response_cache: headers['If-None-Match'] = self.response_cache[constructed_url][0]
+        response = requests.get(constructed_url, headers=headers)
+        if response.status_code == 304: return self.response_cache[constructed_url][1]
+        content = response.json()
+        if 'ETag' in response.headers: self.response_cache[constructed_url] = (response.headers['ETag'], content)
+        return content
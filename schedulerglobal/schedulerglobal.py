@@ -107,6 +107,11 @@ class SchedulerGlobal(object):
             if not (cpu_match and mem_match): # not suitable
                 continue
 
+            # Status is an approximation, confirm with an actual placement simulated on node
+            simulation = self.requester.simulate_on(host_url=node, cpu=cpu, memory=memory, ratio=ratio)
+            if (simulation is None) or (not simulation['vm'][0]['success']):
+                continue
+
             progress = self.requester.progress_on(host_url=node, cpu=cpu, memory=memory, ratio=ratio)
             if (max_progress == None) or (max_progress < progress):
                 max_progress = progress
@@ -1,9 +1,9 @@
 import os, sys, getopt, json
 from dotenv import load_dotenv
 from schedulerlocal.node.cpuexplorer import CpuExplorer
-from schedulerlocal.node.cpuset import ServerCpuSet
+from schedulerlocal.node.topologycache import TopologyCache
+from schedulerlocal.node.topologyfile import TopologyFile
 from schedulerlocal.node.memoryexplorer import MemoryExplorer
-from schedulerlocal.node.memoryset import ServerMemorySet
 from schedulerlocal.node.jsonencoder import GlobalEncoder
 from schedulerlocal.domain.libvirtconnector import LibvirtConnector
 from schedulerlocal.schedulerlocal import SchedulerLocal
@@ -38,10 +38,7 @@ if __name__ == '__main__':
         elif current_argument in('-l', '--load'):
             input_csv = current_value
         elif current_argument in('-t', '--topology'):
-            with open(current_value, 'r') as f:
-                json_topology = f.read()
-            cpuset = ServerCpuSet().load_from_json(json_topology).build_distances()
-            memset = ServerMemorySet().load_from_json(json_topology)
+            cpuset, memset = TopologyFile().load(current_value)
         elif current_argument in('-d', '--debug'):
             debug_level = int(current_value)
 
@@ -50,7 +47,8 @@ if __name__ == '__main__':
     ###########################################
     if (cpuset is None) or (memset is None):
         to_exclude = [int(cpuid)for cpuid in os.getenv('TOPO_EXCLUDE').split(',')] if os.getenv('TOPO_EXCLUDE') else list()
-        cpuset = CpuExplorer(to_exclude=to_exclude).build_cpuset()
+        topology_cache = TopologyCache(cache_file=os.getenv('TOPO_CACHE')) if os.getenv('TOPO_CACHE') else None
+        cpuset = CpuExplorer(to_exclude=to_exclude, topology_cache=topology_cache).build_cpuset()
 
         memset = MemoryExplorer().build_memoryset()
         if debug_level>0:
@@ -1,6 +1,7 @@
 import threading, os
 from flask import Flask
 from flask import request
+from flask import Response, json
 from waitress import serve
 from schedulerlocal.domain.domainentity import DomainEntity
 
@@ -25,6 +26,7 @@ class ApiEndpoint(object):
         for req_attribute in req_attributes:
             if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
             setattr(self, req_attribute, kwargs[req_attribute])
+        self.response_cache = dict() # uri -> (state tag, json body)
 
     def run(self):
         """Run REST API on a separate thread
@@ -48,8 +50,10 @@ class ApiEndpoint(object):
         app.route('/status', endpoint='status', methods = ['GET'])(lambda: self.status())
         app.route('/listvm', endpoint='listvm', methods = ['GET'])(lambda: self.listvm())
         app.route('/deploy', endpoint='deploy', methods = ['GET'])(lambda: self.deploy())
+        app.route('/deploy_batch', endpoint='deploy_batch', methods = ['GET'])(lambda: self.deploy_batch())
         app.route('/remove', endpoint='remove', methods = ['GET'])(lambda: self.remove())
         app.route('/progress', endpoint='progress', methods = ['GET'])(lambda: self.progress())
+        app.route('/simulate', endpoint='simulate', methods = ['GET'])(lambda: self.simulate())
 
         return app
     
@@ -60,16 +64,42 @@ class ApiEndpoint(object):
         return 'Scheduler is working and waiting for instructions'
 
     def status(self):
-        """/info uri : displaying status 
+        """/info uri : displaying status. Supports conditional requests (If-None-Match)
         ----------
         """
-        return self.subset_manager_pool.status()
+        return self.__cached_response('status', self.subset_manager_pool.status)
 
     def listvm(self):
-        """/listvm uri : displaying list of hosted VM 
+        """/listvm uri : displaying list of hosted VM. Supports conditional requests (If-None-Match)
         ----------
         """
-        return self.subset_manager_pool.list_vm()
+        return self.__cached_response('listvm', self.subset_manager_pool.list_vm)
+
+    def __cached_response(self, uri : str, compute):
+        """Return a JSON response serialized once per state tag of the pool. The tag is sent as ETag:
+        a client sending it back in If-None-Match gets an empty 304 response while the state is unchanged
+        ----------
+
+        Parameters
+        ----------
+        uri : str
+            Cache key
+        compute : function
+            Return the content to serialize
+
+        Returns
+        -------
+        response : Response
+            Flask response
+        """
+        tag = self.subset_manager_pool.get_state_tag() # Read first: a mutation during computation invalidates the cached body
+        cached_tag, body = self.response_cache.get(uri, (None, None))
+        if cached_tag != tag:
+            body = json.dumps(compute())
+            self.response_cache[uri] = (tag, body)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(tag)
+        return response.make_conditional(request)
 
     def deploy(self):
         """/deploy uri : deploying a new VM
@@ -90,6 +120,25 @@ class ApiEndpoint(object):
         success, reason = self.subset_manager_pool.deploy(vm_to_create)
         return {'success':success, 'reason':reason}
 
+    def deploy_batch(self):
+        """/deploy_batch uri : deploying a list of new VMs. Arguments are comma separated lists, one value per VM
+        ----------
+        """
+        usage = 'Wrong usage: http://' + self.api_url + ':' + str(self.api_port) + '/deploy_batch?name=example1,example2&cpu=1,2&mem=1,2&oc=1,2&qcow2=/var/lib/libvirt/images/volume1.qcow2,/var/lib/libvirt/images/volume2.qcow2'
+
+        args_required = ['name', 'cpu', 'mem', 'oc', 'qcow2']
+        for arg in args_required:
+            if request.args.get(arg) is None: return usage
+        name_list  = request.args.get('name').split(',')
+        cpu_list   = [int(cpu) for cpu in request.args.get('cpu').split(',')]
+        mem_list   = [int(float(mem)*(1024**2)) for mem in request.args.get('mem').split(',')] # from GB to KB
+        oc_list    = [float(oc) for oc in request.args.get('oc').split(',')]
+        qcow2_list = request.args.get('qcow2').split(',')
+        if not (len(name_list) == len(cpu_list) == len(mem_list) == len(oc_list) == len(qcow2_list)): return usage
+
+        vm_list = [DomainEntity(name=name, cpu=cpu, mem=mem, cpu_ratio=oc, qcow2=qcow2) for name, cpu, mem, oc, qcow2 in zip(name_list, cpu_list, mem_list, oc_list, qcow2_list)]
+        return {'results': self.subset_manager_pool.deploy_batch(vm_list)}
+
     def remove(self):
         """/remove uri : Remove a VM identified by its name
         ----------
@@ -118,6 +167,25 @@ class ApiEndpoint(object):
         
         return {'progress': self.subset_manager_pool.progress(candidate_vm=DomainEntity(cpu=cpu, mem=mem, cpu_ratio=oc))}
 
+    def simulate(self):
+        """/simulate uri : Return CPU, memory and pinning that deploying candidate VMs (in order) would result in, without deploying them
+        Arguments are comma separated lists, one value per VM
+        ----------
+        """
+        usage = 'Wrong usage: http://' + self.api_url + ':' + str(self.api_port) + '/simulate?cpu=1,2&mem=1,2&oc=1.0,2.0(&name=example1,example2)'
+
+        args_required = ['cpu', 'mem', 'oc']
+        for arg in args_required:
+            if request.args.get(arg) is None: return usage
+        cpu_list = [int(cpu) for cpu in request.args.get('cpu').split(',')]
+        mem_list = [int(float(mem)*(1024**2)) for mem in request.args.get('mem').split(',')] # from GB to KB
+        oc_list  = [float(oc) for oc in request.args.get('oc').split(',')]
+        name_list = request.args.get('name').split(',') if request.args.get('name') is not None else [None]*len(cpu_list) # Named by simulation
+        if not (len(cpu_list) == len(mem_list) == len(oc_list) == len(name_list)): return usage
+
+        vm_list = [DomainEntity(name=name, cpu=cpu, mem=mem, cpu_ratio=oc) for name, cpu, mem, oc in zip(name_list, cpu_list, mem_list, oc_list)]
+        return self.subset_manager_pool.simulate(vm_list)
+
     def shutdown(self):
         """Manage thread shutdown
         ----------
@@ -29,6 +29,18 @@ class DataEndpoint(object):
         """
         raise NotImplementedError()
 
+    def load_subset_pressure(self, timestamp : int, subset):
+        """Return subset resources pressure. Must be reimplemented
+        ----------
+        """
+        raise NotImplementedError()
+
+    def load_global_pressure(self, timestamp : int, manager):
+        """Return host resources pressure. Must be reimplemented
+        ----------
+        """
+        raise NotImplementedError()
+
     def is_live(self):
         """Return a boolean value based on if values are loaded from a live system
         ----------
@@ -53,7 +65,7 @@ class DataEndpoint(object):
         tmp : int 
             timestamp of data
         rec : str
-            type of record. Possible options are vm, subset or global
+            type of record. Possible options are vm, subset, pressure or global
         res :str
             Resource considered (e.g. cpu/mem...)
         val : float
@@ -61,7 +73,7 @@ class DataEndpoint(object):
         config : float
             Configuration Capacity
         subset : str (default to None)
-            If applicable, subset id (VM/subset)
+            If applicable, subset id (VM/subset/pressure)
         sb_oc: str (default to None)
             If applicable, oversubscription (VM/subset)
         sb_unused : float
@@ -84,7 +96,7 @@ class DataEndpoint(object):
         elif rec == 'vm':
             if (subset == None) or (vm_uuid == None) or (vm_cmn == None) or (sb_oc == None):
                 raise ValueError('Missing requirements parameters for vm record')
-        elif rec != 'global':
+        elif (rec != 'global') and (rec != 'pressure'):
             raise ValueError('Unknow record' + rec)
         return {'tmp':tmp, 'rec': rec, 'res':res, 'val':val, 'config':config,\
             'subset':subset,\
@@ -127,6 +139,14 @@ class DataEndpointLive(DataEndpoint):
         # Use subset explorer
         return manager.get_current_resources_usage()
 
+    def load_subset_pressure(self, timestamp : int, subset):
+        # Use pressure explorer
+        return subset.get_current_resources_pressure()
+
+    def load_global_pressure(self, timestamp : int, manager):
+        # Use pressure explorer
+        return manager.get_current_resources_pressure()
+
     def is_live(self):
         """Return a boolean value based on if values are loaded from a live system
         ----------
@@ -173,6 +193,7 @@ class DataEndpointCSV(DataEndpoint):
         self.input_subset  = {'cpu' : dict(), 'mem' : dict()}
         self.input_vm      = {'cpu' : dict(), 'mem' : dict()}
         self.input_vm_spec = dict()
+        self.input_pressure = {'cpu' : dict(), 'mem' : dict()}
         with open(self.input_file) as fp:
             for i, line in enumerate(fp):
                 if i == 0: continue
@@ -210,7 +231,10 @@ class DataEndpointCSV(DataEndpoint):
                         if ('tmp_first' not in self.input_vm_spec[uuid]): self.input_vm_spec[uuid]['tmp_first'] = timestamp
                         self.input_vm_spec[uuid]['tmp_last'] = timestamp
                     self.input_vm_spec[uuid][resource] = config
-                    
+                elif record == 'pressure':
+                    subset_id = line_as_list[self.keys.index('subset')] # 'None' on host pressure
+                    if subset_id not in self.input_pressure[resource]: self.input_pressure[resource][subset_id] = dict()
+                    self.input_pressure[resource][subset_id][timestamp] = value
                 else:
                     raise ValueError('Unknow record while loading trace', record)
         print('Loading completed')
@@ -234,6 +258,21 @@ class DataEndpointCSV(DataEndpoint):
         if self.input_file is None: raise ValueError('No CSV input file specified')
         return self.input_global[manager.get_res_name()][timestamp]
 
+    def load_subset_pressure(self, timestamp : int, subset):
+        """Return subset resources pressure. None if trace has no pressure records
+        ----------
+        """
+        if self.input_file is None: raise ValueError('No CSV input file specified')
+        subset_pressure = self.input_pressure[subset.get_res_name()].get('subset-' + str(subset.get_oversubscription_id()), dict())
+        return subset_pressure.get(timestamp, None)
+
+    def load_global_pressure(self, timestamp : int, manager):
+        """Return host resources pressure. None if trace has no pressure records
+        ----------
+        """
+        if self.input_file is None: raise ValueError('No CSV input file specified')
+        return self.input_pressure[manager.get_res_name()].get('None', dict()).get(timestamp, None)
+
     def store(self, record : dict):
         if self.output_file is None: raise ValueError('No CSV output file specified')
         line = ''.join([self.separator + str(record[key]) for key in self.keys])
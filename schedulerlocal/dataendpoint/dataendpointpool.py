@@ -115,6 +115,52 @@ class DataEndpointPool(object):
         """
         return self.loader.load_global(timestamp, subset_manager)
 
+    def load_subset_pressure(self, timestamp, subset):
+        """Return subset pressure from the loader, while also storing to the saver if it is defined
+        ----------
+
+        Parameters
+        ----------
+        timestamp : int 
+            timestamp requested
+        subset : Subset
+            Subset Object
+
+        Return
+        ----------
+        pressure : float
+            Pressure as [0;1], None if not available
+        """
+        pressure = self.loader.load_subset_pressure(timestamp, subset)
+        if self.saver != None:
+            self.saver.store(DataEndpoint.record(tmp=timestamp, rec='pressure',\
+                res=subset.get_res_name(), val=pressure, config=subset.get_capacity(),\
+                subset='subset-' + str(subset.get_oversubscription_id()),\
+                sb_oc=str(subset.get_oversubscription_id())))
+        return pressure
+
+    def load_global_pressure(self, timestamp, subset_manager):
+        """Return host pressure from the loader, while also storing to the saver if it is defined
+        ----------
+
+        Parameters
+        ----------
+        timestamp : int 
+            timestamp requested
+        subset_manager : SubsetManager
+            SubsetManager Object
+
+        Return
+        ----------
+        pressure : float
+            Pressure as [0;1], None if not available
+        """
+        pressure = self.loader.load_global_pressure(timestamp, subset_manager)
+        if self.saver != None:
+            self.saver.store(DataEndpoint.record(tmp=timestamp, rec='pressure',\
+                res=subset_manager.get_res_name(), val=pressure, config=subset_manager.get_capacity()))
+        return pressure
+
     def is_live(self):
         """Return a boolean value based on if values are loaded from a live system
         ----------
@@ -1,4 +1,4 @@
-from collections import defaultdict
+from schedulerlocal.node.cpumask import CpuMask
 
 class DomainEntity:
     """
@@ -13,8 +13,8 @@ class DomainEntity:
         VM name
     cpu : int
         CPU allocation
-    cpu_pin : list
-        list of vCPU pinned situation
+    cpu_pin : CpuMask
+        CPU allowed for all vCPU (or list of CpuMask, one per vCPU, if they differ as read from libvirt)
     cpu_ratio : float
         CPU oversubscription ratio
 
@@ -71,6 +71,12 @@ class DomainEntity:
         """
         return self.name
 
+    def set_name(self, name : str):
+        """Set VM name
+        ----------
+        """
+        self.name = name
+
     def get_mem(self, as_kb : bool = True):
         """Return mem allocation
         ----------
@@ -85,25 +91,31 @@ class DomainEntity:
         return self.cpu
 
     def get_cpu_pin(self):
-        """Return CPU pin situation
+        """Return CPU pin situation (a CpuMask shared by all vCPU, or a list of CpuMask per vCPU)
         ----------
         """
         return self.cpu_pin
 
-    def set_cpu_pin(self, template_pin : tuple):
-        """Set CPU pin situation based on template
+    def get_cpu_pin_of(self, vcpu : int):
+        """Return CpuMask of a given vCPU
+        ----------
+        """
+        if isinstance(self.cpu_pin, CpuMask): return self.cpu_pin
+        return self.cpu_pin[vcpu]
+
+    def set_cpu_pin(self, template_pin : CpuMask):
+        """Set CPU pin situation based on template. A single mask is kept for all vCPU
         ----------
         """
-        self.cpu_pin = [template_pin for vcpu in range(self.get_cpu())]
+        self.cpu_pin = template_pin
 
     def get_cpu_pin_aggregated(self):
-        """Return a dict specifying for each cpuid if at least one vCPU is pinned to it (boolean value)
+        """Return a CpuMask of cpuid to which at least one vCPU is pinned
         ----------
         """
-        aggregated_vm_cpu_pin = defaultdict(lambda: False)
-        for vcpu_pin in self.get_cpu_pin(): 
-            for cpu, is_pinned in enumerate(vcpu_pin): 
-                aggregated_vm_cpu_pin[cpu] = (aggregated_vm_cpu_pin[cpu] or is_pinned)
+        if isinstance(self.cpu_pin, CpuMask): return self.cpu_pin
+        aggregated_vm_cpu_pin = CpuMask()
+        for vcpu_pin in self.get_cpu_pin(): aggregated_vm_cpu_pin = aggregated_vm_cpu_pin | vcpu_pin
         return aggregated_vm_cpu_pin
 
     def get_cpu_ratio(self):
@@ -151,7 +163,7 @@ class DomainEntity:
     def __eq__(self, other): 
         if not isinstance(other, DomainEntity): return False
         if id(self) is id(other): return True
-        if self.uuid == other.uuid: return True
+        if (self.uuid is not None) and (self.uuid == other.uuid): return True # VMs not deployed yet have no uuid
         if (self.name == other.name) and (self.cpu == other.cpu) and (self.mem) == (other.mem): return True
         return False
 
@@ -1,6 +1,7 @@
-import libvirt, time
+import libvirt, time, threading
 from schedulerlocal.domain.libvirtxmlmodifier import xmlDomainNuma, xmlDomainMetaData, xmlDomainCputune
 from schedulerlocal.domain.domainentity import DomainEntity
+from schedulerlocal.node.cpumask import CpuMask
 
 class LibvirtConnector(object):
     """
@@ -12,6 +13,8 @@ class LibvirtConnector(object):
     url : str
         hypervisor url
 
+    Pinning applied to each VM is tracked: only vCPU whose cpumap changed are pinned again, and persistent (XML) updates
+    are deferred until flush_pinning()
     """
     def __init__(self, **kwargs):
         req_attributes = ['url', 'loc', 'machine']
@@ -23,6 +26,10 @@ class LibvirtConnector(object):
         if not self.conn:
             raise SystemExit('Failed to open connection to ' + self.url)
         self.cache_entity = dict()
+        self.cache_domain = dict() # uuid -> virDomain
+        self.applied_pin = dict() # uuid -> list of CpuMask (one per vCPU) last applied
+        self.pending_xml = dict() # uuid -> DomainEntity whose persistent pinning is outdated
+        self.pending_lock = threading.Lock() # Pinning is updated from API, monitoring and pinning epoch threads
 
         with open('static/template-vm.xml', 'r') as f: self.template_vm = f.read()
 
@@ -115,7 +122,8 @@ class LibvirtConnector(object):
             name = virDomain.name()
             mem = virDomain.maxMemory()
             cpu = virDomain.maxVcpus()
-            cpu_pin = virDomain.vcpuPinInfo()
+            cpu_pin = [CpuMask.from_template(vcpu_pin) for vcpu_pin in virDomain.vcpuPinInfo()]
+            if cpu_pin and all([vcpu_pin == cpu_pin[0] for vcpu_pin in cpu_pin]): cpu_pin = cpu_pin[0] # Single mask shared by vCPU
             # Custom metadata
             xml_manager = xmlDomainMetaData(xml_as_str=virDomain.XMLDesc())
             xml_manager.convert_to_object()
@@ -129,8 +137,39 @@ class LibvirtConnector(object):
         self.cache_entity[uuid] = DomainEntity(uuid=uuid, name=name, mem=mem, cpu=cpu, cpu_pin=cpu_pin, cpu_ratio=cpu_ratio)
         return self.cache_entity[uuid]
 
+    def get_domain(self, uuid : str):
+        """Return the libvirt domain of a given uuid. Lookups are cached
+        ----------
+
+        Parameters
+        ----------
+        uuid : str
+            VM uuid
+
+        Returns
+        -------
+        virDomain : virDomain
+            Libvirt model. Raise libvirtError if domain does not exist
+        """
+        if uuid not in self.cache_domain: self.cache_domain[uuid] = self.conn.lookupByUUIDString(uuid)
+        return self.cache_domain[uuid]
+
+    def forget_domain(self, uuid : str):
+        """Drop cached data of a given uuid (domain lookup, applied pinning and pending updates)
+        ----------
+
+        Parameters
+        ----------
+        uuid : str
+            VM uuid
+        """
+        self.cache_domain.pop(uuid, None)
+        self.applied_pin.pop(uuid, None)
+        with self.pending_lock: self.pending_xml.pop(uuid, None)
+
     def update_cpu_pinning(self, vm : DomainEntity, virDomain : libvirt.virDomain = None):
-        """Update the pinning of a VM to its attribute cpu_pin
+        """Update the live pinning of a VM to its attribute cpu_pin. Only vCPU whose cpumap changed since last update are pinned
+        Persistent update of XML desc is deferred until flush_pinning()
         ----------
 
         Parameters
@@ -140,25 +179,43 @@ class LibvirtConnector(object):
         virDomain : virDomain
             Libvirt model (retrieve if based on uuid if not specified)
         """
-        # Retrieve VM
-        vm_pin_current = None
+        uuid = vm.get_uuid()
+        vm_pin_model = [vm.get_cpu_pin_of(vcpu) for vcpu in range(vm.get_cpu())]
         try:
-            if virDomain == None: virDomain = self.conn.lookupByUUIDString(vm.get_uuid())
-            vm_pin_current = virDomain.vcpuPinInfo()
-            vm_pin_model   = vm.get_cpu_pin()
-
+            if virDomain == None: virDomain = self.get_domain(uuid)
+            vm_pin_current = self.applied_pin.get(uuid)
+            if vm_pin_current is None: # Unknown state: retrieved once from libvirt
+                vm_pin_current = [CpuMask.from_template(cpu_pin) for cpu_pin in virDomain.vcpuPinInfo()]
+            changed = False
             for vcpu, cpu_pin_current in enumerate(vm_pin_current):
+                if vcpu >= len(vm_pin_model): break
                 if cpu_pin_current != vm_pin_model[vcpu]:
-                    virDomain.pinVcpu(vcpu, vm_pin_model[vcpu]) # Live setting
+                    virDomain.pinVcpu(vcpu, vm_pin_model[vcpu].to_template()) # Live setting
+                    changed = True
         except libvirt.libvirtError as ex:  # VM is not alived anymore
-            pass
-        # Update XML desc
-        try:
-            host_config = len(vm.get_cpu_pin()[0])
-            cputune_xml = xmlDomainCputune(xml_as_str=virDomain.XMLDesc(), host_config=host_config, cpupin_per_vcpu=vm.get_cpu_pin())
-            virDomain = self.conn.defineXML(cputune_xml.convert_to_str_xml())
-        except Exception as ex:
-            pass
+            self.forget_domain(uuid)
+            return
+        self.applied_pin[uuid] = vm_pin_model
+        if changed:
+            with self.pending_lock: self.pending_xml[uuid] = vm
+
+    def flush_pinning(self):
+        """Apply deferred persistent pinning updates: XML desc of each VM whose pinning changed is rewritten once
+        ----------
+        """
+        with self.pending_lock:
+            pending = self.pending_xml
+            self.pending_xml = dict()
+        for uuid, vm in pending.items():
+            try:
+                virDomain = self.get_domain(uuid)
+                host_config = vm.get_cpu_pin_of(0).get_size()
+                cputune_xml = xmlDomainCputune(xml_as_str=virDomain.XMLDesc(), host_config=host_config, cpupin_per_vcpu=[vm.get_cpu_pin_of(vcpu) for vcpu in range(vm.get_cpu())])
+                self.conn.defineXML(cputune_xml.convert_to_str_xml())
+            except libvirt.libvirtError as ex: # VM is not defined anymore
+                self.forget_domain(uuid)
+            except Exception as ex:
+                pass
 
     def build_cpu_pinning(self, cpu_list : list, host_config : int):
         """Return Libvirt template of cpu pinning based on authorised list of cpu
@@ -173,12 +230,10 @@ class LibvirtConnector(object):
         Returns
         -------
 
-        template : Tuple
+        template : CpuMask
             Pinning template
         """
-        template_pin = [False for is_cpu_pinned in range(host_config)]
-        for cpu in cpu_list: template_pin[cpu.get_cpu_id()] = True
-        return tuple(template_pin)
+        return CpuMask(size=host_config, cpu_ids=[cpu.get_cpu_id() for cpu in cpu_list])
 
     def cache_purge(self):
         """Purge cache associating VM uuid to their domainentity representation
@@ -202,10 +257,11 @@ class LibvirtConnector(object):
             Usage as [0;1]
         """
         try:
-            virDomain = self.conn.lookupByUUIDString(vm.get_uuid())
+            virDomain = self.get_domain(vm.get_uuid())
             epoch_ns = time.time_ns()
             stats = virDomain.getCPUStats(total=True)
         except libvirt.libvirtError as ex:  # VM is not alived
+            self.forget_domain(vm.get_uuid())
             raise ConsumerNotAlived()
         total, system, user = (stats[0]['cpu_time'], stats[0]['system_time'], stats[0]['user_time'])
         cpu_usage_norm = None
@@ -232,9 +288,10 @@ class LibvirtConnector(object):
             Usage as [0;1]
         """
         try:
-            virDomain = self.conn.lookupByUUIDString(vm.get_uuid())
+            virDomain = self.get_domain(vm.get_uuid())
             stats = virDomain.memoryStats()
         except libvirt.libvirtError as ex:  # VM is not alived
+            self.forget_domain(vm.get_uuid())
             raise ConsumerNotAlived()
         #keys = ['actual', 'available', 'rss', 'major_fault']
         usage = stats['rss']/stats['actual']
@@ -266,8 +323,8 @@ class LibvirtConnector(object):
                 replace('{qcow2}', vm.get_qcow2())
         
         # Dynamically add cpupin related data to xml desc
-        host_config = len(vm.get_cpu_pin()[0])
-        cputune_xml = xmlDomainCputune(xml_as_str=vm_xml, host_config=host_config, cpupin_per_vcpu=vm.get_cpu_pin())
+        host_config = vm.get_cpu_pin_of(0).get_size()
+        cputune_xml = xmlDomainCputune(xml_as_str=vm_xml, host_config=host_config, cpupin_per_vcpu=[vm.get_cpu_pin_of(vcpu) for vcpu in range(vm.get_cpu())])
         virDomain = None
         try:
             virDomain = self.conn.defineXML(cputune_xml.convert_to_str_xml())
@@ -283,6 +340,8 @@ class LibvirtConnector(object):
             vm.set_uuid(virDomain.UUIDString())
         except libvirt.libvirtError as ex: 
             return (False, str(ex))
+        self.cache_domain[vm.get_uuid()] = virDomain
+        self.applied_pin[vm.get_uuid()] = [vm.get_cpu_pin_of(vcpu) for vcpu in range(vm.get_cpu())] # Defined with its pinning
         return (True, None)
 
     def delete_vm(self, vm : DomainEntity):
@@ -300,14 +359,16 @@ class LibvirtConnector(object):
             Success as True/False with reason
         """
         try:
-            virDomain = self.conn.lookupByUUIDString(vm.get_uuid())
+            virDomain = self.get_domain(vm.get_uuid())
         except libvirt.libvirtError as ex: # Already deleted
+            self.forget_domain(vm.get_uuid())
             return (True, None)
         try:
             virDomain.destroy()
             virDomain.undefine()
         except libvirt.libvirtError as ex:
             return (False, str(ex))
+        self.forget_domain(vm.get_uuid())
         return (True, None)
 
     def __del__(self):
@@ -315,6 +376,7 @@ class LibvirtConnector(object):
         ----------
         """
         try:
+            self.flush_pinning()
             self.conn.close()
         except libvirt.libvirtError as ex:
             pass
@@ -1,4 +1,5 @@
 from xml.dom import minidom
+from schedulerlocal.node.cpumask import CpuMask
 
 class xmlObject(object):
     """
@@ -430,7 +431,7 @@ class xmlDomainCputunePin(xmlObject):
         Return vcpupin cell XML element
     """
 
-    def __init__(self, dom_cputune : minidom.Element, host_config : int, xml_as_document = None, xml_as_str = None, vcpu : int = None, cpu_template : tuple = None):
+    def __init__(self, dom_cputune : minidom.Element, host_config : int, xml_as_document = None, xml_as_str = None, vcpu : int = None, cpu_template : CpuMask = None):
         self.dom_cputune = dom_cputune
         self.host_config = host_config # number of cpu on host
         self.vcpu = vcpu
@@ -487,20 +488,18 @@ class xmlDomainCputunePin(xmlObject):
         regex : str
             CPU authorized in regex form
         """
-        cpuset_str = ''.join([',' + str(cpuid) if is_pinned else '' for cpuid, is_pinned in enumerate(self.cpu_template)])
-        return cpuset_str.replace(',', '', 1) # remove first coma
+        return self.cpu_template.to_cpuset_str()
 
     def __get_cpu_template_from_regex(self, regex_cpu :str):
         """Using regex str, return the equivalent cpu template
         
         Return
         ----------
-        template : tuple
-            CPU authorized in tuple form
+        template : CpuMask
+            CPU authorized as a mask
         """
-        self.cpu_template = [False for i in range(self.host_config)]
-        for cpuid in regex_cpu.split(','): self.cpu_template[int(cpuid)] = True
-        return tuple(self.cpu_template) # convert list to tuple
+        self.cpu_template = CpuMask.from_cpuset_str(regex_cpu, size=self.host_config)
+        return self.cpu_template
 
     def get_vcpu(self):
         """Getter on vcpu attribute
@@ -0,0 +1,89 @@
+import threading
+from schedulerlocal.domain.domainentity import DomainEntity
+
+class PinningEpoch(object):
+    """
+    A PinningEpoch collects VMs whose pinning changed and applies their final pinning once through the connector
+    An epoch is opened by begin() and closed by end() (epochs can be nested). Changes are applied when the outermost epoch
+    ends, or after a short window without new epoch to coalesce bursts of API calls
+    Changes marked outside of any epoch are applied right away
+    ...
+
+    Attributes
+    ----------
+    connector : LibvirtConnector
+        Connector used to apply pinning
+    window : float (optional)
+        Delay (in seconds) before applying changes once the outermost epoch ended. Default to 0 (applied on epoch end)
+
+    Public Methods
+    -------
+    begin()/end()
+        Open/close an epoch
+    mark()
+        Register a VM whose pinning changed
+    flush()
+        Apply pending changes
+    """
+
+    def __init__(self, **kwargs):
+        req_attributes = ['connector']
+        for req_attribute in req_attributes:
+            if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
+            setattr(self, req_attribute, kwargs[req_attribute])
+        self.window = kwargs['window'] if 'window' in kwargs else 0
+        self.depth = 0
+        self.pending = dict() # uuid -> DomainEntity
+        self.timer = None
+        self.lock = threading.RLock()
+
+    def begin(self):
+        """Open an epoch: changes are collected until the outermost epoch ends
+        ----------
+        """
+        with self.lock:
+            self.depth += 1
+            if self.timer is not None: # A burst is ongoing, keep collecting
+                self.timer.cancel()
+                self.timer = None
+
+    def end(self):
+        """Close an epoch. Pending changes are applied if it was the outermost one (after window if specified)
+        ----------
+        """
+        with self.lock:
+            if self.depth <= 0: raise ValueError('No epoch to end')
+            self.depth -= 1
+            if self.depth > 0 or not self.pending: return
+            if self.window <= 0:
+                self.flush()
+                return
+            self.timer = threading.Timer(self.window, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def mark(self, vm : DomainEntity):
+        """Register a VM whose pinning changed. Only its last pinning will be applied
+        ----------
+
+        Parameters
+        ----------
+        vm : DomainEntity
+            The VM to consider
+        """
+        with self.lock:
+            self.pending[vm.get_uuid()] = vm
+            if self.depth <= 0 and self.timer is None: self.flush()
+
+    def flush(self):
+        """Apply pinning of pending VMs. A delayed application not started yet is cancelled
+        ----------
+        """
+        with self.lock:
+            if self.timer is not None: self.timer.cancel()
+            self.timer = None
+            pending = self.pending
+            self.pending = dict()
+            for vm in pending.values():
+                if vm.is_being_destroyed(): continue
+                self.connector.update_cpu_pinning(vm=vm)
@@ -0,0 +1,129 @@
+from schedulerlocal.domain.domainentity import DomainEntity
+
+class VmRegistry(object):
+    """
+    A VmRegistry indexes hosted VMs by uuid and by name, and records the subset hosting each of them in each subset manager
+    VMs not deployed yet have no uuid: they are indexed by name and indexed by uuid on their first lookup once deployed
+    ...
+
+    Public Methods
+    -------
+    register()/unregister()
+        Add/remove a VM
+    find()
+        Return the registered VM matching a VM copy
+    get_vm_by_name()
+        Return the registered VM having a given name
+    get_subset_ids()
+        Return the subset hosting a VM in each manager
+    fork()
+        Return a copy of the registry
+    """
+
+    def __init__(self, **kwargs):
+        self.vm_by_name = dict() # name -> DomainEntity
+        self.vm_by_uuid = dict() # uuid -> DomainEntity
+        self.subset_ids = dict() # name -> dict (manager name -> subset id)
+
+    def register(self, vm : DomainEntity, subset_ids : dict):
+        """Add a VM to the registry
+        ----------
+
+        Parameters
+        ----------
+        vm : DomainEntity
+            The VM to add
+        subset_ids : dict
+            Subset id hosting the VM, per subset manager name
+        """
+        self.vm_by_name[vm.get_name()] = vm
+        if vm.get_uuid() is not None: self.vm_by_uuid[vm.get_uuid()] = vm
+        self.subset_ids[vm.get_name()] = subset_ids
+
+    def unregister(self, vm : DomainEntity):
+        """Remove a VM from the registry, if present
+        ----------
+
+        Parameters
+        ----------
+        vm : DomainEntity
+            The VM to remove
+        """
+        registered = self.vm_by_name.get(vm.get_name())
+        if registered is None or registered is not vm: return
+        del self.vm_by_name[vm.get_name()]
+        del self.subset_ids[vm.get_name()]
+        if vm.get_uuid() is not None and self.vm_by_uuid.get(vm.get_uuid()) is vm: del self.vm_by_uuid[vm.get_uuid()]
+
+    def find(self, vm_copy : DomainEntity):
+        """Return the registered VM matching a VM copy (e.g. as retrieved from the connector): by uuid if the registered VM
+        has one, by name otherwise
+        ----------
+
+        Parameters
+        ----------
+        vm_copy : DomainEntity
+            The VM to search for
+
+        Returns
+        -------
+        vm : DomainEntity
+            None if not present
+        """
+        if vm_copy.get_uuid() is not None and vm_copy.get_uuid() in self.vm_by_uuid: return self.vm_by_uuid[vm_copy.get_uuid()]
+        registered = self.vm_by_name.get(vm_copy.get_name())
+        if registered is None: return None
+        if registered.get_uuid() is None: return registered
+        if registered.get_uuid() != vm_copy.get_uuid(): return None
+        self.vm_by_uuid[registered.get_uuid()] = registered # Deployed since its registration
+        return registered
+
+    def get_vm_by_name(self, name : str):
+        """Return the registered VM having a given name
+        ----------
+
+        Parameters
+        ----------
+        name : str
+            The name to search for
+
+        Returns
+        -------
+        vm : DomainEntity
+            None if not present
+        """
+        return self.vm_by_name.get(name)
+
+    def get_subset_ids(self, vm : DomainEntity):
+        """Return the subset hosting a registered VM in each subset manager
+        ----------
+
+        Parameters
+        ----------
+        vm : DomainEntity
+            The registered VM
+
+        Returns
+        -------
+        subset_ids : dict
+            Subset id per subset manager name
+        """
+        return self.subset_ids[vm.get_name()]
+
+    def fork(self):
+        """Return a copy of the registry, for simulation purpose. VMs are shared
+        ----------
+
+        Returns
+        -------
+        registry : VmRegistry
+            copy
+        """
+        forked = VmRegistry()
+        forked.vm_by_name = dict(self.vm_by_name)
+        forked.vm_by_uuid = dict(self.vm_by_uuid)
+        forked.subset_ids = dict(self.subset_ids)
+        return forked
+
+    def __len__(self):
+        return len(self.vm_by_name)
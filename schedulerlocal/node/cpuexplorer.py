@@ -2,6 +2,7 @@ import re
 from os import listdir, sysconf
 from os.path import isfile, join, exists
 from schedulerlocal.node.cpuset import ServerCpu, CpuTime, ServerCpuSet
+from schedulerlocal.node.procfsreader import ProcfsReader
 
 class CpuExplorer:
     """
@@ -14,6 +15,10 @@ class CpuExplorer:
         If specified, only core of this list will be considered (default to all)
     to_exclude : list (optional)
         If specified, core from this list will be excluded (default to none)
+    topology_cache : TopologyCache (optional)
+        If specified, discovered cpuset is cached on disk and reused on restart
+    fs_root : str (optional)
+        If specified, /sys and /proc are read relatively to this folder (e.g. a synthetic host). Default to /
 
     Public Methods
     -------
@@ -27,13 +32,16 @@ class CpuExplorer:
         attributes = ['to_include', 'to_exclude']
         for attribute in attributes:
             setattr(self, attribute, kwargs[attribute] if attribute in kwargs else list())
-        self.fs_cpu           = '/sys/devices/system/cpu/'
+        self.topology_cache = kwargs['topology_cache'] if 'topology_cache' in kwargs else None
+        self.fs_root          = kwargs['fs_root'].rstrip('/') if 'fs_root' in kwargs else ''
+        self.fs_cpu           = self.fs_root + '/sys/devices/system/cpu/'
         self.fs_cpu_topology  = '/topology'
         self.fs_cpu_cache     = '/cache/index'
         self.fs_cpu_maxfreq   = '/cpufreq/cpuinfo_max_freq'
-        self.fs_numa          = '/sys/devices/system/node/'
+        self.fs_numa          = self.fs_root + '/sys/devices/system/node/'
         self.fs_numa_distance = '/distance'
-        self.fs_stat          = '/proc/stat'
+        self.fs_stat          = self.fs_root + '/proc/stat'
+        self.fs_stat_reader   = ProcfsReader(path=self.fs_stat) # Kept open as read on each monitoring iteration
         # From https://www.kernel.org/doc/Documentation/filesystems/proc.txt
         self.fs_stats_keys         = {'cpuid':0, 'user':1, 'nice':2 , 'system':3, 'idle':4, 'iowait':5, 'irq':6, 'softirq':7, 'steal':8, 'guest':9, 'guest_nice':10}
         self.fs_stats_idle         = ['idle', 'iowait']
@@ -49,11 +57,17 @@ class CpuExplorer:
         cpuset : ServerCpuSet
             Local Cpuset
         """
+        if self.topology_cache is not None:
+            cache_key = self.topology_cache.build_key(to_include=self.to_include, to_exclude=self.to_exclude)
+            cpuset = self.topology_cache.load(cache_key)
+            if cpuset is not None: return cpuset
         cpu_count, cpu_list_conform = self.__retrieve_cpu_list()
         cpuset = ServerCpuSet(host_count=cpu_count)
         for cpu in cpu_list_conform: cpuset.add_cpu(self.__read_cpu(cpu, cpu_list_conform))
         cpuset.set_numa_distances(self.__read_numa_distance())
-        return cpuset.build_distances()
+        cpuset.build_distances()
+        if self.topology_cache is not None: self.topology_cache.store(cache_key, cpuset)
+        return cpuset
 
     def get_usage_of(self, server_cpu_list : list):
         """Return the CPU usage of a given ServerCpu object list. None if unable to compute it (as delta values are needed=
@@ -69,17 +83,14 @@ class CpuExplorer:
         cpu_usage : float
             Usage as [0;n] n being the number of element in server_cpu_list
         """
-        hist_by_cpu = {'cpu'  + str(server_cpu.get_cpu_id()):server_cpu.get_hist() for server_cpu in server_cpu_list}
+        hist_by_cpu = {b'cpu'  + str(server_cpu.get_cpu_id()).encode():server_cpu.get_hist() for server_cpu in server_cpu_list}
         cumulated_cpu_usage = 0
-        with open(self.fs_stat, 'r') as f:
-            lines = f.readlines()
+        # Only leading cpu lines are read, the remaining of /proc/stat (intr, softirq...) is never copied
+        for line in self.fs_stat_reader.read_lines(prefix=b'cpu'):
+
+            split = line.split()
+            if split[self.fs_stats_keys['cpuid']] not in hist_by_cpu: continue
 
-        for line in lines:
-            
-            split = line.split(' ')
-            if not split[self.fs_stats_keys['cpuid']].startswith('cpu'): break
-            if split[self.fs_stats_keys['cpuid']] not in hist_by_cpu.keys(): continue
-            
             hist_object = hist_by_cpu[split[self.fs_stats_keys['cpuid']]]
             cpu_usage = self.__get_usage_of_line(split=split, hist_object=hist_object)
         
@@ -104,9 +115,7 @@ class CpuExplorer:
         cpu_usage : float
             Usage as [0;n] n being the number of element in server_cpu_list
         """
-        with open(self.fs_stat, 'r') as f:
-            split = f.readlines()[0].split(' ')
-            split.remove('')
+        split = self.fs_stat_reader.read_lines(last=b'cpu ')[0].split()
         return self.__get_usage_of_line(split=split, hist_object=self.global_cpu_time)
 
     def __get_usage_of_line(self, split : list, hist_object : object):
@@ -117,7 +126,7 @@ class CpuExplorer:
         Parameters
         ----------
         split : list
-            splitted CPU line from /proc/stat file
+            splitted CPU line from /proc/stat file (as bytes)
         hist_object : object
             Object having previous CPU time
             
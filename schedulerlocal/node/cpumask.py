@@ -0,0 +1,167 @@
+class CpuMask(object):
+    """
+    A class used to represent a set of CPU as a bitmask (bit i set if cpu i belongs to the set)
+    Used for subset resources, free CPU and pinning: set operations cost O(words) and a pinning has a constant size per VM
+    Masks are immutable: operations return new masks, so that a single mask can be shared by all vCPU of a VM
+    ...
+
+    Attributes
+    ----------
+    size : int (optional)
+        Count of CPU on host (length of the libvirt cpumap). Default to the highest cpu id + 1
+    bits : int (optional)
+        Bitmask value. Default to 0
+    cpu_ids : list (optional)
+        If specified, CPU id to set in mask
+
+    Public Methods
+    -------
+    from_template():
+        Build a mask from a libvirt cpumap (tuple of booleans)
+    from_cpuset_str():
+        Build a mask from a cpuset string (e.g. 0-3,8)
+    with_cpu()/without_cpu():
+        Return a mask with/without a given cpu
+    count():
+        Return the count of CPU in mask
+    to_template():
+        Return mask as a libvirt cpumap (tuple of booleans)
+    to_cpuset_str():
+        Return mask as a comma separated list of cpu id
+    """
+
+    def __init__(self, **kwargs):
+        self.bits = kwargs['bits'] if 'bits' in kwargs else 0
+        if 'cpu_ids' in kwargs:
+            for cpu_id in kwargs['cpu_ids']: self.bits |= (1 << cpu_id)
+        self.size = kwargs['size'] if ('size' in kwargs and kwargs['size'] is not None) else self.bits.bit_length()
+        self.template = None # Lazily computed libvirt cpumap
+
+    @staticmethod
+    def from_template(template : tuple):
+        """Build a mask from a libvirt cpumap
+        ----------
+
+        Parameters
+        ----------
+        template : tuple
+            Tuple of booleans, one per host CPU
+
+        Returns
+        -------
+        mask : CpuMask
+            Equivalent mask
+        """
+        bits = int(''.join(['1' if is_pinned else '0' for is_pinned in reversed(template)]) or '0', 2)
+        return CpuMask(size=len(template), bits=bits)
+
+    @staticmethod
+    def from_cpuset_str(cpuset : str, size : int = None):
+        """Build a mask from a cpuset string as found in libvirt XML or in /sys (e.g. 0-3,8)
+        ----------
+
+        Parameters
+        ----------
+        cpuset : str
+            cpuset string
+        size : int (optional)
+            Count of CPU on host
+
+        Returns
+        -------
+        mask : CpuMask
+            Equivalent mask
+        """
+        bits = 0
+        for cpu_range in cpuset.split(','):
+            cpu_range = cpu_range.strip()
+            if not cpu_range: continue
+            if '-' in cpu_range:
+                inf, sup = cpu_range.split('-')
+                bits |= ((1 << (int(sup)-int(inf)+1)) - 1) << int(inf)
+            else: bits |= (1 << int(cpu_range))
+        return CpuMask(size=size, bits=bits)
+
+    def with_cpu(self, cpu_id : int):
+        """Return a mask including the given cpu
+        ----------
+        """
+        return CpuMask(size=max(self.size, cpu_id+1), bits=self.bits | (1 << cpu_id))
+
+    def without_cpu(self, cpu_id : int):
+        """Return a mask excluding the given cpu
+        ----------
+        """
+        return CpuMask(size=self.size, bits=self.bits & ~(1 << cpu_id))
+
+    def count(self):
+        """Return the count of CPU in mask
+        ----------
+        """
+        return bin(self.bits).count('1')
+
+    def is_empty(self):
+        """Return if mask has no CPU
+        ----------
+        """
+        return self.bits == 0
+
+    def get_size(self):
+        """Return count of CPU on host
+        ----------
+        """
+        return self.size
+
+    def to_template(self):
+        """Return mask as a libvirt cpumap: tuple of booleans, one per host CPU. Computed once per mask
+        ----------
+
+        Returns
+        -------
+        template : tuple
+            Pinning template
+        """
+        if self.template is None:
+            as_str = format(self.bits, 'b').zfill(self.size)[::-1] # Bit i is at index i
+            self.template = tuple([bit == '1' for bit in as_str[:self.size]])
+        return self.template
+
+    def to_cpuset_str(self):
+        """Return mask as a comma separated list of cpu id, as used in libvirt vcpupin cpuset
+        ----------
+        """
+        return ','.join([str(cpu_id) for cpu_id in self])
+
+    def __contains__(self, cpu_id : int):
+        return (self.bits >> cpu_id) & 1 == 1
+
+    def __iter__(self):
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    def __len__(self):
+        return self.count()
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __or__(self, other):
+        return CpuMask(size=max(self.size, other.size), bits=self.bits | other.bits)
+
+    def __and__(self, other):
+        return CpuMask(size=max(self.size, other.size), bits=self.bits & other.bits)
+
+    def __sub__(self, other):
+        return CpuMask(size=self.size, bits=self.bits & ~other.bits)
+
+    def __eq__(self, other):
+        return isinstance(other, CpuMask) and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __str__(self):
+        return 'CpuMask(' + self.to_cpuset_str() + ')'
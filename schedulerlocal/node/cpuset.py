@@ -1,4 +1,5 @@
 from json import loads
+import numpy as np
 
 class ServerCpu(object):
     """
@@ -165,8 +166,8 @@ class ServerCpuSet(object):
         Dictionary of numa node distances
     cpu_list : list
         List of CPU
-    distances : dict()
-        List of CPU
+    distances : np.ndarray
+        Dense matrix of distances between CPU, indexed by CPU position in cpu_list
     host_count: int
         Count of CPU on host, without consideration on include/exclude list
 
@@ -180,14 +181,19 @@ class ServerCpuSet(object):
         Dump current state as a json string
     load_from_json():
         load object attributes from json file
+    dump_as_arrays():
+        Dump current state as a dict of integer arrays
+    load_from_arrays():
+        load object attributes from integer arrays
     Getter/SetterList of available CPU ordered by their distance
     """
 
     def __init__(self, **kwargs):
         self.numa_distances = kwargs['numa_distances'] if 'numa_distances' in kwargs else None
         self.cpu_list = kwargs['cpu_list'] if 'cpu_list' in kwargs else list()
-        self.distances = kwargs['distances'] if 'distances' in kwargs else dict()
+        self.distances = kwargs['distances'] if 'distances' in kwargs else None
         self.host_count = kwargs['host_count'] if 'host_count' in kwargs else None
+        self.__build_position()
 
     def add_cpu(self, cpu : ServerCpu):
         """Add a ServerCpu object
@@ -202,24 +208,42 @@ class ServerCpuSet(object):
 
     def build_distances(self):
         """For each CPU tuple possible in the cpuset, compute the distance based on Cache Level, siblings and numa distances
-        Distances are ordered.
+        Distances are computed at once as a dense matrix from cache id and numa arrays
+        Semantic is the one of ServerCpu.compute_distance_to_cpu(): 10 per cache level until the first shared one, numa distance otherwise
         ----------
         """
         if self.numa_distances is None:
             raise ValueError('Numa distances weren\'t previously set')
-        self.distances = dict()
+        self.__build_position()
+        if not self.cpu_list:
+            self.distances = np.zeros((0,0), dtype=np.int16)
+            return self
+
+        # Cache ids as a (cpu, level) array. If heterogenous cache level exists, be careful to distance step incrementation
+        cache_levels = list(self.cpu_list[0].get_cache_level().keys())
         for cpu in self.cpu_list:
-            single_cpu_distances = dict()
-            others_cpu = list(self.cpu_list)
-            others_cpu.remove(cpu)
-            for other_cpu in others_cpu:
-                single_cpu_distances[other_cpu.get_cpu_id()] = cpu.compute_distance_to_cpu(other_cpu, self.numa_distances)
-            # Reorder distances from the closest one to the farthest one 
-            self.distances[cpu.get_cpu_id()] = {k:v for k, v in sorted(single_cpu_distances.items(), key=lambda item: item[1])}
+            if len(cpu.get_cache_level()) != len(cache_levels) or any(level not in cpu.get_cache_level() for level in cache_levels):
+                raise ValueError('Cannot manage heterogenous cache level between', self.cpu_list[0].get_cpu_id(), 'and', cpu.get_cpu_id())
+        cache_ids = np.array([[cpu.get_cache_level()[level] for level in cache_levels] for cpu in self.cpu_list], dtype=np.int64).reshape(len(self.cpu_list), len(cache_levels))
+
+        # Numa distance of each cpu pair
+        numa_ids = np.array([cpu.get_numa_node() for cpu in self.cpu_list], dtype=np.int64)
+        numa_table = np.zeros((max(self.numa_distances.keys())+1, max(len(row) for row in self.numa_distances.values())), dtype=np.int16)
+        for numa, row in self.numa_distances.items(): numa_table[numa,:len(row)] = row
+
+        step = 10
+        # Farthest case first, then overwritten from the last cache level to the first one
+        distances = (step*len(cache_levels) + numa_table[numa_ids[:,None], numa_ids[None,:]]).astype(np.int16)
+        for level_index in reversed(range(len(cache_levels))):
+            shared = (cache_ids[:,level_index][:,None] == cache_ids[:,level_index][None,:])
+            distances[shared] = step*(level_index+1)
+        np.fill_diagonal(distances, 0)
+        self.distances = distances
         return self
 
     def load_from_json(self, json : str):
         """Instantiate attributes from a json str
+        Distances may be stored either as a matrix (list of rows following cpu_list order) or as a legacy dict of dict
         ----------
 
         Parameters
@@ -234,12 +258,96 @@ class ServerCpuSet(object):
         """
         raw_object = loads(json)['cpuset']
         self.numa_distances = {int(k):v for k,v in raw_object['numa_distances'].items()}
-        self.distances = {int(k):{int(kprime):vprime for kprime,vprime in v.items()} for k,v in raw_object['distances'].items()}
         self.cpu_list = list()
         self.host_count = raw_object['host_count']
         for raw_cpu in raw_object['cpu_list']: self.cpu_list.append(ServerCpu(**raw_cpu))
+        self.__build_position()
+        raw_distances = raw_object['distances'] if 'distances' in raw_object else None
+        if not raw_distances: self.distances = None
+        elif type(raw_distances) is dict: # Legacy format {cpuid:{cpuid:distance}}
+            self.distances = np.zeros((len(self.cpu_list), len(self.cpu_list)), dtype=np.int16)
+            for cpuid, single_cpu_distances in raw_distances.items():
+                for other_cpuid, distance in single_cpu_distances.items():
+                    self.distances[self.cpu_position[int(cpuid)], self.cpu_position[int(other_cpuid)]] = distance
+        else: self.distances = np.array(raw_distances, dtype=np.int16)
         return self
 
+    def dump_as_arrays(self):
+        """Dump current state as a dict of integer arrays (compact alternative to json, see TopologyFile)
+        Lists of siblings are padded with -1
+        ----------
+
+        Returns
+        -------
+        arrays : dict
+            Dict of np.ndarray
+        """
+        cache_levels = list(self.cpu_list[0].get_cache_level().keys()) if self.cpu_list else list()
+        numa_ids = sorted(self.numa_distances.keys()) if self.numa_distances is not None else list()
+        arrays = {
+            'host_count': np.array(self.host_count if self.host_count is not None else -1, dtype=np.int64),
+            'cpu_id': np.array([cpu.get_cpu_id() for cpu in self.cpu_list], dtype=np.int32),
+            'numa_node': np.array([cpu.get_numa_node() for cpu in self.cpu_list], dtype=np.int32),
+            'max_freq': np.array([cpu.get_max_freq() for cpu in self.cpu_list], dtype=np.int64),
+            'cache_level': np.array([int(level) for level in cache_levels], dtype=np.int32),
+            'cache_id': np.array([[cpu.get_cache_level()[level] for level in cache_levels] for cpu in self.cpu_list], dtype=np.int32).reshape(len(self.cpu_list), len(cache_levels)),
+            'sib_smt': self.__pad([cpu.get_sib_smt() for cpu in self.cpu_list]),
+            'sib_cpu': self.__pad([cpu.get_sib_cpu() for cpu in self.cpu_list]),
+            'numa_id': np.array(numa_ids, dtype=np.int32),
+            'numa_distances': self.__pad([self.numa_distances[numa] for numa in numa_ids]),
+            'distances': self.distances if self.distances is not None else np.zeros((0,0), dtype=np.int16)}
+        return arrays
+
+    def load_from_arrays(self, arrays : dict):
+        """Instantiate attributes from a dict of integer arrays as generated by dump_as_arrays()
+        ----------
+
+        Parameters
+        ----------
+        arrays : dict
+            Dict (or NpzFile) of np.ndarray
+
+        Returns
+        -------
+        self : ServerCpuSet
+            itself
+        """
+        host_count = int(arrays['host_count'])
+        self.host_count = host_count if host_count >= 0 else None
+        self.numa_distances = {numa: self.__unpad(row) for numa, row in zip(arrays['numa_id'].tolist(), arrays['numa_distances'])}
+        cache_levels = arrays['cache_level'].tolist()
+        cache_ids = arrays['cache_id'].tolist()
+        sib_smt = [self.__unpad(row) for row in arrays['sib_smt']]
+        sib_cpu = [self.__unpad(row) for row in arrays['sib_cpu']]
+        self.cpu_list = list()
+        for index, (cpu_id, numa_node, max_freq) in enumerate(zip(arrays['cpu_id'].tolist(), arrays['numa_node'].tolist(), arrays['max_freq'].tolist())):
+            self.cpu_list.append(ServerCpu(cpu_id=cpu_id, numa_node=numa_node, max_freq=max_freq,\
+                sib_smt=sib_smt[index], sib_cpu=sib_cpu[index], cache_level=dict(zip(cache_levels, cache_ids[index]))))
+        self.__build_position()
+        self.distances = np.array(arrays['distances'], dtype=np.int16) if arrays['distances'].size > 0 else None
+        return self
+
+    def __pad(self, rows : list):
+        """Convert a list of int lists to a 2D array padded with -1
+        ----------
+        """
+        width = max([len(row) for row in rows]) if rows else 0
+        padded = np.full((len(rows), width), -1, dtype=np.int32)
+        for index, row in enumerate(rows): padded[index,:len(row)] = row
+        return padded
+
+    def __unpad(self, row : np.ndarray):
+        """Convert a row padded with -1 back to a list of int
+        ----------
+        """
+        return row[row >= 0].tolist()
+
+    def __build_position(self):
+        """Index CPU position in cpu_list (which is also their position in distances matrix)
+        ----------
+        """
+        self.cpu_position = {cpu.get_cpu_id():position for position, cpu in enumerate(self.cpu_list)}
+
     def get_host_count(self):
         """Return Count of CPU on host, without consideration on include/exclude list
         ----------
@@ -253,10 +361,12 @@ class ServerCpuSet(object):
         return self.cpu_list
 
     def set_cpu_list(self, cpu_list : list):
-        """Set CPU list
+        """Set CPU list. Previous distances are dropped as positions changed
         ----------
         """
         self.cpu_list = cpu_list
+        self.distances = None
+        self.__build_position()
 
     def get_numa_distances(self):
         """Return numa distances as dict
@@ -271,12 +381,28 @@ class ServerCpuSet(object):
         self.numa_distances = numa_distances
 
     def get_distances(self):
-        """Return distances (raise an exception if werent previously build with build_distances() method)
+        """Return distances matrix (raise an exception if werent previously build with build_distances() method)
         ----------
         """
-        if not self.distances: raise ValueError('Distances weren\'t previously build')
+        if self.distances is None: raise ValueError('Distances weren\'t previously build')
         return self.distances
 
+    def get_positions(self, cpu_list : list):
+        """Return position of ServerCpu objects in distances matrix
+        ----------
+
+        Parameters
+        ----------
+        cpu_list : list
+            list of ServerCpu
+
+        Returns
+        -------
+        positions : np.ndarray
+            Array of positions
+        """
+        return np.fromiter((self.cpu_position[cpu.get_cpu_id()] for cpu in cpu_list), dtype=np.intp, count=len(cpu_list))
+
     def get_allowed(self):
         """Return usable CPU count for VMs
         ----------
@@ -304,5 +430,5 @@ class ServerCpuSet(object):
         Distance : int
             Distance between two CPUs
         """
-        if not self.distances: raise ValueError('Distances weren\'t previously build')
-        return self.distances[cpu0.get_cpu_id()][cpu1.get_cpu_id()]
\ No newline at end of file
+        if self.distances is None: raise ValueError('Distances weren\'t previously build')
+        return int(self.distances[self.cpu_position[cpu0.get_cpu_id()], self.cpu_position[cpu1.get_cpu_id()]])
\ No newline at end of file
@@ -0,0 +1,282 @@
+from schedulerlocal.node.cpuset import ServerCpu
+
+class CpuTree(object):
+    """
+    A class used to represent the CPU topology as a tree (NUMA node -> cache domains, e.g. L3/CCX then core -> CPU)
+    and to track free CPU counts on each of its node
+    Distances of ServerCpu.compute_distance_to_cpu() only depend on the deepest node shared by two CPU. Hence, the sum of
+    distances from a CPU to a set of CPU can be computed from the count of members per node, without scanning CPU pairs
+    Cache levels sharing the same grouping (e.g. L1 and L2 per core) are merged on a single tree level
+    Static structure is shared between forks, only free counts are copied
+    ...
+
+    Attributes
+    ----------
+    cpuset : ServerCpuSet
+        Topology to represent
+
+    Public Methods
+    -------
+    allocate():
+        Mark a CPU as used
+    release():
+        Mark a CPU as free
+    is_free():
+        Test if a CPU is free
+    count_free():
+        Return free CPU count
+    closest_free():
+        Return the free CPU closest to a given CPU list
+    farthest_free():
+        Return the free CPU farthest from allocated CPU
+    fork():
+        Return a copy sharing the static structure
+    """
+
+    def __init__(self, **kwargs):
+        req_attributes = ['cpuset']
+        for req_attribute in req_attributes:
+            if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
+            setattr(self, req_attribute, kwargs[req_attribute])
+        if 'structure' in kwargs: # Fork
+            self.structure = kwargs['structure']
+            self.node_free = list(kwargs['node_free'])
+            self.cpu_free  = bytearray(kwargs['cpu_free'])
+        else:
+            self.structure = self.__build_structure()
+            self.node_free = [len(cpus) for cpus in self.structure['node_cpus']]
+            self.cpu_free  = bytearray(b'\x01'*len(self.cpuset.get_cpu_list()))
+
+    def __build_structure(self):
+        """Build the static tree from the cpuset. Raise a ValueError if cache levels are not nested in each other and in NUMA nodes
+        ----------
+
+        Returns
+        -------
+        structure : dict
+            Static tree
+        """
+        cpu_list = self.cpuset.get_cpu_list()
+        if not cpu_list: raise ValueError('Cannot build a tree from an empty cpuset')
+        cache_levels = list(cpu_list[0].get_cache_level().keys())
+        step = 10
+        numa_ids = sorted(set([cpu.get_numa_node() for cpu in cpu_list]))
+
+        # Tree levels from the root: NUMA node, then cache levels from the last one to the first one
+        # Each tree level is described by the key of each CPU and the distance between two CPU sharing this level (and not a deeper one)
+        level_keys, level_distances = list(), list()
+        numa_inner_distance = None # Distance between two CPU of a NUMA node not sharing a deeper node, if a cache level groups NUMA nodes CPU
+        previous_keys = [(cpu.get_numa_node(),) for cpu in cpu_list]
+        previous_count = len(numa_ids)
+        for level_index in reversed(range(len(cache_levels))):
+            level = cache_levels[level_index]
+            keys = [key + (cpu.get_cache_level()[level],) for key, cpu in zip(previous_keys, cpu_list)]
+            count = len(set(keys))
+            if count != len(set([cpu.get_cache_level()[level] for cpu in cpu_list])):
+                raise ValueError('Cannot build a tree from non nested cache level', level)
+            if count == previous_count and level_keys: # Same grouping than upper level: merge them
+                level_keys[-1], level_distances[-1] = keys, step*(level_index+1)
+            elif count == previous_count: # Cache level grouping NUMA nodes CPU: no new level
+                numa_inner_distance = step*(level_index+1)
+            else:
+                level_keys.append(keys)
+                level_distances.append(step*(level_index+1))
+            previous_keys, previous_count = keys, count
+
+        # Nodes: NUMA nodes first, then each level. Leaves are nodes of the deepest level
+        node_parent, node_level, node_cpus = list(), list(), list()
+        node_index = dict()
+        for numa in numa_ids:
+            node_index[(numa,)] = len(node_parent)
+            node_parent.append(None)
+            node_level.append(0)
+            node_cpus.append(list())
+        cpu_path = [[node_index[(cpu.get_numa_node(),)]] for cpu in cpu_list]
+        for depth, keys in enumerate(level_keys):
+            for position, key in enumerate(keys):
+                if key not in node_index:
+                    node_index[key] = len(node_parent)
+                    node_parent.append(cpu_path[position][-1])
+                    node_level.append(depth+1)
+                    node_cpus.append(list())
+                cpu_path[position].append(node_index[key])
+        for position, path in enumerate(cpu_path):
+            for node in path: node_cpus[node].append(position)
+        node_children = [list() for node in node_parent]
+        for node, parent in enumerate(node_parent):
+            if parent is not None: node_children[parent].append(node)
+
+        numa_distances = self.cpuset.get_numa_distances()
+        outside_step = step*len(cache_levels)
+        numa_outside = {numa: [outside_step + numa_distances[numa][other] for other in numa_ids] for numa in numa_ids}
+        if numa_inner_distance is not None:
+            for index, numa in enumerate(numa_ids): numa_outside[numa][index] = numa_inner_distance
+        structure = {
+            'numa_ids': numa_ids,
+            'numa_nodes': [node_index[(numa,)] for numa in numa_ids],
+            'numa_outside': numa_outside,
+            'level_distances': level_distances,
+            'node_parent': node_parent,
+            'node_level': node_level,
+            'node_cpus': node_cpus,
+            'node_children': node_children,
+            'cpu_path': cpu_path}
+        return structure
+
+    def fork(self):
+        """Return a copy of the tree: static structure is shared, free counts are copied
+        ----------
+
+        Returns
+        -------
+        tree : CpuTree
+            copy
+        """
+        return CpuTree(cpuset=self.cpuset, structure=self.structure, node_free=self.node_free, cpu_free=self.cpu_free)
+
+    def allocate(self, cpu : ServerCpu):
+        """Mark a CPU as used
+        ----------
+
+        Parameters
+        ----------
+        cpu : ServerCpu
+            CPU to consider
+        """
+        self.__set_free(cpu, False)
+
+    def release(self, cpu : ServerCpu):
+        """Mark a CPU as free
+        ----------
+
+        Parameters
+        ----------
+        cpu : ServerCpu
+            CPU to consider
+        """
+        self.__set_free(cpu, True)
+
+    def __set_free(self, cpu : ServerCpu, free : bool):
+        """Update free status of a CPU and free counts of its ancestors
+        ----------
+        """
+        position = self.cpuset.cpu_position[cpu.get_cpu_id()]
+        if bool(self.cpu_free[position]) == free: raise ValueError('CPU already has the requested status', cpu.get_cpu_id(), free)
+        self.cpu_free[position] = 1 if free else 0
+        delta = 1 if free else -1
+        for node in self.structure['cpu_path'][position]: self.node_free[node] += delta
+
+    def is_free(self, cpu : ServerCpu):
+        """Test if a CPU is free
+        ----------
+        """
+        return bool(self.cpu_free[self.cpuset.cpu_position[cpu.get_cpu_id()]])
+
+    def count_free(self):
+        """Return free CPU count
+        ----------
+        """
+        return sum([self.node_free[node] for node in self.structure['numa_nodes']])
+
+    def closest_free(self, cpu_list : list, k : int):
+        """Return the k free CPU having the lowest average distance to a given CPU list
+        Order is the one of an average distance ranking (ties are resolved by cpuset order)
+        ----------
+
+        Parameters
+        ----------
+        cpu_list : list
+            ServerCpu list to be close to
+        k : int
+            Number of CPU requested
+
+        Returns
+        -------
+        cpu_list : list
+            list of ServerCpu, None if less than k CPU are free
+        """
+        if self.count_free() < k: return None
+        if k <= 0: return list()
+        members = self.__count_members([self.cpuset.cpu_position[cpu.get_cpu_id()] for cpu in cpu_list])
+        return self.__rank(members, k, closest=True)
+
+    def farthest_free(self, k : int = 1):
+        """Return the k free CPU having the highest average distance to allocated CPU
+        Order is the one of an average distance ranking (ties are resolved by cpuset order)
+        ----------
+
+        Parameters
+        ----------
+        k : int (optional)
+            Number of CPU requested. Default to 1
+
+        Returns
+        -------
+        cpu_list : list
+            list of ServerCpu, None if less than k CPU are free
+        """
+        if self.count_free() < k: return None
+        if k <= 0: return list()
+        members = [len(cpus) - free for cpus, free in zip(self.structure['node_cpus'], self.node_free)]
+        return self.__rank(members, k, closest=False)
+
+    def __count_members(self, positions : list):
+        """Count, for each node, how many of the given CPU it contains
+        ----------
+        """
+        members = [0]*len(self.node_free)
+        for position in positions:
+            for node in self.structure['cpu_path'][position]: members[node] += 1
+        return members
+
+    def __rank(self, members : list, k : int, closest : bool):
+        """Walk nodes having free CPU, score leaves (all CPU of a leaf share the same distances) and return the k best CPU
+        ----------
+
+        Parameters
+        ----------
+        members : list
+            Count of considered CPU per node
+        k : int
+            Number of CPU requested
+        closest : bool
+            Lowest scores first if True, highest otherwise
+
+        Returns
+        -------
+        cpu_list : list
+            list of ServerCpu
+        """
+        structure = self.structure
+        level_distances = structure['level_distances']
+        numa_members = [members[node] for node in structure['numa_nodes']]
+
+        scored_leaves = list()
+        for numa, numa_node in zip(structure['numa_ids'], structure['numa_nodes']):
+            if self.node_free[numa_node] <= 0: continue
+            outside = structure['numa_outside'][numa]
+            numa_score = sum([distance*count for distance, count in zip(outside, numa_members)])
+            # Depth first walk of nodes having free CPU. Score of a child is the one of its parent, corrected by members sharing the child
+            # (their distance is the one of the child level instead of the parent one)
+            parent_distance = outside[structure['numa_ids'].index(numa)]
+            to_visit = [(numa_node, numa_score, parent_distance)]
+            while to_visit:
+                node, score, distance = to_visit.pop()
+                children = structure['node_children'][node]
+                if not children:
+                    scored_leaves.append((score, node))
+                    continue
+                for child in children:
+                    if self.node_free[child] <= 0: continue
+                    child_distance = level_distances[structure['node_level'][child]-1]
+                    to_visit.append((child, score - (distance - child_distance)*members[child], child_distance))
+
+        # Take leaves by score until k CPU are found, keeping all leaves having the score of the last one (ties resolved by cpuset order)
+        scored_leaves.sort(key=lambda item: item[0], reverse=not closest)
+        candidates = list()
+        for score, node in scored_leaves:
+            if len(candidates) >= k and score != candidates[-1][0]: break
+            candidates.extend([(score, position) for position in structure['node_cpus'][node] if self.cpu_free[position]])
+        candidates.sort(key=lambda item: (item[0] if closest else -item[0], item[1]))
+        cpu_list = self.cpuset.get_cpu_list()
+        return [cpu_list[position] for __, position in candidates[:k]]
@@ -1,6 +1,7 @@
 from json import JSONEncoder
 from schedulerlocal.node.memoryset import ServerMemorySet
 from schedulerlocal.node.cpuset import ServerCpuSet, ServerCpu
+from schedulerlocal.node.cpumask import CpuMask
 
 class ServerCpuSetEncoder(JSONEncoder):
     """
@@ -24,6 +25,9 @@ class ServerCpuSetEncoder(JSONEncoder):
             return
         as_dict = dict(o.__dict__)
         as_dict['cpu_list'] = [self.convert_cpu_to_dict(cpu) for cpu in o.__dict__['cpu_list']]
+        # Distances matrix is stored as rows following cpu_list order, positions are rebuilt on load
+        as_dict['distances'] = o.__dict__['distances'].tolist() if o.__dict__['distances'] is not None else None
+        del as_dict['cpu_position']
         return as_dict
 
     @staticmethod
@@ -112,6 +116,8 @@ class GlobalEncoder(JSONEncoder):
             return ServerMemorySetEncoder(*args, **kwargs).default(o)
         elif (type(o) is CpuSubset) or (type(o) is CpuElasticSubset) or (type(o) is MemSubset):
             return SubsetEncoder(*args, **kwargs).default(o)
+        elif type(o) is CpuMask:
+            return o.to_cpuset_str()
         elif type(o) is dict:
             return dict(o.__dict__)
         else:
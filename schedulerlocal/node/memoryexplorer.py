@@ -1,11 +1,19 @@
 import re
 from schedulerlocal.node.memoryset import ServerMemorySet
+from schedulerlocal.node.procfsreader import ProcfsReader
 
 class MemoryExplorer:
     """
     A class used to retrieve Memory Information
     ...
 
+    Attributes
+    ----------
+    private_mb : int (optional)
+        Memory kept for the host (MB). Default to 0
+    fs_root : str (optional)
+        If specified, /proc is read relatively to this folder (e.g. a synthetic host). Default to /
+
     Public Methods
     -------
     build_memoryset():
@@ -13,7 +21,9 @@ class MemoryExplorer:
     """
 
     def __init__(self, **kwargs):
-        self.fs_meminfo = '/proc/meminfo'
+        self.fs_root = kwargs['fs_root'].rstrip('/') if 'fs_root' in kwargs else ''
+        self.fs_meminfo = self.fs_root + '/proc/meminfo'
+        self.fs_meminfo_reader = ProcfsReader(path=self.fs_meminfo, buffer_size=256) # Kept open as read on each monitoring iteration
         self.private_mb = kwargs['private_mb'] if 'private_mb' in kwargs else 0
 
     def build_memoryset(self):
@@ -53,16 +63,12 @@ class MemoryExplorer:
         mem_usage : int
             Usage as [0;1]
         """
-        with open(self.fs_meminfo, 'r') as f:
-            meminfo = f.readlines()
-        
-        total_found = re.search('^MemTotal:\s+(\d+)', meminfo[0])
-        if not total_found: raise ValueError('Error while parsing', self.fs_meminfo)
-        total_kb = int(total_found.groups()[0])
-
-        available_found = re.search('^MemAvailable:\s+(\d+)', meminfo[2])
-        if not available_found: raise ValueError('Error while parsing', self.fs_meminfo)
-        available_kb = int(available_found.groups()[0])
+        total_kb, available_kb = None, None
+        # Parsing stops at MemAvailable, which is the third line of /proc/meminfo
+        for line in self.fs_meminfo_reader.read_lines(last=b'MemAvailable:'):
+            if line.startswith(b'MemTotal:'): total_kb = int(line.split()[1])
+            elif line.startswith(b'MemAvailable:'): available_kb = int(line.split()[1])
+        if (total_kb is None) or (available_kb is None): raise ValueError('Error while parsing', self.fs_meminfo)
 
         mem_usage = (total_kb-available_kb)/total_kb
         return mem_usage
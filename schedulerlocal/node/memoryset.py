@@ -1,4 +1,5 @@
 from json import loads
+import numpy as np
 
 class ServerMemorySet(object):
     """
@@ -20,6 +21,10 @@ class ServerMemorySet(object):
         Dump current state as a json string
     load_from_json():
         load object attributes from json file
+    dump_as_arrays():
+        Dump current state as a dict of integer arrays
+    load_from_arrays():
+        load object attributes from integer arrays
     """
 
     def __init__(self, **kwargs): 
@@ -56,4 +61,33 @@ class ServerMemorySet(object):
         raw_object = loads(json)['memset']
         self.allowed = raw_object['total']
         self.total = raw_object['allowed']
-        return self
\ No newline at end of file
+        return self
+
+    def dump_as_arrays(self):
+        """Dump current state as a dict of integer arrays (compact alternative to json, see TopologyFile)
+        ----------
+
+        Returns
+        -------
+        arrays : dict
+            Dict of np.ndarray
+        """
+        return {'mem_total': np.array(self.total, dtype=np.int64), 'mem_allowed': np.array(self.allowed, dtype=np.int64)}
+
+    def load_from_arrays(self, arrays : dict):
+        """Instantiate attributes from a dict of integer arrays as generated by dump_as_arrays()
+        ----------
+
+        Parameters
+        ----------
+        arrays : dict
+            Dict (or NpzFile) of np.ndarray
+
+        Returns
+        -------
+        self : ServerMemorySet
+            itself
+        """
+        self.total = int(arrays['mem_total'])
+        self.allowed = int(arrays['mem_allowed'])
+        return self
@@ -0,0 +1,124 @@
+from os import listdir
+from os.path import exists, isdir
+
+class PressureExplorer:
+    """
+    A class used to retrieve Pressure Stall Information (PSI) from Linux FS
+    https://docs.kernel.org/accounting/psi.html
+    Unlike usage, pressure distinguishes a busy set of resources from a starved one
+    ...
+
+    Attributes
+    ----------
+    window : str (optional)
+        PSI averaging window to consider (avg10, avg60 or avg300). Default to avg10
+    fs_root : str (optional)
+        If specified, /sys and /proc are read relatively to this folder (e.g. a synthetic host). Default to /
+
+    Public Methods
+    -------
+    get_pressure_global():
+        Return host pressure of a given resource
+    get_pressure_of():
+        Return the CPU pressure of a given consumer list based on their cgroups
+    """
+
+    def __init__(self, **kwargs):
+        self.window = kwargs['window'] if 'window' in kwargs else 'avg10'
+        self.fs_root            = kwargs['fs_root'].rstrip('/') if 'fs_root' in kwargs else ''
+        self.fs_pressure        = self.fs_root + '/proc/pressure/'
+        self.fs_cgroup_machine  = self.fs_root + '/sys/fs/cgroup/machine.slice/'
+        self.fs_cgroup_pressure = '/cpu.pressure'
+        self.cache_cgroup       = dict()
+
+    def get_pressure_global(self, resource : str = 'cpu'):
+        """Return host pressure of a given resource. None if PSI is not available on host
+        ----------
+
+        Parameters
+        ----------
+        resource : str
+            Resource as named in /proc/pressure (cpu, memory or io)
+
+        Returns
+        -------
+        pressure : float
+            Share of time at least one task was stalled on resource as [0;1]
+        """
+        return self.__read_pressure_file(self.fs_pressure + resource)
+
+    def get_pressure_of(self, consumer_list : list):
+        """Return the CPU pressure of a given DomainEntity list, based on their cgroup cpu.pressure file
+        The highest pressure is returned as a single starved consumer is enough to denote contention
+        None if no cgroup pressure was found (cgroup v1, PSI disabled or offline consumers)
+        ----------
+
+        Parameters
+        ----------
+        consumer_list : list
+            DomainEntity object list
+
+        Returns
+        -------
+        pressure : float
+            Share of time at least one task was stalled on CPU as [0;1]
+        """
+        max_pressure = None
+        for consumer in consumer_list:
+            if not consumer.is_deployed(): continue
+            cgroup_folder = self.__find_cgroup(consumer)
+            if cgroup_folder is None: continue
+            pressure = self.__read_pressure_file(cgroup_folder + self.fs_cgroup_pressure)
+            if pressure is None:
+                del self.cache_cgroup[consumer.get_uuid()] # Scope may have changed on a restart
+                continue
+            if (max_pressure is None) or (pressure > max_pressure): max_pressure = pressure
+        return max_pressure
+
+    def __find_cgroup(self, consumer):
+        """Retrieve cgroup folder of a libvirt domain. Libvirt scope follows the pattern machine-qemu\\x2d{id}\\x2d{name}.scope
+        ----------
+
+        Parameters
+        ----------
+        consumer : DomainEntity
+            The VM to consider
+
+        Returns
+        -------
+        folder : str
+            cgroup folder, None if not found
+        """
+        if consumer.get_uuid() in self.cache_cgroup: return self.cache_cgroup[consumer.get_uuid()]
+        if not isdir(self.fs_cgroup_machine): return None
+        scope_suffix = '\\x2d' + consumer.get_name().replace('-', '\\x2d') + '.scope'
+        for scope in listdir(self.fs_cgroup_machine):
+            if scope.startswith('machine-qemu') and scope.endswith(scope_suffix):
+                self.cache_cgroup[consumer.get_uuid()] = self.fs_cgroup_machine + scope
+                return self.cache_cgroup[consumer.get_uuid()]
+        return None
+
+    def __read_pressure_file(self, pressure_file : str):
+        """Parse a PSI file and return its "some" line average on the considered window
+        ----------
+
+        Parameters
+        ----------
+        pressure_file : str
+            PSI file to read
+
+        Returns
+        -------
+        pressure : float
+            Pressure as [0;1], None if file is unavailable
+        """
+        if not exists(pressure_file): return None
+        try:
+            with open(pressure_file, 'r') as f:
+                line = f.readline() # some avg10=0.00 avg60=0.00 avg300=0.00 total=0
+        except OSError: # PSI disabled at boot time (psi=0) returns EOPNOTSUPP
+            return None
+        for field in line.split()[1:]:
+            key, value = field.split('=')
+            if key == self.window: return float(value)/100
+        return None
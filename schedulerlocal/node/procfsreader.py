@@ -0,0 +1,98 @@
+import os
+
+class ProcfsReader(object):
+    """
+    A class used to read repeatedly a procfs file on the monitoring hot path
+    File descriptor is kept open and content is reread from offset 0 with preadv() in a reused buffer
+    Only the beginning of the file needed by the caller is copied from the kernel
+    ...
+
+    Attributes
+    ----------
+    path : str
+        procfs file to read
+    buffer_size : int (optional)
+        Initial buffer size. Buffer is doubled each time it is too small to hold the needed lines
+
+    Public Methods
+    -------
+    read_lines():
+        Return the needed lines of the file
+    close():
+        Close file descriptor
+    """
+
+    def __init__(self, **kwargs):
+        req_attributes = ['path']
+        for req_attribute in req_attributes:
+            if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
+            setattr(self, req_attribute, kwargs[req_attribute])
+        self.buffer = bytearray(kwargs['buffer_size'] if 'buffer_size' in kwargs else 1024)
+        self.fd = None
+
+    def read_lines(self, prefix : bytes = None, last : bytes = None):
+        """Return lines at the beginning of the file, without their line break
+        ----------
+
+        Parameters
+        ----------
+        prefix : bytes (optional)
+            If specified, only the leading lines starting with this prefix are returned (e.g. b'cpu' on /proc/stat)
+        last : bytes (optional)
+            If specified, lines are returned up to the one starting with this value, included (e.g. b'MemAvailable' on /proc/meminfo)
+
+        Returns
+        -------
+        lines : list
+            list of bytes
+        """
+        while True:
+            length = self.__fill()
+            truncated = (length >= len(self.buffer)) # Content may continue after the buffer
+            lines = list()
+            position = 0
+            while position < length:
+                end = self.buffer.find(b'\n', position, length)
+                if end < 0:
+                    if truncated: break # Incomplete line
+                    end = length
+                if (prefix is not None) and not self.buffer.startswith(prefix, position, end): return lines
+                lines.append(bytes(self.buffer[position:end]))
+                if (last is not None) and self.buffer.startswith(last, position, end): return lines
+                position = end + 1
+            if not truncated: return lines # Whole file was parsed
+            self.buffer = bytearray(len(self.buffer)*2)
+
+    def __fill(self):
+        """Reread file from its beginning into buffer. File is (re)opened if needed
+        ----------
+
+        Returns
+        -------
+        length : int
+            Number of bytes read
+        """
+        if self.fd is None: self.fd = os.open(self.path, os.O_RDONLY)
+        try:
+            return os.preadv(self.fd, [self.buffer], 0)
+        except OSError:
+            self.close() # Retry once on a fresh descriptor
+            self.fd = os.open(self.path, os.O_RDONLY)
+            return os.preadv(self.fd, [self.buffer], 0)
+
+    def close(self):
+        """Close file descriptor
+        ----------
+        """
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+    def __del__(self):
+        """Clean up actions
+        ----------
+        """
+        self.close()
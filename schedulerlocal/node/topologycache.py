@@ -0,0 +1,124 @@
+import os, json
+from os.path import exists
+from schedulerlocal.node.cpuset import ServerCpuSet
+from schedulerlocal.node.jsonencoder import GlobalEncoder
+
+class TopologyCache:
+    """
+    A class used to persist a discovered ServerCpuSet (topology and distances) on disk to speed up restarts
+    Cache is keyed by boot id, include/exclude lists and a hardware fingerprint so that it is invalidated automatically
+    ...
+
+    Attributes
+    ----------
+    cache_file : str
+        Location of the cache file
+    fs_root : str (optional)
+        If specified, /sys and /proc are read relatively to this folder (e.g. a synthetic host). Default to /
+
+    Public Methods
+    -------
+    build_key():
+        Build the cache key of the current host
+    load():
+        Return the cached ServerCpuSet if key matches
+    store():
+        Store a ServerCpuSet with its key
+    """
+
+    def __init__(self, **kwargs):
+        req_attributes = ['cache_file']
+        for req_attribute in req_attributes:
+            if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
+            setattr(self, req_attribute, kwargs[req_attribute])
+        self.fs_root         = kwargs['fs_root'].rstrip('/') if 'fs_root' in kwargs else ''
+        self.fs_boot_id      = self.fs_root + '/proc/sys/kernel/random/boot_id'
+        self.fs_cpu_possible = self.fs_root + '/sys/devices/system/cpu/possible'
+        self.fs_cpu_online   = self.fs_root + '/sys/devices/system/cpu/online'
+        self.fs_numa_online  = self.fs_root + '/sys/devices/system/node/online'
+        self.fs_cpuinfo      = self.fs_root + '/proc/cpuinfo'
+
+    def build_key(self, to_include : list, to_exclude : list):
+        """Build the cache key of the current host
+        ----------
+
+        Parameters
+        ----------
+        to_include : list
+            CPU include list used by the explorer
+        to_exclude : list
+            CPU exclude list used by the explorer
+
+        Returns
+        -------
+        key : str
+            Cache key as a single line json str
+        """
+        key = {'boot_id': self.__read_first_line(self.fs_boot_id),
+            'cpu_possible': self.__read_first_line(self.fs_cpu_possible),
+            'cpu_online': self.__read_first_line(self.fs_cpu_online),
+            'numa_online': self.__read_first_line(self.fs_numa_online),
+            'model': self.__read_model_name(),
+            'include': sorted(to_include), 'exclude': sorted(to_exclude)}
+        return json.dumps(key, sort_keys=True)
+
+    def load(self, key : str):
+        """Return the cached ServerCpuSet if its key matches the specified one
+        ----------
+
+        Parameters
+        ----------
+        key : str
+            Expected cache key
+
+        Returns
+        -------
+        cpuset : ServerCpuSet
+            Cached cpuset with its distances. None if cache is missing or invalid
+        """
+        if not exists(self.cache_file): return None
+        try:
+            with open(self.cache_file, 'r') as f:
+                if f.readline().rstrip('\n') != key: return None # Key is checked before parsing the topology
+                return ServerCpuSet().load_from_json(f.read())
+        except (OSError, ValueError, KeyError) as ex:
+            print('Warning: unable to read topology cache', self.cache_file, str(ex))
+            return None
+
+    def store(self, key : str, cpuset : ServerCpuSet):
+        """Store a ServerCpuSet with its key. File is replaced atomically
+        ----------
+
+        Parameters
+        ----------
+        key : str
+            Cache key
+        cpuset : ServerCpuSet
+            Cpuset to store (distances must have been built)
+        """
+        tmp_file = self.cache_file + '.tmp'
+        try:
+            with open(tmp_file, 'w') as f:
+                f.write(key + '\n')
+                f.write(json.dumps({'cpuset': cpuset}, cls=GlobalEncoder))
+            os.replace(tmp_file, self.cache_file)
+        except OSError as ex:
+            print('Warning: unable to write topology cache', self.cache_file, str(ex))
+
+    def __read_first_line(self, file : str):
+        """Return first line of a file, None if it does not exist
+        ----------
+        """
+        if not exists(file): return None
+        with open(file, 'r') as f:
+            return f.readline().strip()
+
+    def __read_model_name(self):
+        """Return CPU model name as found in /proc/cpuinfo, None if not found
+        ----------
+        """
+        if not exists(self.fs_cpuinfo): return None
+        with open(self.fs_cpuinfo, 'r') as f:
+            for line in f:
+                if line.startswith('model name'): return line.split(':', 1)[1].strip()
+        return None
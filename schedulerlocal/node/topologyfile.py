@@ -0,0 +1,134 @@
+import os, sys, getopt, json
+import numpy as np
+from schedulerlocal.node.cpuset import ServerCpuSet
+from schedulerlocal.node.memoryset import ServerMemorySet
+from schedulerlocal.node.jsonencoder import GlobalEncoder
+
+class TopologyFile(object):
+    """
+    A class used to read and write topology files, used by offline runs (--topology)
+    Two formats are handled, based on file extension:
+        .json : legacy format with a dict of dict of distances and explicit siblings lists (debug/topology_*.json)
+        .npz  : compact format storing integer arrays (cache ids, numa nodes, siblings, distance matrix) loaded without parsing
+    ...
+
+    Attributes
+    ----------
+    compact_extension : str (optional)
+        Extension associated to compact format. Default to .npz
+
+    Public Methods
+    -------
+    load():
+        Load a ServerCpuSet and a ServerMemorySet from a topology file
+    dump():
+        Write a ServerCpuSet and a ServerMemorySet to a topology file
+    convert():
+        Convert a topology file to another format
+    """
+
+    def __init__(self, **kwargs):
+        self.compact_extension = kwargs['compact_extension'] if 'compact_extension' in kwargs else '.npz'
+        self.format_version = 1
+
+    def is_compact(self, path : str):
+        """Return if a given path refers to the compact format
+        ----------
+        """
+        return path.endswith(self.compact_extension)
+
+    def load(self, path : str):
+        """Load a ServerCpuSet and a ServerMemorySet from a topology file. Distances are built if not stored
+        Distances stored in legacy json files are always rebuilt as they may come from a previous distance computation
+        ----------
+
+        Parameters
+        ----------
+        path : str
+            topology file
+
+        Returns
+        -------
+        cpuset : ServerCpuSet
+            cpuset with distances
+        memset : ServerMemorySet
+            memset
+        """
+        if not self.is_compact(path):
+            with open(path, 'r') as f:
+                json_topology = f.read()
+            return ServerCpuSet().load_from_json(json_topology).build_distances(), ServerMemorySet().load_from_json(json_topology)
+
+        with np.load(path, allow_pickle=False) as arrays:
+            if int(arrays['format_version']) != self.format_version:
+                raise ValueError('Unsupported topology format version', int(arrays['format_version']), path)
+            cpuset = ServerCpuSet().load_from_arrays(arrays)
+            memset = ServerMemorySet().load_from_arrays(arrays)
+        if cpuset.distances is None: cpuset.build_distances()
+        return cpuset, memset
+
+    def dump(self, path : str, cpuset : ServerCpuSet, memset : ServerMemorySet):
+        """Write a ServerCpuSet and a ServerMemorySet to a topology file
+        ----------
+
+        Parameters
+        ----------
+        path : str
+            topology file
+        cpuset : ServerCpuSet
+            cpuset to write
+        memset : ServerMemorySet
+            memset to write
+        """
+        if not self.is_compact(path):
+            with open(path, 'w') as f:
+                f.write(json.dumps({'cpuset': cpuset, 'memset': memset}, cls=GlobalEncoder))
+            return
+        arrays = {'format_version': np.array(self.format_version)}
+        arrays.update(cpuset.dump_as_arrays())
+        arrays.update(memset.dump_as_arrays())
+        with open(path, 'wb') as f: # File object prevents numpy from appending its own extension
+            np.savez_compressed(f, **arrays)
+
+    def convert(self, input_path : str, output_path : str):
+        """Convert a topology file to another format (format of each file being deduced from its extension)
+        ----------
+
+        Parameters
+        ----------
+        input_path : str
+            topology file to read
+        output_path : str
+            topology file to write
+        """
+        cpuset, memset = self.load(input_path)
+        self.dump(output_path, cpuset, memset)
+        return cpuset, memset
+
+if __name__ == '__main__':
+
+    short_options = 'hi:o:'
+    long_options = ['help', 'input=', 'output=']
+    usage = 'python3 -m schedulerlocal.node.topologyfile --input=debug/topology_EPYC-7662.json --output=debug/topology_EPYC-7662.npz\n' +\
+        'Format of each file is deduced from its extension (.json or .npz)'
+
+    input_path = None
+    output_path = None
+    try:
+        arguments, values = getopt.getopt(sys.argv[1:], short_options, long_options)
+    except getopt.error as err:
+        print(str(err))
+        print(usage)
+        sys.exit(2)
+    for current_argument, current_value in arguments:
+        if current_argument in ('-h', '--help'):
+            print(usage)
+            sys.exit(0)
+        elif current_argument in ('-i', '--input'): input_path = current_value
+        elif current_argument in ('-o', '--output'): output_path = current_value
+
+    if (input_path is None) or (output_path is None):
+        print(usage)
+        sys.exit(2)
+    cpuset, memset = TopologyFile().convert(input_path, output_path)
+    print('Topology of', len(cpuset.get_cpu_list()), 'CPU converted from', input_path, 'to', output_path, '(' + str(os.path.getsize(output_path)) + ' bytes)')
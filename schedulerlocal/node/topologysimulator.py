@@ -0,0 +1,283 @@
+import os, sys, getopt, json, uuid
+from schedulerlocal.node.cpuset import ServerCpu, ServerCpuSet
+from schedulerlocal.node.memoryset import ServerMemorySet
+from schedulerlocal.node.jsonencoder import GlobalEncoder
+from schedulerlocal.node.topologyfile import TopologyFile
+
+class TopologySimulator(object):
+    """
+    A class used to generate synthetic host topologies, for scale testing without the hardware
+    CPU are numbered as Linux does: physical cores first (socket by socket), then their SMT siblings
+    ...
+
+    Attributes
+    ----------
+    sockets : int
+        Number of sockets
+    numa_per_socket : int
+        Number of NUMA nodes per socket
+    l3_per_numa : int
+        Number of L3 domains (e.g. CCX) per NUMA node
+    cores_per_l3 : int
+        Number of physical cores sharing a L3 domain
+    smt : int
+        Number of threads per physical core
+    mem_per_numa : int
+        Memory per NUMA node (MB)
+    max_freq : int
+        CPU max frequency (KHz)
+    numa_distances : tuple
+        Local, intra-socket and inter-socket NUMA distances
+
+    Public Methods
+    -------
+    build_cpuset():
+        Build the synthetic ServerCpuSet
+    build_memoryset():
+        Build the synthetic ServerMemorySet
+    dump_as_json():
+        Dump topology as a json str loadable with --topology
+    build_fake_root():
+        Write a fake /proc and /sys tree that explorers can be pointed at
+    update_fake_usage():
+        Advance /proc/stat counters of a fake tree based on specified usage
+    """
+
+    def __init__(self, **kwargs):
+        opt_attributes = {'sockets': 2, 'numa_per_socket': 1, 'l3_per_numa': 8, 'cores_per_l3': 4, 'smt': 2,\
+            'mem_per_numa': 256*1024, 'max_freq': 2000000, 'numa_distances': (10, 12, 32)}
+        for opt_attribute, default_value in opt_attributes.items():
+            setattr(self, opt_attribute, kwargs[opt_attribute] if opt_attribute in kwargs else default_value)
+        self.numa_count = self.sockets*self.numa_per_socket
+        self.l3_count   = self.numa_count*self.l3_per_numa
+        self.core_count = self.l3_count*self.cores_per_l3
+        self.cpu_count  = self.core_count*self.smt
+        self.cpu_time   = dict() # cpuid: (idle, not_idle) of fake /proc/stat
+        self.socket_cpu = {socket: list() for socket in range(self.sockets)}
+        for cpu_id in range(self.cpu_count): self.socket_cpu[self.get_socket(cpu_id)].append(cpu_id)
+
+    def get_core(self, cpu_id : int):
+        """Return physical core index of a CPU
+        ----------
+        """
+        return cpu_id % self.core_count
+
+    def get_l3(self, cpu_id : int):
+        """Return L3 domain index of a CPU
+        ----------
+        """
+        return self.get_core(cpu_id) // self.cores_per_l3
+
+    def get_numa(self, cpu_id : int):
+        """Return NUMA node index of a CPU
+        ----------
+        """
+        return self.get_l3(cpu_id) // self.l3_per_numa
+
+    def get_socket(self, cpu_id : int):
+        """Return socket index of a CPU
+        ----------
+        """
+        return self.get_numa(cpu_id) // self.numa_per_socket
+
+    def get_smt_siblings(self, cpu_id : int):
+        """Return list of CPU sharing the physical core of a CPU (itself included)
+        ----------
+        """
+        return [self.get_core(cpu_id) + thread*self.core_count for thread in range(self.smt)]
+
+    def get_socket_siblings(self, cpu_id : int):
+        """Return list of CPU sharing the socket of a CPU (itself included)
+        ----------
+        """
+        return self.socket_cpu[self.get_socket(cpu_id)]
+
+    def get_cache_level(self, cpu_id : int):
+        """Return cache identifiers of a CPU as read from /sys cache index (L1d, L1i, L2, L3)
+        ----------
+        """
+        core = self.get_core(cpu_id)
+        return {0: core, 1: core, 2: core, 3: self.get_l3(cpu_id)}
+
+    def get_numa_distances(self):
+        """Return NUMA distances as dict
+        ----------
+        """
+        local, intra_socket, inter_socket = self.numa_distances
+        numa_distances = dict()
+        for numa in range(self.numa_count):
+            numa_distances[numa] = list()
+            for other_numa in range(self.numa_count):
+                if numa == other_numa: numa_distances[numa].append(local)
+                elif (numa // self.numa_per_socket) == (other_numa // self.numa_per_socket): numa_distances[numa].append(intra_socket)
+                else: numa_distances[numa].append(inter_socket)
+        return numa_distances
+
+    def build_cpuset(self):
+        """Build the synthetic ServerCpuSet with its distances
+        ----------
+
+        Returns
+        -------
+        cpuset : ServerCpuSet
+            Synthetic cpuset
+        """
+        cpuset = ServerCpuSet(host_count=self.cpu_count, numa_distances=self.get_numa_distances())
+        for cpu_id in range(self.cpu_count):
+            cpuset.add_cpu(ServerCpu(cpu_id=cpu_id, numa_node=self.get_numa(cpu_id),\
+                sib_smt=[sibling for sibling in self.get_smt_siblings(cpu_id) if sibling != cpu_id],\
+                sib_cpu=[sibling for sibling in self.get_socket_siblings(cpu_id) if sibling != cpu_id],\
+                cache_level=self.get_cache_level(cpu_id), max_freq=self.max_freq))
+        return cpuset.build_distances()
+
+    def build_memoryset(self):
+        """Build the synthetic ServerMemorySet
+        ----------
+
+        Returns
+        -------
+        memset : ServerMemorySet
+            Synthetic memset
+        """
+        return ServerMemorySet(total=self.mem_per_numa*self.numa_count)
+
+    def dump_as_json(self):
+        """Dump topology as a json str having the same format than debug/topology_*.json files
+        ----------
+
+        Returns
+        -------
+        json : str
+            Topology as json
+        """
+        return json.dumps({'cpuset': self.build_cpuset(), 'memset': self.build_memoryset()}, cls=GlobalEncoder)
+
+    def build_fake_root(self, root : str):
+        """Write a fake /proc and /sys tree describing the synthetic host
+        CpuExplorer, MemoryExplorer and PressureExplorer can be pointed at it through their fs_root attribute
+        /!\\ As on real hardware, CpuExplorer maps NUMA nodes on physical_package_id. Use numa_per_socket=1 to keep them identical
+        ----------
+
+        Parameters
+        ----------
+        root : str
+            Folder to populate
+        """
+        fs_cpu  = root + '/sys/devices/system/cpu/'
+        fs_numa = root + '/sys/devices/system/node/'
+        all_cpu = self.__convert_list_to_text(range(self.cpu_count))
+        self.__write(fs_cpu + 'possible', all_cpu)
+        self.__write(fs_cpu + 'online', all_cpu)
+        for cpu_id in range(self.cpu_count):
+            fs_cpu_id = fs_cpu + 'cpu' + str(cpu_id)
+            self.__write(fs_cpu_id + '/topology/physical_package_id', str(self.get_socket(cpu_id)))
+            self.__write(fs_cpu_id + '/topology/core_id', str(self.get_core(cpu_id)))
+            self.__write(fs_cpu_id + '/topology/thread_siblings_list', self.__convert_list_to_text(self.get_smt_siblings(cpu_id)))
+            self.__write(fs_cpu_id + '/topology/core_siblings_list', self.__convert_list_to_text(self.get_socket_siblings(cpu_id)))
+            for index, (level, cache_type) in enumerate([(1, 'Data'), (1, 'Instruction'), (2, 'Unified'), (3, 'Unified')]):
+                fs_cache = fs_cpu_id + '/cache/index' + str(index)
+                self.__write(fs_cache + '/id', str(self.get_cache_level(cpu_id)[index]))
+                self.__write(fs_cache + '/level', str(level))
+                self.__write(fs_cache + '/type', cache_type)
+            self.__write(fs_cpu_id + '/cpufreq/cpuinfo_max_freq', str(self.max_freq))
+        numa_distances = self.get_numa_distances()
+        self.__write(fs_numa + 'online', self.__convert_list_to_text(range(self.numa_count)))
+        for numa in range(self.numa_count):
+            self.__write(fs_numa + 'node' + str(numa) + '/distance', ' '.join([str(distance) for distance in numa_distances[numa]]))
+            self.__write(fs_numa + 'node' + str(numa) + '/cpulist', self.__convert_list_to_text([cpu for cpu in range(self.cpu_count) if self.get_numa(cpu) == numa]))
+        mem_kb = self.mem_per_numa*self.numa_count*1024
+        self.__write(root + '/proc/meminfo', 'MemTotal:       ' + str(mem_kb) + ' kB\nMemFree:        ' + str(mem_kb) + ' kB\nMemAvailable:   ' + str(mem_kb) + ' kB\n')
+        self.__write(root + '/proc/cpuinfo', ''.join(['processor\t: ' + str(cpu_id) + '\nmodel name\t: Synthetic ' + str(self.cpu_count) + '-CPU host\n\n' for cpu_id in range(self.cpu_count)]))
+        self.__write(root + '/proc/sys/kernel/random/boot_id', str(uuid.uuid4()))
+        for resource in ['cpu', 'memory']:
+            self.__write(root + '/proc/pressure/' + resource, 'some avg10=0.00 avg60=0.00 avg300=0.00 total=0\nfull avg10=0.00 avg60=0.00 avg300=0.00 total=0\n')
+        self.cpu_time = {cpu_id: (0, 0) for cpu_id in range(self.cpu_count)}
+        self.__write_fake_stat(root)
+
+    def update_fake_usage(self, root : str, usage : dict, ticks : int = 1500):
+        """Advance /proc/stat counters of a fake tree previously built with build_fake_root()
+        ----------
+
+        Parameters
+        ----------
+        root : str
+            Folder previously populated
+        usage : dict
+            Dictionary of cpuid (as key) specifying the usage as [0;1] on the elapsed period. Missing cpu are idle
+        ticks : int (optional)
+            Number of USER_HZ ticks elapsed (default to 1500: 15s)
+        """
+        for cpu_id, (idle, not_idle) in self.cpu_time.items():
+            busy_ticks = int(ticks*usage.get(cpu_id, 0))
+            self.cpu_time[cpu_id] = (idle + ticks - busy_ticks, not_idle + busy_ticks)
+        self.__write_fake_stat(root)
+
+    def __write_fake_stat(self, root : str):
+        """Write /proc/stat of fake tree based on cpu_time attribute. Non-idle time is reported as user time
+        ----------
+        """
+        total_idle = sum([idle for idle, __ in self.cpu_time.values()])
+        total_not_idle = sum([not_idle for __, not_idle in self.cpu_time.values()])
+        lines = ['cpu  ' + str(total_not_idle) + ' 0 0 ' + str(total_idle) + ' 0 0 0 0 0 0']
+        for cpu_id, (idle, not_idle) in self.cpu_time.items():
+            lines.append('cpu' + str(cpu_id) + ' ' + str(not_idle) + ' 0 0 ' + str(idle) + ' 0 0 0 0 0 0')
+        lines.append('intr 0')
+        lines.append('ctxt 0')
+        self.__write(root + '/proc/stat', '\n'.join(lines) + '\n')
+
+    def __write(self, file : str, content : str):
+        """Write content to file, creating parents folders if needed
+        ----------
+        """
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, 'w') as f: f.write(content)
+
+    def __convert_list_to_text(self, cpu_list):
+        """Convert a list of integers to a text as observed in /sys/device fs (e.g. 0-3,8-11)
+        ----------
+        """
+        ranges = list()
+        for cpu in sorted(cpu_list):
+            if ranges and ranges[-1][1] == cpu-1: ranges[-1][1] = cpu
+            else: ranges.append([cpu, cpu])
+        return ','.join([str(inf) if inf == sup else str(inf) + '-' + str(sup) for inf, sup in ranges])
+
+if __name__ == '__main__':
+
+    short_options = 'hs:n:l:c:t:m:o:r:'
+    long_options = ['help', 'sockets=', 'numa=', 'l3=', 'cores=', 'smt=', 'mem=', 'output=', 'root=']
+    usage = 'python3 -m schedulerlocal.node.topologysimulator --sockets=2 --numa=1 --l3=8 --cores=4 --smt=2 --mem=256 ' +\
+        '--output=debug/topology_synthetic.json --root=/tmp/synthetic\n' +\
+        '--output: .json or compact .npz topology file\n' +\
+        '--numa: NUMA nodes per socket, --l3: L3 domains per NUMA node, --cores: cores per L3 domain, --mem: GB per NUMA node'
+
+    kwargs = dict()
+    output = None
+    root = None
+    try:
+        arguments, values = getopt.getopt(sys.argv[1:], short_options, long_options)
+    except getopt.error as err:
+        print(str(err))
+        print(usage)
+        sys.exit(2)
+    for current_argument, current_value in arguments:
+        if current_argument in ('-h', '--help'):
+            print(usage)
+            sys.exit(0)
+        elif current_argument in ('-s', '--sockets'): kwargs['sockets'] = int(current_value)
+        elif current_argument in ('-n', '--numa'): kwargs['numa_per_socket'] = int(current_value)
+        elif current_argument in ('-l', '--l3'): kwargs['l3_per_numa'] = int(current_value)
+        elif current_argument in ('-c', '--cores'): kwargs['cores_per_l3'] = int(current_value)
+        elif current_argument in ('-t', '--smt'): kwargs['smt'] = int(current_value)
+        elif current_argument in ('-m', '--mem'): kwargs['mem_per_numa'] = int(float(current_value)*1024)
+        elif current_argument in ('-o', '--output'): output = current_value
+        elif current_argument in ('-r', '--root'): root = current_value
+
+    simulator = TopologySimulator(**kwargs)
+    print('Synthetic host:', simulator.cpu_count, 'CPU on', simulator.sockets, 'socket(s),', simulator.numa_count, 'NUMA node(s) and', simulator.l3_count, 'L3 domain(s)')
+    if output is not None:
+        TopologyFile().dump(output, simulator.build_cpuset(), simulator.build_memoryset())
+        print('Topology written to', output)
+    if root is not None:
+        simulator.build_fake_root(root)
+        print('Fake /proc and /sys tree written to', root)
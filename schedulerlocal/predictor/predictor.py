@@ -1,6 +1,7 @@
 import vowpalwabbit
 import numpy as np
-import math, random
+import math, random, os, json, time
+from schedulerlocal.predictor.windowstatistics import WindowStatistics
 from sklearn import datasets
 from sklearn.model_selection import train_test_split
 from vowpalwabbit.sklearn import (
@@ -34,8 +35,15 @@ class PredictorCsoaa(Predictor):
     """
     This class use a CSOAA: Cost-Sensitive One Against All classifier to predict next active resources
     https://github.com/VowpalWabbit/vowpal_wabbit/wiki/Cost-Sensitive-One-Against-All-%28csoaa%29-multi-class-example
+    The model is kept between predictions and learns each new record incrementally. It is re-fitted on all records only when
+    the count of classes (i.e. of resources) changes
+    If a checkpoint path is specified, records, last features and model are saved on each learning window and reloaded on
+    the first prediction: the monitoring window does not have to be covered again after a restart
+    Features are computed incrementally on the aggregation window and given to the model as numeric feature indexes, which
+    VW uses without hashing feature names
     ...
     """
+    FEATURE_INDEX = {'min': 0, 'max': 1, 'avg': 2, 'std': 3, 'med': 4, 'psi': 5, 'psimax': 6}
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -43,23 +51,32 @@ class PredictorCsoaa(Predictor):
         for req_attribute in additional_attributes:
             if req_attribute not in kwargs: raise ValueError('Missing required argument', additional_attributes)
             setattr(self, req_attribute, kwargs[req_attribute])
+        self.monitoring_pressure = kwargs['monitoring_pressure'] if 'monitoring_pressure' in kwargs else 0 # 0 to disable
+        self.checkpoint = kwargs['checkpoint'] if 'checkpoint' in kwargs else None # Path prefix of checkpoint files, None to disable
         self.model_records = dict()
         self.last_features = None
+        self.workspace = None # Persistent model
+        self.workspace_classes = None # Count of classes of the model
+        self.checkpoint_loaded = False # Loaded on first prediction: subsets created on forks by simulations never load it
         # Buffer attributes
         self.buffer_timestamp = None
-        self.buffer_records = list()
+        self.buffer_usage = WindowStatistics()
+        self.buffer_pressure = WindowStatistics()
         self.last_prediction = None
         self.last_allocation = 0
 
-        self.output = 'debug/predictor.csv'
-        with open(self.output, 'w') as f: f.write('timestamp,prediction,resources,allocation,usage,prev_usage\n')
+        self.output = 'debug/predictor.csv' # Created on first prediction: subsets created on forks by simulations leave it untouched
+        self.output_created = False
 
-    def predict(self, timestamp : int, current_resources : int, allocation : int, metric : int):
+    def predict(self, timestamp : int, current_resources : int, allocation : int, metric : int, pressure : float = None):
         # Adapted from SmartHarvest https://dl.acm.org/doi/pdf/10.1145/3447786.3456225
         # Unlike them, we manage a dynamic set of cores (i.e. list of usable resources in our subset )
+        # Pressure (PSI) is used jointly with usage to distinguish a busy subset from a starved one
 
+        if self.checkpoint is not None and not self.checkpoint_loaded: self.load_checkpoint(timestamp=timestamp)
         if self.buffer_timestamp is None: self.buffer_timestamp = timestamp
-        self.buffer_records.append(metric)
+        self.buffer_usage.append(metric)
+        if pressure is not None: self.buffer_pressure.append(pressure)
 
         # Tests
         first_call  = False
@@ -67,6 +84,7 @@ class PredictorCsoaa(Predictor):
         buffer_full = False
         if self.last_prediction is None: first_call = True
         if (not first_call) and (current_resources>0) and (math.ceil(metric) >= self.last_prediction): safeguard = True 
+        if (not first_call) and (current_resources>0) and (self.monitoring_pressure>0) and (pressure is not None) and (pressure >= self.monitoring_pressure): safeguard = True
         if (not first_call) and ((timestamp - self.buffer_timestamp) >= self.monitoring_learning): buffer_full = True
 
         delta_allocation = allocation - self.last_allocation
@@ -87,45 +105,125 @@ class PredictorCsoaa(Predictor):
             self.last_prediction = prediction
             return prediction
         else:
-            prediction = self.predict_on_new_model(timestamp=timestamp, current_resources=current_resources, metrics=self.buffer_records)
+            prediction = self.predict_on_new_model(timestamp=timestamp, current_resources=current_resources, usage=self.buffer_usage, pressure=self.buffer_pressure)
             prediction = math.ceil(prediction+8)
             if prediction>current_resources: prediction=current_resources
 
             self.buffer_timestamp = None
-            self.buffer_records = list()
+            self.buffer_usage.reset()
+            self.buffer_pressure.reset()
             self.last_prediction = prediction
             return prediction
 
-    def predict_on_new_model(self, timestamp : int, current_resources : int, metrics : list):
+    def predict_on_new_model(self, timestamp : int, current_resources : int, usage : WindowStatistics, pressure : WindowStatistics = None):
         # Adapted from SmartHarvest https://dl.acm.org/doi/pdf/10.1145/3447786.3456225
         # Unlike them, we manage a dynamic set of cores (i.e. list of usable resources in our subset )
         
         # First, register peak associated to last iteration features
+        new_record = None
         if self.last_features is not None:
-            self.add_record(timestamp=timestamp, peak_usage=max(metrics), features=self.last_features)
+            new_record = (usage.get_max(), self.last_features)
+            self.add_record(timestamp=timestamp, peak_usage=new_record[0], features=new_record[1])
 
         # Generate current features
-        current_features = self.__generate_features(metrics=metrics)
+        current_features = self.__generate_features(usage=usage, pressure=pressure)
         self.last_features = current_features
 
-        # Safeguard on empty subsets and models without data
+        # Safeguard on empty subsets and models without data
         if current_resources<=0 or not self.contains_enough_data():
+            if self.checkpoint is not None: self.save_checkpoint(timestamp=timestamp)
             return current_resources
         
-        # Second, update model
-        vw = vowpalwabbit.Workspace(csoaa=current_resources, quiet=True)
-        raw_data = self.__generate_data_from_records(resources_count=current_resources)
+        # Second, update model: learn the new record, or re-fit on all records if the count of classes changed
+        if self.workspace_classes != current_resources: self.fit(resources_count=current_resources)
+        elif new_record is not None:
+            peak_usage, features = new_record
+            self.workspace.learn(self.__generate_labels_with_costs(resources_count=current_resources, observed_peak=peak_usage) + ' | ' + features)
+
+        if self.checkpoint is not None: self.save_checkpoint(timestamp=timestamp)
+
+        # Third, predict next peak based on model
+        prediction = self.workspace.predict('| ' + current_features)
+        return prediction + usage.get_std()
+
+    def fit(self, resources_count : int):
+        """Replace the model by a new one, trained on all records
+        ----------
+
+        Parameters
+        ----------
+        resources_count : int
+            Count of classes
+        """
+        self.finish()
+        vw = vowpalwabbit.Workspace(csoaa=resources_count, quiet=True)
+        raw_data = self.__generate_data_from_records(resources_count=resources_count)
         random.shuffle(raw_data) 
         for data in raw_data: 
             vw.learn(data)
+        self.workspace = vw
+        self.workspace_classes = resources_count
+
+    def finish(self):
+        """Release the model, if any
+        ----------
+        """
+        if self.workspace is not None: self.workspace.finish()
+        self.workspace = None
+        self.workspace_classes = None
 
-        # Third, predict next peak based on model
-        prediction = vw.predict('| ' + current_features)
-        vw.finish()
-        return prediction + np.std(metrics)
+    def save_checkpoint(self, timestamp : int):
+        """Save records and model. Timestamps being relative to scheduler launch, records are saved on wall clock
+        ----------
+
+        Parameters
+        ----------
+        timestamp : int
+            The current timestamp key
+        """
+        wall_clock_shift = time.time() - timestamp
+        content = {'records': [[record_timestamp + wall_clock_shift, peak_usage, features] for record_timestamp, (peak_usage, features) in self.model_records.items()],
+            'features': self.last_features, 'classes': self.workspace_classes}
+        try:
+            os.makedirs(os.path.dirname(self.checkpoint) or '.', exist_ok=True)
+            if self.workspace is not None:
+                self.workspace.save(self.checkpoint + '.vw.tmp')
+                os.replace(self.checkpoint + '.vw.tmp', self.checkpoint + '.vw')
+            with open(self.checkpoint + '.json.tmp', 'w') as f: f.write(json.dumps(content))
+            os.replace(self.checkpoint + '.json.tmp', self.checkpoint + '.json') # Written last, referencing the saved model
+        except OSError as ex:
+            print('Warning: unable to save predictor checkpoint', self.checkpoint, str(ex))
+
+    def load_checkpoint(self, timestamp : int):
+        """Load records, last features and model saved by a previous instance, if any. Wall clock timestamps of records are
+        converted to scheduler ones and expired records are dropped
+        ----------
+
+        Parameters
+        ----------
+        timestamp : int
+            The current timestamp key
+        """
+        self.checkpoint_loaded = True
+        if not os.path.exists(self.checkpoint + '.json'): return
+        try:
+            with open(self.checkpoint + '.json', 'r') as f: content = json.load(f)
+            wall_clock_shift = time.time() - timestamp
+            for record_timestamp, peak_usage, features in content['records']:
+                self.model_records[int(round(record_timestamp - wall_clock_shift))] = (peak_usage, features)
+            self.remove_expired_keys(timestamp=timestamp, considered_dict=self.model_records)
+            self.last_features = content.get('features')
+            if content['classes'] is not None and os.path.exists(self.checkpoint + '.vw'):
+                self.workspace = vowpalwabbit.Workspace('-i ' + self.checkpoint + '.vw', quiet=True)
+                self.workspace_classes = content['classes']
+        except Exception as ex:
+            print('Warning: unable to load predictor checkpoint', self.checkpoint, str(ex))
 
     def debug(self, timestamp : int, current_prediction : int, current_resources : int, allocation : float, current_usage : float):
         if not hasattr(self, 'prev_usage'): self.prev_usage = None
+        if not self.output_created:
+            with open(self.output, 'w') as f: f.write('timestamp,prediction,resources,allocation,usage,prev_usage\n')
+            self.output_created = True
         with open(self.output, 'a') as f: 
             line = str(timestamp)  + ',' + str(current_prediction) + ',' + str(current_resources) + ',' + str(allocation) + ',' + str(current_usage) + ',' + str(self.prev_usage)
             f.write(line + '\n')
@@ -149,22 +247,25 @@ class PredictorCsoaa(Predictor):
             costs+= str(core) + ':' + str(float(associated_cost)) + ' '
         return costs[:-1]
 
-    def __generate_features(self, metrics : list):
-        """Get CSOAA features as a string
+    def __generate_features(self, usage : WindowStatistics, pressure : WindowStatistics = None):
+        """Get CSOAA features as a string of pre-hashed (index:value) features
         ----------
 
         Parameters
         ----------
-        metrics : list
-            List of usage resources to use to generate the feature
+        usage : WindowStatistics
+            Statistics of resources usage on the aggregation window
+        pressure : WindowStatistics (optional)
+            Statistics of pressure (PSI) on the aggregation window
 
         Returns
         -------
         Features : str
             Features as string
         """
-        return 'min:' + str(round(min(metrics),3)) + ' max:' + str(round(max(metrics),3)) +\
-            ' avg:' + str(round(np.mean(metrics),3)) +  ' std:' + str(round(np.std(metrics),3)) + ' med:' + str(round(np.median(metrics),3))
+        values = {'min': usage.get_min(), 'max': usage.get_max(), 'avg': usage.get_mean(), 'std': usage.get_std(), 'med': usage.get_median()}
+        if pressure: values.update({'psi': pressure.get_mean(), 'psimax': pressure.get_max()})
+        return ' '.join(str(self.FEATURE_INDEX[name]) + ':' + str(round(value,3)) for name, value in values.items())
 
     def add_record(self, timestamp : int, peak_usage : float, features : str):
         """Add new records to the collection attributes and manage expired data
@@ -220,18 +321,18 @@ class PredictorMaxVMPeak(Predictor):
         threshold_cpu    = 0
         for consumer in self.consumer_list:
             if threshold_cpu < consumer.get_cpu(): threshold_cpu = consumer.get_cpu() 
-            if (consumer.get_uuid() not in self.hist_consumers_usage or len(self.hist_consumers_usage[consumer.get_uuid()]) < self.MONITORING_MIN):
+            if self.hist_consumers_usage.count(consumer.get_uuid()) < self.MONITORING_MIN:
                 res_needed_count+= consumer.get_cpu() # not enough data
             # else:
-            #     consumer_records  = [value for __, value in self.hist_consumers_usage[consumer.get_uuid()]]
+            #     consumer_records  = self.hist_consumers_usage.get_consumer_values(consumer.get_uuid())
             #     consumer_max_peak = consumer.get_cpu() * max(consumer_records) + self.MONITORING_LEEWAY*np.std(consumer_records)
             #     if consumer.get_cpu() < consumer_max_peak: consumer_max_peak = consumer.get_cpu()
             
             # res_needed_count += consumer_max_peak
 
         # Compute next peak
-        subset_records  = [value for __, value in self.hist_usage]
-        usage_current   = subset_records[-1] if subset_records else None
+        subset_records  = self.hist_usage.get_values()
+        usage_current   = self.hist_usage.last()
         usage_predicted = math.ceil(max(subset_records) + self.MONITORING_LEEWAY*np.std(subset_records)) if len(subset_records) >= self.MONITORING_MIN else len(self.get_res())
 
         # Watchdog, was our last prediction too pessimistic?
@@ -0,0 +1,141 @@
+import math
+
+class WindowStatistics(object):
+    """
+    A WindowStatistics maintains statistics of the records of an aggregation window as they are appended, without keeping them
+    Mean and variance are updated with Welford's algorithm, min and max are running ones (the window being reset rather than
+    sliding), the median is estimated with the P-square algorithm (Jain & Chlamtac) on five markers: exact up to five records
+    ...
+
+    Public Methods
+    -------
+    append()
+        Add a record
+    reset()
+        Start a new window
+    get_min()/get_max()/get_mean()/get_std()/get_median()
+        Window statistics, None if empty
+    """
+    QUANTILE = 0.5 # Estimated quantile (median)
+
+    def __init__(self, **kwargs):
+        self.reset()
+
+    def reset(self):
+        """Forget all records, to start a new window
+        ----------
+        """
+        self.count = 0
+        self.mean  = 0.0
+        self.m2    = 0.0 # Sum of squared differences to the mean
+        self.minimum = None
+        self.maximum = None
+        self.marker_heights   = list() # Sorted first records, then P-square markers
+        self.marker_positions = [0, 1, 2, 3, 4]
+        self.marker_desired   = [0, 2*self.QUANTILE, 4*self.QUANTILE, 2+2*self.QUANTILE, 4]
+        self.marker_increment = [0, self.QUANTILE/2, self.QUANTILE, (1+self.QUANTILE)/2, 1]
+
+    def append(self, value : float):
+        """Add a record in O(1)
+        ----------
+
+        Parameters
+        ----------
+        value : float
+            The record
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta/self.count
+        self.m2 += delta*(value - self.mean)
+        if self.minimum is None or value < self.minimum: self.minimum = value
+        if self.maximum is None or value > self.maximum: self.maximum = value
+        if self.count <= 5:
+            self.marker_heights.append(value)
+            self.marker_heights.sort()
+        else: self.__update_markers(value)
+
+    def __update_markers(self, value : float):
+        """Update P-square markers with a new record
+        ----------
+
+        Parameters
+        ----------
+        value : float
+            The record
+        """
+        heights, positions, desired = self.marker_heights, self.marker_positions, self.marker_desired
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else: cell = next(index for index in range(4) if value < heights[index+1])
+        for index in range(cell+1, 5): positions[index] += 1
+        for index in range(5): desired[index] += self.marker_increment[index]
+        # Adjust inner markers deviating from their desired position
+        for index in range(1, 4):
+            deviation = desired[index] - positions[index]
+            if (deviation >= 1 and positions[index+1] - positions[index] > 1) or (deviation <= -1 and positions[index-1] - positions[index] < -1):
+                step = 1 if deviation > 0 else -1
+                height = self.__parabolic(index, step)
+                if not (heights[index-1] < height < heights[index+1]): height = self.__linear(index, step)
+                heights[index] = height
+                positions[index] += step
+
+    def __parabolic(self, index : int, step : int):
+        """Return the piecewise-parabolic prediction of a marker height moved by step
+        ----------
+        """
+        heights, positions = self.marker_heights, self.marker_positions
+        return heights[index] + step/(positions[index+1] - positions[index-1]) *\
+            ((positions[index] - positions[index-1] + step)*(heights[index+1] - heights[index])/(positions[index+1] - positions[index]) +\
+            (positions[index+1] - positions[index] - step)*(heights[index] - heights[index-1])/(positions[index] - positions[index-1]))
+
+    def __linear(self, index : int, step : int):
+        """Return the linear prediction of a marker height moved by step
+        ----------
+        """
+        heights, positions = self.marker_heights, self.marker_positions
+        return heights[index] + step*(heights[index+step] - heights[index])/(positions[index+step] - positions[index])
+
+    def get_min(self):
+        """Return the lowest record of the window, None if empty
+        ----------
+        """
+        return self.minimum
+
+    def get_max(self):
+        """Return the highest record of the window, None if empty
+        ----------
+        """
+        return self.maximum
+
+    def get_mean(self):
+        """Return the average record of the window, None if empty
+        ----------
+        """
+        if self.count == 0: return None
+        return self.mean
+
+    def get_std(self):
+        """Return the (population) standard deviation of records of the window, None if empty
+        ----------
+        """
+        if self.count == 0: return None
+        return math.sqrt(max(0.0, self.m2/self.count))
+
+    def get_median(self):
+        """Return the median of the window, exact up to five records and estimated beyond. None if empty
+        ----------
+        """
+        if self.count == 0: return None
+        if self.count <= 5:
+            middle = self.count//2
+            if self.count % 2: return self.marker_heights[middle]
+            return (self.marker_heights[middle-1] + self.marker_heights[middle])/2
+        return self.marker_heights[2]
+
+    def __len__(self):
+        return self.count
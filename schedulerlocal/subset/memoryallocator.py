@@ -0,0 +1,153 @@
+from bisect import bisect_left
+
+class MemoryAllocator(object):
+    """
+    A MemoryAllocator attributes ranges of host memory (MB) to memory subsets
+    Free memory is kept as a sorted list of disjoint (inf, sup) ranges, sup being excluded. Adjacent free ranges are coalesced
+    on release. Ranges are located by bisection: a subset may be extended contiguously to its last range, or receive several
+    ranges when memory is fragmented
+    ...
+
+    Attributes
+    ----------
+    capacity : int
+        Host memory managed (MB)
+
+    Public Methods
+    -------
+    allocate()
+        Take ranges of free memory
+    release()
+        Give back a range
+    get_free()
+        Return free memory
+    fork()
+        Return a copy of the allocator
+    """
+
+    def __init__(self, **kwargs):
+        req_attributes = ['capacity']
+        for req_attribute in req_attributes:
+            if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
+            setattr(self, req_attribute, kwargs[req_attribute])
+        self.free_inf = [0] if self.capacity > 0 else list()
+        self.free_sup = [self.capacity] if self.capacity > 0 else list()
+        self.free = self.capacity
+
+    def allocate(self, amount, after = None):
+        """Take free ranges totalizing amount. Memory starting at after is taken first (contiguous extension), then free
+        ranges are taken from the lowest addresses
+        ----------
+
+        Parameters
+        ----------
+        amount : int
+            Memory requested (MB)
+        after : int (optional)
+            Preferred starting address, typically the end of the last range of the subset being extended
+
+        Returns
+        -------
+        ranges : list
+            list of (inf, sup) tuples, None if not enough memory is free
+        """
+        if amount <= 0: return list()
+        if amount > self.free: return None
+        ranges = list()
+        if after is not None:
+            index = bisect_left(self.free_inf, after)
+            if index < len(self.free_inf) and self.free_inf[index] == after: amount -= self.__take(index, amount, ranges)
+        while amount > 0: amount -= self.__take(0, amount, ranges)
+        return ranges
+
+    def __take(self, index : int, amount, ranges : list):
+        """Take up to amount memory from the beginning of a free range
+        ----------
+
+        Parameters
+        ----------
+        index : int
+            Free range index
+        amount : int
+            Memory requested
+        ranges : list
+            list to which the taken range is appended
+
+        Returns
+        -------
+        taken : int
+            Memory taken
+        """
+        inf, sup = self.free_inf[index], self.free_sup[index]
+        taken = min(amount, sup - inf)
+        ranges.append((inf, inf + taken))
+        if inf + taken >= sup:
+            del self.free_inf[index]
+            del self.free_sup[index]
+        else: self.free_inf[index] = inf + taken
+        self.free -= taken
+        return taken
+
+    def release(self, bounds : tuple):
+        """Give back a range, coalescing it with adjacent free ranges
+        ----------
+
+        Parameters
+        ----------
+        bounds : tuple
+            (inf, sup) range to release
+        """
+        inf, sup = bounds
+        if sup <= inf: return
+        index = bisect_left(self.free_inf, inf)
+        if (index > 0 and self.free_sup[index-1] > inf) or (index < len(self.free_inf) and self.free_inf[index] < sup):
+            raise ValueError('Released range overlaps free memory', bounds)
+        self.free += sup - inf
+        merge_previous = index > 0 and self.free_sup[index-1] == inf
+        merge_next = index < len(self.free_inf) and self.free_inf[index] == sup
+        if merge_previous and merge_next:
+            self.free_sup[index-1] = self.free_sup[index]
+            del self.free_inf[index]
+            del self.free_sup[index]
+        elif merge_previous: self.free_sup[index-1] = sup
+        elif merge_next: self.free_inf[index] = inf
+        else:
+            self.free_inf.insert(index, inf)
+            self.free_sup.insert(index, sup)
+
+    def get_free(self):
+        """Return free memory
+        ----------
+
+        Returns
+        -------
+        free : int
+            Free memory (MB)
+        """
+        return self.free
+
+    def get_free_ranges(self):
+        """Return free ranges, ordered by address
+        ----------
+
+        Returns
+        -------
+        ranges : list
+            list of (inf, sup) tuples
+        """
+        return list(zip(self.free_inf, self.free_sup))
+
+    def fork(self):
+        """Return a copy of the allocator, for simulation purpose
+        ----------
+
+        Returns
+        -------
+        allocator : MemoryAllocator
+            copy
+        """
+        forked = MemoryAllocator(capacity=self.capacity)
+        forked.free_inf = list(self.free_inf)
+        forked.free_sup = list(self.free_sup)
+        forked.free = self.free
+        return forked
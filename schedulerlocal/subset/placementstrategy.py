@@ -0,0 +1,265 @@
+import numpy as np
+
+class PlacementStrategy(object):
+    """
+    A PlacementStrategy selects free CPU attributed to a CPU subset on its creation or extension
+    Strategies only select CPU: attribution is done by the CpuSubsetManager
+    ...
+
+    Public Methods
+    -------
+    get_starting_cpu()
+        Return the first CPU of a new subset
+    get_cpus_for_new_subset()
+        Return the remaining CPU of a new subset
+    get_cpus_for_extension()
+        Return the CPU extending a subset
+    get_id()
+        Return strategy id
+    """
+
+    def get_starting_cpu(self, manager, amount : int):
+        """Return the first CPU of a new subset. Must be reimplemented
+        ----------
+
+        Parameters
+        ----------
+        manager : CpuSubsetManager
+            Manager giving access to free CPU
+        amount : int
+            Total capacity requested for the new subset
+
+        Returns
+        -------
+        cpu : ServerCpu
+            Free CPU
+        """
+        raise NotImplementedError()
+
+    def get_cpus_for_new_subset(self, manager, subset, amount : int):
+        """Return the remaining CPU of a new subset, already containing its starting CPU. Default to an extension
+        ----------
+
+        Parameters
+        ----------
+        manager : CpuSubsetManager
+            Manager giving access to free CPU
+        subset : CpuSubset
+            The subset being created
+        amount : int
+            CPU requested
+
+        Returns
+        -------
+        cpu_list : list
+            amount free ServerCpu
+        """
+        return self.get_cpus_for_extension(manager, subset, amount)
+
+    def get_cpus_for_extension(self, manager, subset, amount : int):
+        """Return the CPU extending a subset. CPU are selected one by one, each being the closest to the subset extended by
+        the previous ones. Sum of distances to the subset is kept for each free CPU and updated in O(free) each time a CPU is selected
+        ----------
+
+        Parameters
+        ----------
+        manager : CpuSubsetManager
+            Manager giving access to free CPU
+        subset : CpuSubset
+            The subset to extend
+        amount : int
+            CPU requested
+
+        Returns
+        -------
+        cpu_list : list
+            amount free ServerCpu
+        """
+        cpuset = manager.cpuset
+        free_cpus = manager.get_available_cpus()
+        distances = cpuset.get_distances()
+        free_positions = cpuset.get_positions(free_cpus)
+        distance_sums = distances[np.ix_(free_positions, cpuset.get_positions(subset.get_res()))].sum(axis=1, dtype=np.float64) # Exact on integers
+        selected = list()
+        for count in range(amount):
+            chosen = int(np.argmin(distance_sums)) # First occurence on ties, i.e. cpuset order
+            selected.append(free_cpus[chosen])
+            distance_sums[chosen] = np.inf # No longer free
+            distance_sums += distances[free_positions, free_positions[chosen]]
+        return selected
+
+    def get_id(self):
+        """Return the strategy ID
+        ----------
+        """
+        raise NotImplementedError()
+
+    def __str__(self):
+        return self.get_id()
+
+class DistancePlacementStrategy(PlacementStrategy):
+    """
+    Historical heuristic: a new subset starts from the free CPU farthest from allocated ones, then takes the CPU having the lowest
+    average distance to it. Subsets are spread apart from each other
+    """
+
+    def get_starting_cpu(self, manager, amount : int):
+        return manager.get_farthest_available_cpus(amount=1)[0]
+
+    def get_cpus_for_new_subset(self, manager, subset, amount : int):
+        return manager.get_closest_available_cpus(subset, amount=amount)[:amount]
+
+    def get_id(self):
+        return 'distance'
+
+class DomainPlacementStrategy(PlacementStrategy):
+    """
+    Bin packing on topology domains: CPU are taken in domains already hosting the subset (the most used one first). Otherwise,
+    a new domain is opened: the one having the fewest free CPU still able to host the remaining request (best fit), or the one
+    having the most free CPU if none can. Inside a domain, the CPU closest to the subset is taken. Domain is defined by subclasses
+    """
+
+    def get_domain(self, cpu):
+        """Return the domain of a CPU. Must be reimplemented
+        ----------
+
+        Parameters
+        ----------
+        cpu : ServerCpu
+            The CPU to consider
+
+        Returns
+        -------
+        domain : tuple
+            Domain key
+        """
+        raise NotImplementedError()
+
+    def get_starting_cpu(self, manager, amount : int):
+        return self.__select(manager, list(), amount)[0]
+
+    def get_cpus_for_extension(self, manager, subset, amount : int):
+        return self.__select(manager, subset.get_res(), amount)
+
+    def __select(self, manager, res_list : list, amount : int):
+        """Select CPU one by one, domain by domain
+        ----------
+
+        Parameters
+        ----------
+        manager : CpuSubsetManager
+            Manager giving access to free CPU
+        res_list : list
+            ServerCpu already in subset
+        amount : int
+            CPU requested
+
+        Returns
+        -------
+        cpu_list : list
+            amount free ServerCpu
+        """
+        cpuset = manager.cpuset
+        free_cpus = manager.get_available_cpus()
+        distances = cpuset.get_distances()
+        free_positions = cpuset.get_positions(free_cpus)
+        distance_sums = distances[np.ix_(free_positions, cpuset.get_positions(res_list))].sum(axis=1, dtype=np.float64) # Exact on integers
+        # Domains are indexed by order of appearance in cpuset
+        domain_index = dict()
+        free_domain = np.fromiter((domain_index.setdefault(self.get_domain(cpu), len(domain_index)) for cpu in free_cpus), dtype=np.intp, count=len(free_cpus))
+        free_count = np.bincount(free_domain, minlength=len(domain_index))
+        members = np.zeros(len(domain_index), dtype=np.int64)
+        for cpu in res_list:
+            domain = self.get_domain(cpu)
+            if domain in domain_index: members[domain_index[domain]] += 1
+
+        selected = list()
+        for count in range(amount):
+            hosting = (members > 0) & (free_count > 0)
+            fitting = free_count >= (amount - count)
+            if hosting.any(): target = int(np.argmax(np.where(hosting, members, -1)))
+            elif fitting.any(): target = int(np.argmin(np.where(fitting, free_count, np.iinfo(np.int64).max)))
+            else: target = int(np.argmax(free_count))
+            chosen = int(np.argmin(np.where(free_domain == target, distance_sums, np.inf)))
+            selected.append(free_cpus[chosen])
+            free_count[target] -= 1
+            members[target] += 1
+            distance_sums[chosen] = np.inf # No longer free
+            distance_sums += distances[free_positions, free_positions[chosen]]
+        return selected
+
+class CachePlacementStrategy(DomainPlacementStrategy):
+    """
+    Fill a last level cache domain (e.g. L3/CCX) before spilling: favors cache locality of premium subsets
+    """
+
+    def get_domain(self, cpu):
+        return (cpu.get_numa_node(),) + list(cpu.get_cache_level().items())[-1]
+
+    def get_id(self):
+        return 'cache'
+
+class NumaPlacementStrategy(DomainPlacementStrategy):
+    """
+    Fill a NUMA node before spilling: favors memory locality
+    """
+
+    def get_domain(self, cpu):
+        return (cpu.get_numa_node(),)
+
+    def get_id(self):
+        return 'numa'
+
+class PlacementStrategySelector(object):
+    """
+    A PlacementStrategySelector associates a placement strategy to each oversubscription level
+    ...
+
+    Attributes
+    ----------
+    config : str (optional)
+        Comma separated list of level:strategy associations, a strategy without level being the default one (e.g. 1.0:cache,distance)
+        Default to distance for all levels
+
+    Public Methods
+    -------
+    get_strategy()
+        Return the strategy of an oversubscription level
+    """
+    STRATEGIES = {'distance': DistancePlacementStrategy, 'cache': CachePlacementStrategy, 'numa': NumaPlacementStrategy}
+
+    def __init__(self, **kwargs):
+        config = kwargs['config'] if ('config' in kwargs and kwargs['config']) else 'distance'
+        self.default_strategy = DistancePlacementStrategy()
+        self.strategy_per_level = dict()
+        for item in config.split(','):
+            item = item.strip()
+            if not item: continue
+            if ':' in item:
+                level, name = item.split(':')
+                self.strategy_per_level[float(level)] = self.__build(name.strip())
+            else: self.default_strategy = self.__build(item)
+
+    def __build(self, name : str):
+        """Instantiate a strategy from its id
+        ----------
+        """
+        if name not in self.STRATEGIES: raise ValueError('Unknown placement strategy', name, list(self.STRATEGIES.keys()))
+        return self.STRATEGIES[name]()
+
+    def get_strategy(self, oversubscription : float):
+        """Return the strategy to use for a given oversubscription level
+        ----------
+
+        Parameters
+        ----------
+        oversubscription : float
+            Subset oversubscription
+
+        Returns
+        -------
+        strategy : PlacementStrategy
+            Strategy to use
+        """
+        if oversubscription in self.strategy_per_level: return self.strategy_per_level[oversubscription]
+        return self.default_strategy
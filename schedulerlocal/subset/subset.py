@@ -3,7 +3,10 @@ from schedulerlocal.domain.domainentity import DomainEntity
 from schedulerlocal.domain.libvirtconnector import LibvirtConnector, ConsumerNotAlived
 from schedulerlocal.dataendpoint.dataendpointpool import DataEndpointPool
 from schedulerlocal.predictor.predictor import PredictorCsoaa
-import os, numpy as np
+from schedulerlocal.node.cpumask import CpuMask
+from schedulerlocal.subset.usagehistory import UsageHistory, ConsumersUsageHistory
+from collections import Counter
+import os, copy, numpy as np
 from math import ceil
 
 class Subset(object):
@@ -34,6 +37,8 @@ class Subset(object):
         Remove a consumer from subset
     count_consumer()
         Count resources in subset
+    fork()
+        Return a copy of the subset for simulation purpose
     """
     def __init__(self, **kwargs):
         self.oversubscription = SubsetOversubscriptionStatic(subset=self, ratio=kwargs['oversubscription'])
@@ -42,6 +47,40 @@ class Subset(object):
         for opt_attribute in opt_attributes:
             opt_val = kwargs[opt_attribute] if opt_attribute in kwargs else list()
             setattr(self, opt_attribute, opt_val)
+        self.consumer_by_name = {consumer.get_name(): consumer for consumer in self.consumer_list} # Lookups without scanning consumers
+        # Allocation aggregates are updated on consumer addition/removal
+        self.allocation = 0
+        self.allocation_count = Counter() # allocation -> count of consumers requesting it
+        self.max_allocation = 0
+        for consumer in self.consumer_list: self.__account_allocation(consumer, added=True)
+        self.simulated = False # Forked subsets do not apply changes to consumers
+
+    def fork(self):
+        """Return a copy of the subset for simulation purpose. Resources and consumers lists are copied while
+        connector, explorers and monitoring records are shared with the original subset
+        Changes on a fork are never applied to consumers
+        ----------
+
+        Returns
+        -------
+        subset : Subset
+            copy
+        """
+        forked = copy.copy(self)
+        forked.res_list = list(self.res_list)
+        forked.consumer_list = list(self.consumer_list)
+        forked.consumer_by_name = dict(self.consumer_by_name)
+        forked.allocation_count = Counter(self.allocation_count)
+        forked.oversubscription = copy.copy(self.oversubscription)
+        forked.oversubscription.subset = forked
+        forked.simulated = True
+        return forked
+
+    def commit(self):
+        """Turn a forked subset into the reference one: changes done on the fork are applied. May be reimplemented
+        ----------
+        """
+        self.simulated = False
 
     def get_oversubscription_id(self):
         """Get subset id
@@ -103,20 +142,14 @@ class Subset(object):
             Return success status of operation
         """
         warning_message = 'Warning: consumer found in subset ' + self.get_res_name() + '-' + str(self.get_oversubscription_id()) + 'while being destroyed:'
-        for consumer in self.consumer_list:
-            # Search by uuid if available
-            if (consumer.get_uuid() == None) and (consumer.get_name() == vm.get_name()): 
-                if consumer.is_being_destroyed():
-                    print(warning_message + ' ' + consumer.get_name() + ' no uuid')
-                    return False
-                return True
-            # Otherwise search by name
-            elif (consumer.get_uuid() != None) and (consumer.get_uuid() == vm.get_uuid()):
-                if consumer.is_being_destroyed():
-                    print(warning_message + ' ' + consumer.get_name() + ' ' + consumer.get_uuid())
-                    return False
-                return True
-        return False
+        consumer = self.consumer_by_name.get(vm.get_name())
+        if consumer is None: return False
+        # Search by uuid if available, otherwise by name
+        if (consumer.get_uuid() != None) and (consumer.get_uuid() != vm.get_uuid()): return False
+        if consumer.is_being_destroyed():
+            print(warning_message + ' ' + consumer.get_name() + ' ' + (consumer.get_uuid() if consumer.get_uuid() != None else 'no uuid'))
+            return False
+        return True
 
     def get_vm_by_name(self, name : str):
         """Get a vm by its name, none if not present
@@ -132,9 +165,7 @@ class Subset(object):
         vm : DomainEntity
             None if not present
         """
-        for consumer in self.consumer_list:
-            if consumer.get_name() == name: return consumer
-        return None
+        return self.consumer_by_name.get(name)
 
     def get_res_name(self):
         """Get resource name managed by susbset. Resource dependant. Must be reimplemented
@@ -167,8 +198,10 @@ class Subset(object):
         consumer : object
             The consumer to add
         """
-        if consumer in self.consumer_list: raise ValueError('Cannot add twice a consumer', consumer)
+        if consumer.get_name() in self.consumer_by_name: raise ValueError('Cannot add twice a consumer', consumer)
         self.consumer_list.append(consumer)
+        self.consumer_by_name[consumer.get_name()] = consumer
+        self.__account_allocation(consumer, added=True)
 
     def remove_consumer(self, consumer):
         """Remove a consumer from subset
@@ -179,11 +212,43 @@ class Subset(object):
         consumer : object
             The consumer to remove
         """
-        if consumer not in self.consumer_list:
-            if consumer == None: print('Warning: trying to remove a null consumer')
-            else: print('Warning: trying to remove a non present consumer', consumer.get_name())
+        if consumer == None:
+            print('Warning: trying to remove a null consumer')
             return
-        self.consumer_list.remove(consumer)
+        registered = self.consumer_by_name.get(consumer.get_name())
+        if registered is None or registered != consumer:
+            print('Warning: trying to remove a non present consumer', consumer.get_name())
+            return
+        del self.consumer_by_name[consumer.get_name()]
+        for index, present in enumerate(self.consumer_list): # Identity test only
+            if present is registered:
+                del self.consumer_list[index]
+                break
+        self.__account_allocation(registered, added=False)
+
+    def __account_allocation(self, consumer, added : bool):
+        """Update allocation aggregates on consumer addition/removal
+        ----------
+
+        Parameters
+        ----------
+        consumer : object
+            The consumer added or removed
+        added : bool
+            True on addition, False on removal
+        """
+        allocation = self.get_vm_allocation(consumer)
+        if added:
+            self.allocation += allocation
+            self.allocation_count[allocation] += 1
+            if allocation > self.max_allocation: self.max_allocation = allocation
+            return
+        self.allocation -= allocation
+        self.allocation_count[allocation] -= 1
+        if self.allocation_count[allocation] > 0: return
+        del self.allocation_count[allocation]
+        # Distinct allocations are few (VM templates): recomputing the max is cheap
+        if allocation >= self.max_allocation: self.max_allocation = max(self.allocation_count) if self.allocation_count else 0
 
     def count_consumer(self):
         """Count consumers in subset
@@ -248,9 +313,7 @@ class Subset(object):
         allocation : int
             Sum of resources requested
         """
-        allocation = 0
-        for consumer in self.consumer_list: allocation+= self.get_vm_allocation(consumer)
-        return allocation
+        return self.allocation
 
     def get_vm_allocation(self, vm : DomainEntity):
         """Return allocation of a given VM. Resource dependant. Must be reimplemented
@@ -279,10 +342,7 @@ class Subset(object):
         allocation : int
             Number of resources requested by the VM
         """
-        max_allocation = 0
-        for consumer in self.consumer_list: 
-            if max_allocation < self.get_vm_allocation(consumer): max_allocation = self.get_vm_allocation(consumer)
-        return max_allocation
+        return self.max_allocation
 
     def get_capacity(self):
         """Return subset physical resource capacity. Resource dependant. Must be reimplemented
@@ -325,6 +385,16 @@ class Subset(object):
         """
         raise NotImplementedError()
 
+    def get_current_resources_pressure(self):
+        """Get current pressure on physical resources. Resource dependant. Must be reimplemented
+
+        Returns
+        -------
+        pressure : float
+            Percentage [0:1]
+        """
+        raise NotImplementedError()
+
     def get_current_consumers_usage(self):
         """Get current CPU usage of consumers
 
@@ -426,11 +496,26 @@ class SubsetCollection(object):
         Remove a resource from subset
     count_subset()
         Count resources in subset
+    fork()
+        Return a collection of forked subsets
     """
 
     def __init__(self, **kwargs):
         self.subset_dict = dict()
 
+    def fork(self):
+        """Return a collection of forked subsets, for simulation purpose
+        ----------
+
+        Returns
+        -------
+        collection : SubsetCollection
+            copy
+        """
+        forked = SubsetCollection()
+        for id, subset in self.subset_dict.items(): forked.add_subset(id, subset.fork())
+        return forked
+
     def add_subset(self, id : float, subset : Subset):
         """Add a subset to collection
         ----------
@@ -612,11 +697,111 @@ class CpuSubset(Subset):
     """
 
     def __init__(self, **kwargs):
-        additional_attributes = ['connector', 'cpu_explorer', 'cpu_count', 'offline']
+        additional_attributes = ['connector', 'cpu_explorer', 'pressure_explorer', 'cpu_count', 'offline']
         for req_attribute in additional_attributes:
             if req_attribute not in kwargs: raise ValueError('Missing required argument', additional_attributes)
             setattr(self, req_attribute, kwargs[req_attribute])
+        self.pinning_epoch = kwargs['pinning_epoch'] if 'pinning_epoch' in kwargs else None # If None, pinning is applied right away
         super().__init__(**kwargs)
+        self.res_mask = CpuMask(size=self.cpu_count, cpu_ids=[cpu.get_cpu_id() for cpu in self.res_list])
+        self.simulated_pin = None # Last pinning computed on a fork
+        self.deployed_on_fork = False
+        self.pinning_deferred = False # Set during batch operations: pinning is synchronized once at the end
+
+    def commit(self):
+        """Turn a forked subset into the reference one: pinning computed on the fork is applied to consumers
+        ----------
+        """
+        super().commit()
+        if self.simulated_pin is not None: self.__apply_pinning(self.simulated_pin)
+        if self.deployed_on_fork:
+            for server_cpu in self.res_list: server_cpu.get_hist().clear_time()
+        self.simulated_pin = None
+        self.deployed_on_fork = False
+
+    def set_pinning_deferred(self, deferred : bool):
+        """Defer (or stop deferring) pinning synchronizations. Caller is in charge of calling sync_pinning() afterwards
+        ----------
+
+        Parameters
+        ----------
+        deferred : bool
+            True to ignore sync_pinning() calls
+        """
+        self.pinning_deferred = deferred
+
+    def get_simulated_pin(self):
+        """Return the pinning computed on a forked subset, None if pinning was not synchronized since last commit
+        ----------
+
+        Returns
+        -------
+        template : CpuMask
+            Pinning template
+        """
+        return self.simulated_pin
+
+    def add_res(self, res):
+        """Add a CPU to subset. Membership is tested on the subset mask
+        ----------
+
+        Parameters
+        ----------
+        res : ServerCpu
+            The CPU to add
+        """
+        if res.get_cpu_id() in self.res_mask: raise ValueError('Cannot add twice a resource', res)
+        self.res_list.append(res)
+        self.res_mask = self.res_mask.with_cpu(res.get_cpu_id())
+
+    def remove_res(self, res):
+        """Remove a CPU from subset
+        ----------
+
+        Parameters
+        ----------
+        res : ServerCpu
+            The CPU to remove
+        """
+        self.res_list.remove(res)
+        self.res_mask = self.res_mask.without_cpu(res.get_cpu_id())
+
+    def replace_res(self, res, new_res):
+        """Replace a CPU of subset by another one, keeping its position in resources list
+        ----------
+
+        Parameters
+        ----------
+        res : ServerCpu
+            The CPU to withdraw
+        new_res : ServerCpu
+            The CPU to add
+        """
+        if new_res.get_cpu_id() in self.res_mask: raise ValueError('Cannot add twice a resource', new_res)
+        self.res_list[self.res_list.index(res)] = new_res
+        self.res_mask = self.res_mask.without_cpu(res.get_cpu_id()).with_cpu(new_res.get_cpu_id())
+
+    def has_res(self, res):
+        """Test if a CPU belongs to subset
+        ----------
+
+        Parameters
+        ----------
+        res : ServerCpu
+            The CPU to test
+        """
+        return res.get_cpu_id() in self.res_mask
+
+    def get_res_mask(self):
+        """Get resources as a CpuMask
+        ----------
+
+        Return
+        ----------
+        mask : CpuMask
+            resources mask
+        """
+        return self.res_mask
 
     def get_res_name(self):
         """Get resource name managed by susbset
@@ -666,6 +851,17 @@ class CpuSubset(Subset):
         """
         return self.cpu_explorer.get_usage_of(self.get_res())
 
+    def get_current_resources_pressure(self):
+        """Get CPU pressure of consumers, based on their cgroups. Fallback to host pressure if unavailable
+
+        Returns
+        -------
+        pressure : float
+            Percentage [0:1], None if PSI is not available
+        """
+        pressure = self.pressure_explorer.get_pressure_of(self.consumer_list)
+        if pressure is None: pressure = self.pressure_explorer.get_pressure_global(resource='cpu')
+        return pressure
 
     def get_current_consumer_usage(self, consumer : DomainEntity):
         """Get current CPU usage of a single consumer
@@ -695,7 +891,10 @@ class CpuSubset(Subset):
         success = super().deploy(vm) 
         # Update vm pinning
         self.sync_pinning()
-        # Reset CPU time used to compute usage
+        if self.simulated: # Done on commit
+            self.deployed_on_fork = True
+            return success
+        # Reset CPU time used to compute usage
         for server_cpu in self.res_list: server_cpu.get_hist().clear_time() # TODO: needed?
         return success
 
@@ -708,11 +907,28 @@ class CpuSubset(Subset):
             If specific cores must be used, use this argument. Otherwise, get_pinning_res() method will be called
         ----------
         """
+        if self.pinning_deferred: return
         if cpu_list == None: cpu_list = self.get_pinning_res()
         template = self.connector.build_cpu_pinning(cpu_list=cpu_list, host_config=self.cpu_count)
+        if self.simulated:
+            self.simulated_pin = template
+            return
+        self.__apply_pinning(template)
+
+    def __apply_pinning(self, template : CpuMask):
+        """Pin consumers to a template
+        ----------
+
+        Parameters
+        ----------
+        template : CpuMask
+            Pinning template
+        """
         for consumer in self.consumer_list:
             consumer.set_cpu_pin(template)
-            if consumer.is_deployed() and not self.offline: self.connector.update_cpu_pinning(vm=consumer)
+            if consumer.is_deployed() and not self.offline:
+                if self.pinning_epoch is not None: self.pinning_epoch.mark(consumer) # Applied once at the end of the epoch
+                else: self.connector.update_cpu_pinning(vm=consumer)
 
     def get_pinning_res(self):
         """Get the resources to use for synchronisation. May be reimplemented
@@ -741,10 +957,10 @@ class CpuElasticSubset(CpuSubset):
     ----------
     res_list : list
         List of physical resources
-    hist_usage : list
-        list of resource usage percentage
-    hist_consumers_usage : list
-        dict of consumer resource usage percentage
+    hist_usage : UsageHistory
+        resource usage percentage over the monitoring window
+    hist_consumers_usage : ConsumersUsageHistory
+        consumers resource usage percentage over the monitoring window
 
 
     Public Methods reimplemented/introduced
@@ -757,15 +973,20 @@ class CpuElasticSubset(CpuSubset):
         super().__init__(**kwargs)
         # Additional attributes
         self.active_res = list()
-        self.hist_usage = list()
-        self.hist_consumers_usage = dict()
-        # TODO: retrieve pre-existing records?
-        # TODO: is hist still needed in this class? Predictor object attributes may be enough
         # Retrieve specific configuration
         self.MONITORING_WINDOW = int(os.getenv('SCL_ACT_MONITORING')) #records older than this value are progressively purged
+        # TODO: is hist still needed in this class? Predictor object attributes may be enough
+        hist_capacity = ceil(self.MONITORING_WINDOW/int(os.getenv('SCL_DELAY', 15))) + 1 # Records of a window, buffers grow if exceeded
+        self.hist_usage = UsageHistory(capacity=hist_capacity)
+        self.hist_consumers_usage = ConsumersUsageHistory(capacity=hist_capacity)
         self.MONITORING_LEARNING = int(os.getenv('SCL_ACT_LEARNING')) 
         self.MONITORING_LEEWAY = int(os.getenv('SCL_ACT_LEEWAY'))
-        self.predictor = PredictorCsoaa(monitoring_window=self.MONITORING_WINDOW, monitoring_learning=self.MONITORING_LEARNING, monitoring_leeway=self.MONITORING_LEEWAY)
+        self.MONITORING_PRESSURE = float(os.getenv('SCL_ACT_PRESSURE', 0))/100 # as [0;1]
+        # Predictor records and model are checkpointed per oversubscription level, to be reloaded on restart
+        checkpoint_dir = os.getenv('SCL_ACT_CHECKPOINT', '')
+        checkpoint = os.path.join(checkpoint_dir, 'predictor-' + str(self.get_oversubscription_id())) if checkpoint_dir else None
+        self.predictor = PredictorCsoaa(monitoring_window=self.MONITORING_WINDOW, monitoring_learning=self.MONITORING_LEARNING, monitoring_leeway=self.MONITORING_LEEWAY,\
+            monitoring_pressure=self.MONITORING_PRESSURE, checkpoint=checkpoint)
 
     def get_pinning_res(self):
         """Get the resources to use for synchronisation. May be reimplemented
@@ -778,6 +999,40 @@ class CpuElasticSubset(CpuSubset):
         if self.active_res: return self.active_res
         return self.res_list
 
+    def replace_res(self, res, new_res):
+        """Replace a CPU of subset by another one, keeping its position in resources and active resources lists
+        ----------
+
+        Parameters
+        ----------
+        res : ServerCpu
+            The CPU to withdraw
+        new_res : ServerCpu
+            The CPU to add
+        """
+        super().replace_res(res, new_res)
+        if res in self.active_res: self.active_res[self.active_res.index(res)] = new_res
+
+    def fork(self):
+        """Return a copy of the subset for simulation purpose. Active resources are copied, predictor and usage history are shared
+        ----------
+
+        Returns
+        -------
+        subset : CpuElasticSubset
+            copy
+        """
+        forked = super().fork()
+        forked.active_res = list(self.active_res)
+        return forked
+
+    def commit(self):
+        """Turn a forked subset into the reference one. History of consumers removed on the fork is dropped
+        ----------
+        """
+        super().commit()
+        self.hist_consumers_usage.retain([consumer.get_uuid() for consumer in self.consumer_list])
+
     def update_monitoring(self, timestamp : int):
         """Order a monitoring session on current subset with specified timestamp key
         Use endpoint_pool to load and store from the appropriate location
@@ -798,13 +1053,14 @@ class CpuElasticSubset(CpuSubset):
             If VM left out of the scope of the scheduler (without passing by manager), return True
         """
         subset_usage, consumers_usage, clean_needed = super().update_monitoring(timestamp=timestamp)
+        subset_pressure = self.endpoint_pool.load_subset_pressure(timestamp=timestamp, subset=self)
         self.manage_hist_records(timestamp=timestamp, subset_usage=subset_usage, consumers_usage=consumers_usage)
         if subset_usage is None:
             return subset_usage, consumers_usage, clean_needed
 
         # Update active resources
         next_peak = self.predictor.predict(timestamp=timestamp, current_resources=self.count_res(),\
-            allocation=self.get_allocation(), metric=subset_usage)
+            allocation=self.get_allocation(), metric=subset_usage, pressure=subset_pressure)
         if next_peak != len(self.active_res):
             self.active_res = self.res_list[:next_peak]
             self.sync_pinning()
@@ -826,17 +1082,12 @@ class CpuElasticSubset(CpuSubset):
             The last consumers dict resource usage percentage
         """
         # Add global usage
-        if subset_usage is not None: self.hist_usage.append((timestamp, subset_usage))
-        self.__remove_from_list_expired_timestamp(timestamp=timestamp, list_of_timestamp_tuple=self.hist_usage)
-
-        # Add consumers usage
-        for consumer_uuid, usage_tuple in consumers_usage.items():
-            __, consumer_usage = usage_tuple # tuple from endpoint is (DomainEntity, value)
-            if consumer_usage is not None:
-                if consumer_uuid not in self.hist_consumers_usage: self.hist_consumers_usage[consumer_uuid] = list()
-                self.hist_consumers_usage[consumer_uuid].append((timestamp, consumer_usage))
-            # Manage expired data
-            if consumer_uuid in self.hist_consumers_usage: self.__remove_from_list_expired_timestamp(timestamp=timestamp, list_of_timestamp_tuple=self.hist_consumers_usage[consumer_uuid])
+        if subset_usage is not None: self.hist_usage.append(timestamp, subset_usage)
+        self.hist_usage.expire(timestamp - self.MONITORING_WINDOW)
+
+        # Add consumers usage (tuple from endpoint is (DomainEntity, value))
+        self.hist_consumers_usage.append(timestamp, {consumer_uuid: usage_tuple[1] for consumer_uuid, usage_tuple in consumers_usage.items()})
+        self.hist_consumers_usage.expire(timestamp - self.MONITORING_WINDOW)
 
     def remove_consumer(self, consumer):
         """Remove a consumer from subset
@@ -848,26 +1099,8 @@ class CpuElasticSubset(CpuSubset):
             The consumer to remove
         """
         super().remove_consumer(consumer=consumer)
-        if (consumer is not None and consumer.get_uuid() in self.hist_consumers_usage): del self.hist_consumers_usage[consumer.get_uuid()]
-
-    def __remove_from_list_expired_timestamp(self, timestamp, list_of_timestamp_tuple : list):
-        """Parse a list of tuple where the first record is a timestamp and remove all values being older than
-        timestamp - self.MONITORING_WINDOW
-        ----------
-
-        Parameters
-        ----------
-        timestamp : int
-            The timestamp key
-        list_of_timestamp_tuple : list
-            List of tuple (timestamp, value)
-        """
-        records_to_remove = list()
-        for record_tuple in list_of_timestamp_tuple:
-            record_timestamp, __ = record_tuple
-            if record_timestamp < (timestamp - self.MONITORING_WINDOW): records_to_remove.append(record_tuple)
-            else: break # as values are parsed from older to newer ones
-        for record_to_remove in records_to_remove: list_of_timestamp_tuple.remove(record_to_remove)
+        # History is shared with the reference subset on a fork: it is cleaned on commit
+        if (consumer is not None) and (not self.simulated): self.hist_consumers_usage.remove(consumer.get_uuid())
 
     def __str__(self):
         return 'CpuElasticSubset oc:' + str(self.oversubscription) + ' alloc:' + str(self.get_allocation()) + ' capacity:' + str(self.get_capacity()) +\
@@ -0,0 +1,104 @@
+import numpy as np
+
+class SubsetDefragmenter(object):
+    """
+    A SubsetDefragmenter plans CPU swaps compacting CPU subsets on host topology
+    Subsets only grow and shrink at their edges: after churn, they may be spread across cache domains and NUMA nodes
+    Spread of a subset is the sum of distances between its CPU. A swap replaces a CPU of a subset by a free CPU or by a CPU
+    of another subset (the latter receiving the replaced CPU), and is planned only if it reduces the total spread
+    ...
+
+    Attributes
+    ----------
+    cpuset : ServerCpuSet
+        Host topology, with distances
+
+    Public Methods
+    -------
+    get_spread()
+        Return the spread of a subset
+    plan()
+        Return the swaps reducing the most the spread of subsets
+    """
+
+    def __init__(self, **kwargs):
+        req_attributes = ['cpuset']
+        for req_attribute in req_attributes:
+            if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
+            setattr(self, req_attribute, kwargs[req_attribute])
+
+    def get_spread(self, subset):
+        """Return the spread of a subset: sum of distances between each pair of its CPU
+        ----------
+
+        Parameters
+        ----------
+        subset : CpuSubset
+            The subset to consider
+
+        Returns
+        -------
+        spread : int
+            Sum of distances
+        """
+        positions = self.cpuset.get_positions(subset.get_res())
+        return int(self.cpuset.distances[np.ix_(positions, positions)].sum(dtype=np.int64)) // 2
+
+    def plan(self, subset_list : list, max_swaps : int):
+        """Greedily plan up to max_swaps swaps, each one being the swap reducing the most the total spread
+        Planning stops earlier if no swap reduces the spread
+        ----------
+
+        Parameters
+        ----------
+        subset_list : list
+            CpuSubset list to compact
+        max_swaps : int
+            Maximum number of swaps returned
+
+        Returns
+        -------
+        swaps : list
+            list of tuples (subset, cpu to withdraw from subset, cpu to give to subset, other subset giving the cpu or None if cpu is free)
+        """
+        distances = self.cpuset.distances.astype(np.int64)
+        cpu_list = self.cpuset.get_cpu_list()
+        # Owner of each CPU (position in subset_list), -1 for free CPU
+        owner = np.full(len(cpu_list), -1, dtype=np.intp)
+        for index, subset in enumerate(subset_list): owner[self.cpuset.get_positions(subset.get_res())] = index
+        # sums[p, i] : sum of distances from CPU at position p to CPU of subset i
+        membership = np.zeros((len(cpu_list), len(subset_list)), dtype=np.int64)
+        membership[owner >= 0, owner[owner >= 0]] = 1
+        sums = distances @ membership
+
+        swaps = list()
+        while len(swaps) < max_swaps:
+            best_gain, best_swap = 0, None
+            for index in range(len(subset_list)):
+                members = np.flatnonzero(owner == index)
+                others  = np.flatnonzero(owner != index)
+                if members.size == 0 or others.size == 0: continue
+                # Gain of subset when a member is replaced by another CPU
+                gain = sums[members, index][:, None] - sums[others, index][None, :] + distances[np.ix_(members, others)]
+                # Gain of the subset owning the other CPU, if any, receiving the member
+                others_owner = owner[others]
+                owned = others_owner >= 0
+                if owned.any():
+                    owned_others = others[owned]
+                    gain[:, owned] += sums[owned_others, others_owner[owned]][None, :] - sums[np.ix_(members, others_owner[owned])] +\
+                        distances[np.ix_(members, owned_others)]
+                member_index, other_index = np.unravel_index(np.argmax(gain), gain.shape)
+                if gain[member_index, other_index] > best_gain:
+                    best_gain = gain[member_index, other_index]
+                    best_swap = (index, members[member_index], others[other_index])
+            if best_swap is None: break
+
+            # Update context as if swap was applied
+            index, withdrawn, given = best_swap
+            other = owner[given]
+            sums[:, index] += distances[:, given] - distances[:, withdrawn]
+            owner[given] = index
+            owner[withdrawn] = other
+            if other >= 0: sums[:, other] += distances[:, withdrawn] - distances[:, given]
+            swaps.append((subset_list[index], cpu_list[withdrawn], cpu_list[given], subset_list[other] if other >= 0 else None))
+        return swaps
@@ -1,8 +1,18 @@
 from schedulerlocal.subset.subset import SubsetCollection, Subset, CpuSubset, CpuElasticSubset, MemSubset
+from schedulerlocal.subset.subsetdefragmenter import SubsetDefragmenter
+from schedulerlocal.subset.placementstrategy import PlacementStrategySelector
+from schedulerlocal.subset.memoryallocator import MemoryAllocator
 from schedulerlocal.domain.domainentity import DomainEntity
+from schedulerlocal.domain.pinningepoch import PinningEpoch
+from schedulerlocal.domain.vmregistry import VmRegistry
 from schedulerlocal.node.cpuexplorer import CpuExplorer
 from schedulerlocal.node.memoryexplorer import MemoryExplorer
-import math
+from schedulerlocal.node.pressureexplorer import PressureExplorer
+from schedulerlocal.node.cputree import CpuTree
+from schedulerlocal.node.cpumask import CpuMask
+from concurrent.futures import ThreadPoolExecutor
+import math, copy, os, uuid, threading
+import numpy as np
 
 class SubsetManager(object):
     """
@@ -18,6 +28,12 @@ class SubsetManager(object):
     -------
     build_initial_subset()
         Deploy a VM to the appropriate subset. Must be reimplemented
+    fork()
+        Return a copy of the manager on which deployments can be simulated
+    begin_batch()/end_batch()
+        Delimit a batch of deployments/removals
+    get_version()
+        Return the state version, incremented on each mutation
     """
 
     def __init__(self, **kwargs):
@@ -26,6 +42,71 @@ class SubsetManager(object):
             if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
             setattr(self, req_attribute, kwargs[req_attribute])
         self.collection = SubsetCollection()
+        self.batch = False
+        self.simulated = False # Forked managers do not apply changes
+        self.version = 0 # Incremented once a mutation is done, status is cached per version
+        self.status_cache = (None, None)
+
+    def increment_version(self):
+        """Notify that the state of the manager changed
+        ----------
+        """
+        self.version += 1
+
+    def get_version(self):
+        """Return the state version of the manager, incremented on each mutation
+        ----------
+
+        Returns
+        -------
+        version : int
+            State version
+        """
+        return self.version
+
+    def begin_batch(self):
+        """Start a batch of deployments/removals: operations usually done after each of them are deferred until end_batch()
+        May be reimplemented
+        ----------
+        """
+        self.batch = True
+
+    def end_batch(self):
+        """End a batch of deployments/removals and apply deferred operations. May be reimplemented
+        ----------
+        """
+        self.batch = False
+        self.increment_version()
+
+    def fork(self):
+        """Return a copy of the manager on which deployments can be simulated: subsets are forked, static attributes are shared
+        May be reimplemented to copy resource dependant state
+        ----------
+
+        Returns
+        -------
+        manager : SubsetManager
+            copy
+        """
+        forked = copy.copy(self)
+        forked.collection = self.collection.fork()
+        forked.simulated = True
+        return forked
+
+    def commit(self, forked):
+        """Adopt the state of a fork (copy-on-write transaction): its subsets become the reference ones and their changes are applied
+        May be reimplemented to adopt resource dependant state
+        ----------
+
+        Parameters
+        ----------
+        forked : SubsetManager
+            Fork of this manager
+        """
+        self.collection = forked.collection
+        if not self.simulated: # Committing on a fork: changes are kept simulated
+            for subset in self.collection.get_subsets(): subset.commit()
+        self.increment_version()
     
     def deploy(self, vm : DomainEntity):
         """Deploy a VM to the appropriate subset
@@ -42,8 +123,10 @@ class SubsetManager(object):
             Return success status of operation
         """
         if self.collection.contains_subset(self.get_appropriate_id(vm)):
-            return self.__try_to_deploy_on_existing_subset(vm)
-        return self.__try_to_deploy_on_new_subset(vm)
+            success = self.__try_to_deploy_on_existing_subset(vm)
+        else: success = self.__try_to_deploy_on_new_subset(vm)
+        self.increment_version()
+        return success
 
     def remove(self, vm : DomainEntity):
         """Remove a VM
@@ -64,6 +147,7 @@ class SubsetManager(object):
         subset = self.collection.get_subset(subset_id)
         subset.remove_consumer(vm)
         self.shrink_subset(subset)
+        self.increment_version()
         return True
 
     def has_vm(self, vm : DomainEntity):
@@ -141,6 +225,7 @@ class SubsetManager(object):
         oversubscription = self.get_appropriate_id(vm)
         subset = self.try_to_create_subset(initial_capacity=self.get_request(vm), oversubscription=oversubscription)
         if subset == None: return False
+        subset.simulated = self.simulated # Created on a fork: pinning is applied on commit
         self.collection.add_subset(oversubscription, subset)
         return subset.deploy(vm)
 
@@ -240,6 +325,16 @@ class SubsetManager(object):
         """
         raise NotImplementedError()
 
+    def get_current_resources_pressure(self):
+        """Get current pressure on physical resources. Resource dependant. Must be reimplemented
+
+        Returns
+        -------
+        pressure : float
+            Percentage [0:1]
+        """
+        raise NotImplementedError()
+
     def iterate(self, timestamp : int):
         """Order a monitoring session on host resources and on each subset with specified timestamp key
         Use endpoint_pool to load and store from the appropriate location
@@ -252,12 +347,14 @@ class SubsetManager(object):
         """
         # Update global data: Nothing is done live with it but data are dumped for post analysis
         data = self.endpoint_pool.load_global(timestamp=timestamp, subset_manager=self)
+        pressure = self.endpoint_pool.load_global_pressure(timestamp=timestamp, subset_manager=self)
         # Update subset data
         clean_needed_list = self.collection.update_monitoring(timestamp=timestamp)
         for subset in clean_needed_list: self.shrink_subset(subset)
+        self.increment_version()
 
     def status(self):
-        """Return susbset status as dict
+        """Return susbset status as dict. Status is computed once per state version: returned dict must not be modified
         ----------
 
         Returns
@@ -265,11 +362,15 @@ class SubsetManager(object):
         status : dicts
             Subset status
         """
+        version = self.version # Read first: a mutation during computation invalidates the cached status
+        cached_version, cached_status = self.status_cache
+        if cached_version == version: return cached_status
         available = self.get_available_res_count()
         status = {'avail': available, 'subset': dict()}
         for name, subset in self.collection.get_dict().items():
             status['subset'][name] = subset.status()
             status['subset'][name]['vpotential'] = subset.get_oversubscription().get_oversubscribed_quantity(quantity=available, with_new_vm=True)
+        self.status_cache = (version, status)
         return status
 
     def get_res_name(self):
@@ -361,18 +462,84 @@ class CpuSubsetManager(SubsetManager):
             if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
             setattr(self, req_attribute, kwargs[req_attribute])
         self.cpu_explorer = CpuExplorer()
+        self.pressure_explorer = PressureExplorer()
+        try:
+            self.cpu_tree = CpuTree(cpuset=self.cpuset) # Closest/farthest free CPU queries
+        except ValueError as ex:
+            print('Warning: topology tree unavailable, distances are computed on CPU pairs', str(ex))
+            self.cpu_tree = None
+        # Free CPU index, maintained on each CPU attribution/withdrawal
+        self.cpuid_dict = {cpu.get_cpu_id():cpu for cpu in self.cpuset.get_cpu_list()}
+        self.free_mask  = CpuMask(size=self.cpuset.get_host_count(), cpu_ids=self.cpuid_dict.keys())
+        self.free_count = len(self.cpuid_dict)
+        self.pinning_epoch = kwargs['pinning_epoch'] if 'pinning_epoch' in kwargs else None
+        # CPU selection on subset creation/extension, per oversubscription level
+        self.placement = PlacementStrategySelector(config=os.getenv('SCL_PLACEMENT'))
+        # Background compaction of subsets: count of CPU swaps applied per iteration (0 to disable)
+        self.defragmenter = SubsetDefragmenter(cpuset=self.cpuset)
+        self.defrag_swaps = int(os.getenv('SCL_DEFRAG_SWAPS', 0))
         super().__init__(**kwargs)
 
+    def fork(self):
+        """Return a copy of the manager on which deployments can be simulated. Free CPU index and topology tree are copied
+        (free mask is immutable and cpuid_dict is static, both are shared)
+        ----------
+
+        Returns
+        -------
+        manager : CpuSubsetManager
+            copy
+        """
+        forked = super().fork()
+        if self.cpu_tree is not None: forked.cpu_tree = self.cpu_tree.fork()
+        return forked
+
+    def commit(self, forked):
+        """Adopt the state of a fork: subsets, free CPU index and topology tree
+        ----------
+
+        Parameters
+        ----------
+        forked : CpuSubsetManager
+            Fork of this manager
+        """
+        self.free_mask  = forked.free_mask
+        self.free_count = forked.free_count
+        self.cpu_tree   = forked.cpu_tree
+        super().commit(forked)
+
     def deploy(self, vm : DomainEntity):
         success = super().deploy(vm)
-        if success: self.balance_available_resources()
+        if success and not self.batch:
+            self.balance_available_resources()
+            self.increment_version()
         return success
 
     def remove(self, vm : DomainEntity):
         success = super().remove(vm)
-        if success: self.balance_available_resources()
+        if success and not self.batch:
+            self.balance_available_resources()
+            self.increment_version()
         return success
 
+    def begin_batch(self):
+        """Start a batch of deployments/removals: pinning synchronizations and balancing are deferred until end_batch()
+        ----------
+        """
+        super().begin_batch()
+        for subset in self.collection.get_subsets(): subset.set_pinning_deferred(True)
+
+    def end_batch(self):
+        """End a batch of deployments/removals: synchronize pinning of each subset once, then balance oversubscribed subsets
+        ----------
+        """
+        super().end_batch()
+        for level, subset in self.collection.get_dict().items():
+            subset.set_pinning_deferred(False)
+            if level <= 1.0: subset.sync_pinning() # Oversubscribed ones are synchronized by balancing
+        self.balance_available_resources()
+        self.increment_version()
+
     def try_to_create_subset(self,  initial_capacity : int, oversubscription : float, subset_type : type = CpuSubset):
         """Try to create subset with specified capacity
         ----------
@@ -392,18 +559,17 @@ class CpuSubsetManager(SubsetManager):
         if initial_capacity <=0 : raise ValueError('Cannot create a subset with negative capacity', initial_capacity)
         
         # Starting point
-        available_cpus_ordered = self.__get_farthest_available_cpus()
-
-        if len(available_cpus_ordered) < initial_capacity: return None
-        starting_cpu = available_cpus_ordered[0]
-        cpu_subset = subset_type(connector=self.connector, cpu_explorer=self.cpu_explorer, endpoint_pool=self.endpoint_pool,\
-            oversubscription=oversubscription, cpu_count=self.cpuset.get_host_count(), offline=self.offline)
-        cpu_subset.add_res(starting_cpu)
+        if self.get_available_res_count() < initial_capacity: return None
+        strategy = self.placement.get_strategy(oversubscription)
+        starting_cpu = strategy.get_starting_cpu(self, amount=initial_capacity)
+        cpu_subset = subset_type(connector=self.connector, cpu_explorer=self.cpu_explorer, pressure_explorer=self.pressure_explorer, endpoint_pool=self.endpoint_pool,\
+            oversubscription=oversubscription, cpu_count=self.cpuset.get_host_count(), offline=self.offline, pinning_epoch=self.pinning_epoch)
+        cpu_subset.set_pinning_deferred(self.batch)
+        self.__add_cpu_to_subset(cpu_subset, starting_cpu)
 
         initial_capacity-=1 # One was attributed
         if initial_capacity>0:
-            available_cpus_ordered = self.__get_closest_available_cpus(cpu_subset) # Recompute based on chosen starting point
-            for i in range(initial_capacity): cpu_subset.add_res(available_cpus_ordered[i])
+            for cpu in strategy.get_cpus_for_new_subset(self, cpu_subset, amount=initial_capacity): self.__add_cpu_to_subset(cpu_subset, cpu)
 
         return cpu_subset
 
@@ -424,12 +590,95 @@ class CpuSubsetManager(SubsetManager):
             Return success status of operation
         """
         if amount<=0: return True
-        available_cpus_ordered = self.__get_closest_available_cpus(subset)
-        if len(available_cpus_ordered) < amount: return None
-        subset.add_res(available_cpus_ordered[0])
-        return self.try_to_extend_subset(subset,amount=(amount-1))
+        if self.get_available_res_count() < amount: return None
+        strategy = self.placement.get_strategy(subset.get_oversubscription_id())
+        for cpu in strategy.get_cpus_for_extension(self, subset, amount=amount): self.__add_cpu_to_subset(subset, cpu)
+        return True
+
+    def __add_cpu_to_subset(self, subset : CpuSubset, cpu):
+        """Attribute a CPU to a subset, keeping topology tree up to date
+        ----------
+
+        Parameters
+        ----------
+        subset : CpuSubset
+            The subset to extend
+        cpu : ServerCpu
+            The CPU to attribute
+        """
+        subset.add_res(cpu)
+        self.free_mask = self.free_mask.without_cpu(cpu.get_cpu_id())
+        self.free_count-=1
+        if self.cpu_tree is not None: self.cpu_tree.allocate(cpu)
+
+    def __remove_cpu_from_subset(self, subset : CpuSubset, cpu):
+        """Withdraw a CPU from a subset, keeping topology tree up to date
+        ----------
+
+        Parameters
+        ----------
+        subset : CpuSubset
+            The subset to reduce
+        cpu : ServerCpu
+            The CPU to withdraw
+        """
+        subset.remove_res(cpu)
+        self.free_mask = self.free_mask.with_cpu(cpu.get_cpu_id())
+        self.free_count+=1
+        if self.cpu_tree is not None: self.cpu_tree.release(cpu)
+
+    def __swap_cpu_of_subset(self, subset : CpuSubset, cpu, new_cpu, other_subset : CpuSubset = None):
+        """Replace a CPU of a subset by a free CPU or by a CPU of another subset (which receives the replaced CPU)
+        ----------
+
+        Parameters
+        ----------
+        subset : CpuSubset
+            The subset to modify
+        cpu : ServerCpu
+            The CPU to withdraw from subset
+        new_cpu : ServerCpu
+            The CPU to give to subset
+        other_subset : CpuSubset (optional)
+            The subset owning new_cpu. None if new_cpu is free
+        """
+        if other_subset is not None:
+            other_subset.replace_res(new_cpu, cpu)
+            subset.replace_res(cpu, new_cpu)
+            return
+        subset.replace_res(cpu, new_cpu)
+        self.free_mask = self.free_mask.with_cpu(cpu.get_cpu_id()).without_cpu(new_cpu.get_cpu_id())
+        if self.cpu_tree is not None:
+            self.cpu_tree.release(cpu)
+            self.cpu_tree.allocate(new_cpu)
+
+    def defragment(self, max_swaps : int):
+        """Compact subsets on host topology by applying up to max_swaps CPU swaps, then re-pin modified subsets
+        ----------
 
-    def __get_closest_available_cpus(self, subset : CpuSubset):
+        Parameters
+        ----------
+        max_swaps : int
+            Maximum number of swaps to apply
+
+        Returns
+        -------
+        swaps : int
+            Number of swaps applied
+        """
+        swaps = self.defragmenter.plan(list(self.collection.get_subsets()), max_swaps=max_swaps)
+        if not swaps: return 0
+        modified = list()
+        for subset, cpu, new_cpu, other_subset in swaps:
+            self.__swap_cpu_of_subset(subset, cpu, new_cpu, other_subset)
+            for modified_subset in (subset, other_subset):
+                if (modified_subset is not None) and (modified_subset not in modified): modified.append(modified_subset)
+        for subset in modified: subset.sync_pinning()
+        self.balance_available_resources()
+        self.increment_version()
+        return len(swaps)
+
+    def get_closest_available_cpus(self, subset : CpuSubset, amount : int = None):
         """Retrieve the list of available CPUs ordered by their average distance value closest to specified Subset
         ----------
 
@@ -437,32 +686,41 @@ class CpuSubsetManager(SubsetManager):
         ----------
         subset : CpuSubset
             The subset requested
+        amount : int (optional)
+            If specified, only the amount closest CPU are returned (and computed through the topology tree if available)
 
         Returns
         -------
         cpu_list : list
             List of available CPU ordered by their distance
         """
-        cpuid_dict = {cpu.get_cpu_id():cpu for cpu in self.cpuset.get_cpu_list()}
-        available_list = self.__get_available_cpus()
+        if (amount is not None) and (self.cpu_tree is not None): return self.cpu_tree.closest_free(subset.get_res(), amount)
+        cpuid_dict = self.cpuid_dict
+        available_list = self.get_available_cpus()
         allocated_list = subset.get_res()
         available_cpu_weighted = self.__get_available_cpus_with_weight(from_list=available_list, to_list=allocated_list, exclude_max=False)
         # Reorder distances from the closest one to the farthest one
         return [cpuid_dict[cpuid] for cpuid, v in sorted(available_cpu_weighted.items(), key=lambda item: item[1])]
 
-    def __get_farthest_available_cpus(self):
+    def get_farthest_available_cpus(self, amount : int = None):
         """When considering subset allocation. One may want to start from the farthest CPU possible
         This getter retrieve available CPUs and order them in a reverse order based on distance from current subsets CPUs
         ----------
 
+        Parameters
+        ----------
+        amount : int (optional)
+            If specified, only the amount farthest CPU are returned (and computed through the topology tree if available)
+
         Returns
         -------
         ordered_cpu : list
             List of available CPU ordered in reverse by their distance
         """
-        cpuid_dict = {cpu.get_cpu_id():cpu for cpu in self.cpuset.get_cpu_list()}
-        available_list = self.__get_available_cpus()
-        allocated_list = self.collection.get_res()
+        if (amount is not None) and (self.cpu_tree is not None): return self.cpu_tree.farthest_free(amount)
+        cpuid_dict = self.cpuid_dict
+        available_list = self.get_available_cpus()
+        allocated_list = [cpuid_dict[cpuid] for cpuid in (CpuMask(cpu_ids=cpuid_dict.keys()) - self.free_mask)]
         available_cpu_weighted = self.__get_available_cpus_with_weight(from_list=available_list, to_list=allocated_list, exclude_max=False)
         # Reorder distances from the farthest one to the closest one
         return [cpuid_dict[cpuid] for cpuid, v in sorted(available_cpu_weighted.items(), key=lambda item: item[1], reverse=True)]
@@ -485,31 +743,29 @@ class CpuSubsetManager(SubsetManager):
         distance : dict
             Dict of CPUID (as key) with average distance being computed
         """
-        computed_distances = dict()
-        for available_cpu in from_list:
-            total_distance = 0
-            total_count = 0
-
-            exclude_identical = False
-            for subset_cpu in to_list:
-                if subset_cpu == available_cpu: 
-                    exclude_identical = True
-                    break
-
-                distance = self.cpuset.get_distance_between_cpus(subset_cpu, available_cpu)
-                if exclude_max and (distance >= self.distance_max): continue
-
-                total_distance+=distance
-                total_count+=1
-
-            if exclude_identical : continue
-            if total_count <= 0: computed_distances[available_cpu.get_cpu_id()] = 0
-            elif total_distance>=0: computed_distances[available_cpu.get_cpu_id()] = total_distance/total_count
+        if not from_list: return dict()
+        from_cpuid = [cpu.get_cpu_id() for cpu in from_list]
+        if not to_list: return {cpuid:0 for cpuid in from_cpuid}
+
+        # Average is computed at once on the sub matrix (from_list x to_list)
+        from_positions = self.cpuset.get_positions(from_list)
+        to_positions   = self.cpuset.get_positions(to_list)
+        distances = self.cpuset.get_distances()[np.ix_(from_positions, to_positions)].astype(np.int64)
+        considered = np.ones(distances.shape, dtype=bool)
+        if exclude_max: considered = (distances < self.distance_max)
+        total_distance = np.where(considered, distances, 0).sum(axis=1)
+        total_count = considered.sum(axis=1)
+        identical = np.isin(from_positions, to_positions) # CPU already in to_list are disregarded
 
+        computed_distances = dict()
+        for index, cpuid in enumerate(from_cpuid):
+            if identical[index]: continue
+            if total_count[index] <= 0: computed_distances[cpuid] = 0
+            else: computed_distances[cpuid] = int(total_distance[index])/int(total_count[index])
         return computed_distances
 
-    def __get_available_cpus(self):
-        """Retrieve the list of CPUs without subset attribution
+    def get_available_cpus(self):
+        """Retrieve the list of CPUs without subset attribution (ordered as in cpuset) from the free CPU index
         ----------
 
         Returns
@@ -517,11 +773,7 @@ class CpuSubsetManager(SubsetManager):
         cpu_list : list
             list of CPUs without attribution
         """
-        allocated_cpu_list = self.collection.get_res()
-        available_cpu_list = list()
-        for cpu in self.cpuset.get_cpu_list(): 
-            if cpu not in allocated_cpu_list: available_cpu_list.append(cpu)
-        return available_cpu_list
+        return sorted([self.cpuid_dict[cpuid] for cpuid in self.free_mask], key=lambda cpu: self.cpuset.cpu_position[cpu.get_cpu_id()])
 
     def shrink_subset(self, subset : CpuSubset):
         """Reduce subset capacity based on current allocation
@@ -535,7 +787,7 @@ class CpuSubsetManager(SubsetManager):
         unused = subset.unused_resources_count()
         res_list = list(subset.get_res())
         last_index = len(res_list) - 1
-        for count in range(unused): subset.remove_res(res_list[last_index-count])
+        for count in range(unused): self.__remove_cpu_from_subset(subset, res_list[last_index-count])
         subset.sync_pinning()
 
     def get_appropriate_id(self, vm : DomainEntity):
@@ -570,7 +822,6 @@ class CpuSubsetManager(SubsetManager):
             if level <= 1.0 or subset.count_consumer() <= 0:
                 continue
             else:
-                subset.sync_pinning()
                 capacity_oversub   += subset.get_capacity()
                 allocation_oversub += subset.get_allocation()
                 allocation_oversub_list.extend(subset.get_res())
@@ -578,13 +829,27 @@ class CpuSubsetManager(SubsetManager):
                 critical_size_unreached = critical_size_unreached or (not subset.get_oversubscription().is_critical_size_reached())
                 if (min_oversubscribed_level == None) or (level < min_oversubscribed_level): min_oversubscribed_level = level
 
-        # Test if balance is useful/possible
+        # Test if balance is useful/possible
+        shared_list = None # If None, subsets are pinned on their own resources
         if critical_size_unreached:
             min_allocation_for_mutualisation =  math.ceil(allocation_oversub/min_oversubscribed_level)
             potential_allocation = self.get_available_res_count() + allocation_oversub
             if potential_allocation >= min_allocation_for_mutualisation:
-                allocation_oversub_list.extend(self.__get_available_cpus())
-                for subset in oversub_list: subset.sync_pinning(cpu_list=allocation_oversub_list)
+                shared_list = allocation_oversub_list + self.get_available_cpus()
+        # Each subset is synchronized once, on its final pinning
+        for subset in oversub_list: subset.sync_pinning(cpu_list=shared_list)
+
+    def iterate(self, timestamp : int):
+        """Order a monitoring session on host resources and on each subset, then compact subsets if enabled
+        ----------
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp key
+        """
+        super().iterate(timestamp=timestamp)
+        if self.defrag_swaps > 0: self.defragment(max_swaps=self.defrag_swaps)
 
     def get_current_resources_usage(self):
         """Get usage of physical CPU resources
@@ -596,6 +861,16 @@ class CpuSubsetManager(SubsetManager):
         """
         return self.cpu_explorer.get_usage_global()
 
+    def get_current_resources_pressure(self):
+        """Get host pressure on physical CPU resources
+
+        Returns
+        -------
+        pressure : float
+            Percentage [0:1], None if PSI is not available
+        """
+        return self.pressure_explorer.get_pressure_global(resource='cpu')
+
     def get_request(self, vm : DomainEntity):
         """For a given VM, return its CPU request
         ----------
@@ -643,7 +918,7 @@ class CpuSubsetManager(SubsetManager):
         count : int
             available cpu count
         """
-        return len(self.__get_available_cpus())
+        return self.free_count
 
     def __str__(self):
         return 'CPUSubsetManager:\n' +  str(self.collection)
@@ -686,6 +961,7 @@ class MemSubsetManager(SubsetManager):
     """
     A MemSubsetManager is an object in charge of determining appropriate Memory subset collection
     /!\ : out of scope of this paper. We just expose memory as a single package
+    Memory subsets are made of one or several ranges of host memory, attributed by a MemoryAllocator
     ...
 
     Attributes
@@ -704,8 +980,35 @@ class MemSubsetManager(SubsetManager):
             if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
             setattr(self, req_attribute, kwargs[req_attribute])
         self.mem_explorer = MemoryExplorer()
+        self.pressure_explorer = PressureExplorer()
+        self.allocator = MemoryAllocator(capacity=self.memset.get_allowed()) # Free ranges of host memory
         super().__init__(**kwargs)
 
+    def fork(self):
+        """Return a copy of the manager on which deployments can be simulated. Memory allocator is copied
+        ----------
+
+        Returns
+        -------
+        manager : MemSubsetManager
+            copy
+        """
+        forked = super().fork()
+        forked.allocator = self.allocator.fork()
+        return forked
+
+    def commit(self, forked):
+        """Adopt the state of a fork: subsets and memory allocator
+        ----------
+
+        Parameters
+        ----------
+        forked : MemSubsetManager
+            Fork of this manager
+        """
+        self.allocator = forked.allocator
+        super().commit(forked)
+
     def try_to_create_subset(self,  initial_capacity : int, oversubscription : float):
         """Try to create subset with specified capacity
         ----------
@@ -722,22 +1025,16 @@ class MemSubsetManager(SubsetManager):
         subset : Subset
             Return MemSubset created. None if failed.
         """
-        targeted_inf = 0
-        for subset_tuple in self.collection.get_res():
-            bound_inf, bound_sup = subset_tuple
-            if bound_sup > targeted_inf: targeted_inf = bound_sup+1
-        new_tuple = (targeted_inf, targeted_inf+initial_capacity)
-        
-        if not self.__check_capacity_bound(bounds=new_tuple): return None
-        if not self.__check_overlap(new_tuple=new_tuple): return None
+        ranges = self.allocator.allocate(initial_capacity)
+        if ranges is None: return None
 
         mem_subset = MemSubset(oversubscription=oversubscription, connector=self.connector, endpoint_pool=self.endpoint_pool, mem_explorer=self.mem_explorer)
 
-        mem_subset.add_res(new_tuple)
+        self.__add_ranges(mem_subset, ranges)
         return mem_subset
 
     def try_to_extend_subset(self,  subset : MemSubset, amount : int):
-        """Try to extend subset memory by the specified amount
+        """Try to extend subset memory by the specified amount. Memory contiguous to the subset is used first, then any free range
         ----------
 
         Parameters
@@ -752,67 +1049,32 @@ class MemSubsetManager(SubsetManager):
         success : bool
             Return success status of operation
         """
-        if subset.get_res():
-            initial_tuple = subset.get_res()[0]
-            bound_inf, bound_sup = initial_tuple
-            new_tuple = (bound_inf, bound_sup+amount)
-        else:
-            initial_tuple = None
-            new_tuple = (0, amount)
-        
-        success = self.__check_capacity_bound(bounds=new_tuple) 
-        if not success: return False
-
-        success = self.__check_overlap(new_tuple=new_tuple, initial_tuple=initial_tuple) 
-        if not success: return False
-        
-        if initial_tuple != None: subset.remove_res(initial_tuple)
-        subset.add_res(new_tuple)
-        return True
-
-    def __check_capacity_bound(self, bounds : tuple):
-        """Check if specified extension (as tuple of bounds) verify host capacity
-        ----------
-
-        Parameters
-        ----------
-        bounds : tuple
-            Bounds of memory
-
-        Returns
-        -------
-        res : boolean
-            True if host capacity handles extension. False otherwise.
-        """
-        host_capacity = self.memset.get_allowed()
-        if bounds[0] < 0 : return False
-        if bounds[1] > host_capacity: return False
+        last_sup = max([bound_sup for __, bound_sup in subset.get_res()]) if subset.get_res() else None
+        ranges = self.allocator.allocate(amount, after=last_sup)
+        if ranges is None: return False
+        self.__add_ranges(subset, ranges)
         return True
 
-    def __check_overlap(self, new_tuple : tuple, initial_tuple : tuple = None):
-        """Check if specified tuple modification overlaps with others memsubset
+    def __add_ranges(self, subset : MemSubset, ranges : list):
+        """Add allocated ranges to a subset, merging a range with the subset range it extends
         ----------
 
         Parameters
         ----------
-        initial_tuple : int
-            initial tuple
-        new_tuple : int
-            Tuple modified
-
-        Returns
-        -------
-        res : boolean
-            False if overlap check failed, True if succeeded.
+        subset : SubSet
+            The targeted subset
+        ranges : list
+            list of (inf, sup) tuples
         """
-        for other_tuple in self.collection.get_res():
-            if other_tuple == initial_tuple: continue
-            overlap = max(0, min(new_tuple[1], other_tuple[1]) - max(new_tuple[0], other_tuple[0]))
-            if overlap>0: return False
-        return True
+        for new_tuple in ranges:
+            extended = [mem_tuple for mem_tuple in subset.get_res() if mem_tuple[1] == new_tuple[0]]
+            if extended:
+                subset.remove_res(extended[0])
+                new_tuple = (extended[0][0], new_tuple[1])
+            subset.add_res(new_tuple)
 
     def shrink_subset(self, subset : MemSubset = None):
-        """Reduce subset capacity based on current allocation
+        """Reduce subset capacity based on current allocation. Memory is given back from the highest ranges of the subset
         ----------
 
         Parameters
@@ -821,10 +1083,15 @@ class MemSubsetManager(SubsetManager):
             The subset to shrink(if not specified, all subset will be shrinked)
         """
         if not subset.get_res(): return # nothing to reduce
-        unused = subset.unused_resources_count()
-        initial_tuple = subset.get_res()[0]
-        subset.remove_res(initial_tuple)
-        if unused < initial_tuple[1]: subset.add_res((initial_tuple[0], initial_tuple[1]-unused))
+        unused = min(subset.unused_resources_count(), subset.get_capacity())
+        for initial_tuple in sorted(subset.get_res(), reverse=True):
+            if unused <= 0: break
+            bound_inf, bound_sup = initial_tuple
+            released = min(unused, bound_sup - bound_inf)
+            subset.remove_res(initial_tuple)
+            if released < bound_sup - bound_inf: subset.add_res((bound_inf, bound_sup - released))
+            self.allocator.release((bound_sup - released, bound_sup))
+            unused -= released
 
     def get_appropriate_id(self, vm : DomainEntity):
         """For a given VM, get its appropriate subset ID (corresponds to its premium policy)
@@ -852,6 +1119,16 @@ class MemSubsetManager(SubsetManager):
         """
         return self.mem_explorer.get_usage_global()
 
+    def get_current_resources_pressure(self):
+        """Get host pressure on physical Memory resources
+
+        Returns
+        -------
+        pressure : float
+            Percentage [0:1], None if PSI is not available
+        """
+        return self.pressure_explorer.get_pressure_global(resource='memory')
+
     def get_request(self, vm : DomainEntity):
         """For a given VM, return its memory request
         ----------
@@ -899,11 +1176,7 @@ class MemSubsetManager(SubsetManager):
         memory : int
             Memory as MB
         """
-        allocation = 0
-        for subset_tuple in self.collection.get_res():
-            bound_inf, bound_sup = subset_tuple
-            if bound_sup>bound_inf: allocation+= bound_sup - bound_inf
-        return self.get_capacity() - allocation
+        return self.allocator.get_free()
 
     def __str__(self):
         return 'MemSubsetManager:\n' +  str(self.collection)
@@ -913,6 +1186,8 @@ class SubsetManagerPool(object):
     A SubsetManagerPool is a pool of SubsetManager
     It is for now composed of a CpuSubsetManager and a MemSubsetManager
     /!\ Mem is out of scope of this paper. We just expose memory as a single package
+    Iterations, deployments and removals are serialized: a deployment staged on a fork is committed before monitoring
+    changes subsets again
     ...
 
     Attributes
@@ -926,6 +1201,12 @@ class SubsetManagerPool(object):
     -------
     iteration()
         Manage iteration
+    simulate()
+        Evaluate deployments without applying them
+    deploy_batch()
+        Deploy a list of VMs
+    get_state_tag()
+        Return a tag changing each time the state of a subset manager changes
     """
 
     def __init__(self, **kwargs):
@@ -933,10 +1214,19 @@ class SubsetManagerPool(object):
         for req_attribute in req_attributes:
             if req_attribute not in kwargs: raise ValueError('Missing required argument', req_attributes)
             setattr(self, req_attribute, kwargs[req_attribute])
+        # Pinning changes of an API call (or of a burst of calls within SCL_PINNING_WINDOW ms) are applied once
+        self.pinning_epoch = PinningEpoch(connector=self.connector, window=int(os.getenv('SCL_PINNING_WINDOW', 0))/1000)
         self.subset_managers = {
-            'cpu': CpuSubsetManager(connector=self.connector, endpoint_pool=self.endpoint_pool, cpuset=self.cpuset, distance_max=50, offline=self.offline),\
+            'cpu': CpuSubsetManager(connector=self.connector, endpoint_pool=self.endpoint_pool, cpuset=self.cpuset, distance_max=50, offline=self.offline,\
+                pinning_epoch=self.pinning_epoch),\
             'mem': MemSubsetManager(connector=self.connector, endpoint_pool=self.endpoint_pool, memset=self.memset)
             }
+        self.batch_workers = int(os.getenv('SCL_BATCH_WORKERS', 4)) # Domains created concurrently on batch deployment
+        self.lock = threading.RLock() # Shared by API and monitoring threads
+        self.registry = VmRegistry() # Hosted VMs by uuid and name, with their subset in each manager
+        self.instance_id = uuid.uuid4().hex[:8] # Versions restart on each instance: tags are prefixed to remain unique
+        self.status_cache = (None, None)
+        self.list_vm_cache = (None, None)
         self.watch_out_of_schedulers_vm() # Manage pre-installed VMs
 
     def iterate(self, timestamp : int, offline : bool = False):
@@ -949,8 +1239,15 @@ class SubsetManagerPool(object):
             Timestamp to use for monitoring session
         ----------
         """
-        for subset_manager in self.subset_managers.values():
-            subset_manager.iterate(timestamp=timestamp)
+        with self.lock:
+            self.pinning_epoch.begin()
+            try:
+                for subset_manager in self.subset_managers.values():
+                    subset_manager.iterate(timestamp=timestamp)
+            finally:
+                self.pinning_epoch.end()
+            self.pinning_epoch.flush() # Live pinning is applied now rather than after SCL_PINNING_WINDOW, to be persisted below
+        self.connector.flush_pinning() # Persist pinning changes of this iteration and of API calls since the previous one
         # Print status to console if context changed
         status_str = str(self)
         if not hasattr(self, 'prev_status_str') or getattr(self, 'prev_status_str') != status_str: print(status_str)
@@ -970,23 +1267,134 @@ class SubsetManagerPool(object):
         tuple : (bool, reason)
             Success as True/False with reason
         """
-        treated = list()
-        success = True
-        reason = None
-        for subset_manager in self.subset_managers.values():
-            if not subset_manager.deploy(vm): 
-                success = False
-                reason = 'Not enough space on res ' + subset_manager.get_res_name()
-                break
-            treated.append(subset_manager)
+        with self.lock: # Held until commit: the fork must not miss changes made by monitoring
+            if self.get_vm_by_name(vm.get_name()) is not None: return (False, 'already exists')
+            self.pinning_epoch.begin() # Other VMs are re-pinned once, on their final pinning
+            try:
+                return self.__deploy(vm, offline=offline)
+            finally:
+                self.pinning_epoch.end()
+
+    def __deploy(self, vm : DomainEntity, offline : bool = False):
+        """Deploy a VM on subset managers, within a pinning epoch
+        Changes are staged on a fork of all managers and committed at once if every step succeeded:
+        a failure leaves current subsets and pinning untouched
+        ----------
+        """
+        staged = self.fork()
+        for subset_manager in staged.subset_managers.values():
+            if not subset_manager.deploy(vm): return (False, 'Not enough space on res ' + subset_manager.get_res_name())
         # If we succeed, the DOA DomainEntity was adapted according to the need of all subsetsManager. We apply changes using the connector
-        if success and not vm.is_deployed() and not offline:
+        if not vm.is_deployed() and not offline:
+            staged_cpu = staged.subset_managers['cpu']
+            vm.set_cpu_pin(staged_cpu.collection.get_subset(staged_cpu.get_appropriate_id(vm)).get_simulated_pin()) # Needed to define the domain
             success, reason = self.connector.create_vm(vm)
-        if success: return (success, reason)
-        # If one step failed, we have to remove VM from others subset
-        for subset_manager in treated: 
-            subset_manager.remove(vm)
-        return (success, reason)
+            if not success: return (success, reason)
+        for name, subset_manager in self.subset_managers.items(): subset_manager.commit(staged.subset_managers[name])
+        self.registry.register(vm, {name: subset_manager.get_appropriate_id(vm) for name, subset_manager in self.subset_managers.items()})
+        return (True, None)
+
+    def deploy_batch(self, vm_list : list, offline : bool = False):
+        """Deploy a list of VMs. Placement is planned in a single pass on one fork, by premium level and from the largest VMs to the
+        smallest ones to limit fragmentation, then committed at once. Pinning and balancing are done once for the whole batch, then
+        domains are created concurrently
+        ----------
+
+        Parameters
+        ----------
+        vm_list : list
+            DomainEntity list of VMs to deploy
+
+        Returns
+        -------
+        results : list
+            Success as True/False with reason for each VM, in vm_list order
+        """
+        with self.lock:
+            self.pinning_epoch.begin()
+            try:
+                return self.__deploy_batch(vm_list, offline=offline)
+            finally:
+                self.pinning_epoch.end()
+
+    def __deploy_batch(self, vm_list : list, offline : bool = False):
+        """Deploy a list of VMs, within a pinning epoch
+        ----------
+        """
+        results = dict()
+        # Names are checked before placement: a VM cannot be hosted twice
+        names = set()
+        for index, vm in enumerate(vm_list):
+            if vm.get_name() in names: results[index] = (False, 'duplicate name in batch')
+            elif self.get_vm_by_name(vm.get_name()) is not None: results[index] = (False, 'already exists')
+            names.add(vm.get_name())
+        planned = sorted([index for index in range(len(vm_list)) if index not in results],\
+            key=lambda index: (vm_list[index].get_cpu_ratio(), -vm_list[index].get_cpu(), -vm_list[index].get_mem()))
+        staged = self.fork()
+        for subset_manager in staged.subset_managers.values(): subset_manager.begin_batch()
+        try:
+            for index in planned:
+                try:
+                    results[index] = staged.__stage(vm_list[index])
+                except Exception as ex: # Placement failed on this VM only
+                    results[index] = (False, str(ex))
+                if not results[index][0]: staged.__rollback(vm_list[index])
+        finally:
+            for subset_manager in staged.subset_managers.values(): subset_manager.end_batch()
+        for name, subset_manager in self.subset_managers.items(): subset_manager.commit(staged.subset_managers[name])
+        for index in planned:
+            if results[index][0]: self.registry.register(vm_list[index], {name: subset_manager.get_appropriate_id(vm_list[index]) for name, subset_manager in self.subset_managers.items()})
+
+        # VMs are pinned, domains can be created
+        to_create = [index for index in planned if results[index][0] and not vm_list[index].is_deployed()]
+        if to_create and not offline:
+            def create(index : int):
+                try:
+                    return self.connector.create_vm(vm_list[index])
+                except Exception as ex:
+                    return (False, str(ex))
+            with ThreadPoolExecutor(max_workers=self.batch_workers) as executor:
+                for index, result in zip(to_create, executor.map(create, to_create)): results[index] = result
+            # Failed creations are removed from subsets
+            failed = [index for index in to_create if not results[index][0]]
+            if failed:
+                for subset_manager in self.subset_managers.values(): subset_manager.begin_batch()
+                try:
+                    for index in failed: self.__rollback(vm_list[index])
+                finally:
+                    for subset_manager in self.subset_managers.values(): subset_manager.end_batch()
+        return [{'name': vm.get_name(), 'success': results[index][0], 'reason': results[index][1]} for index, vm in enumerate(vm_list)]
+
+    def __stage(self, vm : DomainEntity):
+        """Place a VM on each subset manager of a fork. Caller is in charge of rolling back a failed placement
+        ----------
+
+        Parameters
+        ----------
+        vm : DomainEntity
+            The VM to place
+
+        Returns
+        -------
+        tuple : (bool, reason)
+            Success as True/False with reason
+        """
+        for subset_manager in self.subset_managers.values():
+            if not subset_manager.deploy(vm): return (False, 'Not enough space on res ' + subset_manager.get_res_name())
+        return (True, None)
+
+    def __rollback(self, vm : DomainEntity):
+        """Remove a VM which could not be deployed from the subsets hosting it and from the registry. The connector is not called
+        ----------
+
+        Parameters
+        ----------
+        vm : DomainEntity
+            The VM to remove
+        """
+        for subset_manager in self.subset_managers.values():
+            if subset_manager.get_vm_by_name(vm.get_name()) is vm: subset_manager.remove(vm)
+        self.registry.unregister(vm)
 
     def remove(self, vm : DomainEntity = None, name : str = None, offline : bool = False):
         """Remove a VM from subset managers
@@ -1004,8 +1412,19 @@ class SubsetManagerPool(object):
         tuple : (bool, reason)
             Success as True/False with reason
         """
-        if name != None: vm = self.get_vm_by_name(name)
-        if vm == None: return (False, 'does not exist')
+        with self.lock:
+            if name != None: vm = self.get_vm_by_name(name)
+            if vm == None: return (False, 'does not exist')
+            self.pinning_epoch.begin() # Remaining VMs are re-pinned once, on their final pinning
+            try:
+                return self.__remove(vm, offline=offline)
+            finally:
+                self.pinning_epoch.end()
+
+    def __remove(self, vm : DomainEntity, offline : bool = False):
+        """Remove a VM from subset managers, within a pinning epoch
+        ----------
+        """
         vm.set_being_destroyed(True)
         treated = list()
         success = True
@@ -1018,6 +1437,7 @@ class SubsetManagerPool(object):
         if not success:
             vm.set_being_destroyed(False)
             return (False, 'unable to remove it from all subsets')
+        self.registry.unregister(vm)
         # second, remove from connector
         if not offline: (success, reason) = self.connector.delete_vm(vm)
         else: (success, reason) = (True, 'offline')
@@ -1050,11 +1470,12 @@ class SubsetManagerPool(object):
         success : bool
             Return if vm was found
         """
-        has_vm = 0
-        for subset_manager in self.subset_managers.values():
-            if subset_manager.has_vm(vm_copy): has_vm+=1
-        if has_vm >0: return True
-        return False
+        vm = self.__check_registered(self.registry.find(vm_copy))
+        if vm == None: return False
+        if vm.is_being_destroyed():
+            print('Warning: vm found while being destroyed:', vm.get_name())
+            return False
+        return True
 
     def get_vm_by_name(self, name : str):
         """Get a vm by its name, none if not present
@@ -1070,23 +1491,39 @@ class SubsetManagerPool(object):
         vm : DomainEntity
             None if not present
         """
+        return self.__check_registered(self.registry.get_vm_by_name(name))
+
+    def __check_registered(self, vm : DomainEntity):
+        """Check that a registered VM is still hosted by its subsets, as a VM leaving without passing by the scheduler is
+        removed from them on monitoring. Registry is cleaned if it is no longer hosted
+        ----------
+
+        Parameters
+        ----------
+        vm : DomainEntity
+            The registered VM, may be None
+
+        Returns
+        -------
+        vm : DomainEntity
+            None if not hosted
+        """
+        if vm == None: return None
         has_vm = 0
-        being_destroyed = False
-        found = None
-        for subset_manager in self.subset_managers.values():
-            vm = subset_manager.get_vm_by_name(name)
-            if vm != None: 
-                has_vm+=1
-                being_destroyed = being_destroyed or vm.is_being_destroyed()
-                found = vm
-        if (has_vm != len(self.subset_managers)) and (has_vm != 0):
-            based_message = 'Warning: vm ' + name + ' unequally present in subsets'
-            if not being_destroyed: print(based_message)
+        for name, subset_id in self.registry.get_subset_ids(vm).items():
+            collection = self.subset_managers[name].collection
+            if collection.contains_subset(subset_id) and collection.get_subset(subset_id).get_vm_by_name(vm.get_name()) is vm: has_vm+=1
+        if has_vm == 0:
+            self.registry.unregister(vm)
+            return None
+        if has_vm != len(self.subset_managers):
+            based_message = 'Warning: vm ' + vm.get_name() + ' unequally present in subsets'
+            if not vm.is_being_destroyed(): print(based_message)
             else: print(based_message  + ' while being destroyed')
-        return found
+        return vm
 
     def status(self):
-        """Return susbsets status as dict
+        """Return susbsets status as dict. Cached per state tag: returned dict must not be modified
         ----------
 
         Returns
@@ -1094,13 +1531,17 @@ class SubsetManagerPool(object):
         status : dicts
             Subset status
         """
+        tag = self.get_state_tag()
+        cached_tag, cached_status = self.status_cache
+        if cached_tag == tag: return cached_status
         status = dict()
         for name, manager in self.subset_managers.items():
             status[name] =  manager.status()
+        self.status_cache = (tag, status)
         return status
 
     def list_vm(self):
-        """Return list of hosted VM
+        """Return list of hosted VM. Cached per state tag: returned list must not be modified
         ----------
 
         Returns
@@ -1108,7 +1549,24 @@ class SubsetManagerPool(object):
         vm_list : list
             List of hosted vm
         """
-        return self.subset_managers['cpu'].get_consumers()
+        tag = self.get_state_tag()
+        cached_tag, cached_list = self.list_vm_cache
+        if cached_tag == tag: return cached_list
+        vm_list = self.subset_managers['cpu'].get_consumers()
+        self.list_vm_cache = (tag, vm_list)
+        return vm_list
+
+    def get_state_tag(self):
+        """Return a tag identifying the current state of subset managers. Computed from their versions: status and list of
+        hosted VM are unchanged as long as the tag is
+        ----------
+
+        Returns
+        -------
+        tag : str
+            State tag
+        """
+        return self.instance_id + '-' + '-'.join([str(manager.get_version()) for manager in self.subset_managers.values()])
 
     def progress(self, candidate_vm : DomainEntity):
         """ Return progress to optimal ratio considering a candidate VM
@@ -1138,7 +1596,76 @@ class SubsetManagerPool(object):
         
         return progress
 
+    def fork(self):
+        """Return a copy of the pool on which deployments can be simulated. Nothing done on the copy is applied to VMs or to the connector
+        ----------
 
+        Returns
+        -------
+        pool : SubsetManagerPool
+            copy
+        """
+        forked = copy.copy(self)
+        forked.subset_managers = {name: manager.fork() for name, manager in self.subset_managers.items()}
+        forked.registry = self.registry.fork()
+        return forked
+
+    def simulate(self, vm_list : list):
+        """Simulate the deployment of a list of VM (in list order) on a fork of the pool. Current state is left untouched
+        A VM whose name is already hosted (or used by a previous candidate) fails as on deployment
+        ----------
+
+        Parameters
+        ----------
+        vm_list : list
+            DomainEntity list of candidate VMs. They are not modified. Unnamed ones get a name not hosted on the pool
+
+        Returns
+        -------
+        simulation : dict
+            For each VM (in list order): success, reason and, on success, CPU and memory attributed with the resulting pinning.
+            Status of the pool after simulation
+        """
+        with self.lock: forked = self.fork()
+        candidates = list()
+        for index, vm in enumerate(vm_list):
+            candidate = copy.copy(vm)
+            if candidate.get_name() is None: candidate.set_name(forked.__get_free_name('candidate' + str(index)))
+            candidates.append((candidate, forked.deploy(candidate, offline=True)))
+
+        # Results are computed once all VMs were placed, as a deployment may impact pinning of previous ones
+        results = list()
+        for candidate, (success, reason) in candidates:
+            result = {'name': candidate.get_name(), 'success': success, 'reason': reason}
+            if success:
+                cpu_subset = forked.subset_managers['cpu'].collection.get_subset(forked.subset_managers['cpu'].get_appropriate_id(candidate))
+                mem_subset = forked.subset_managers['mem'].collection.get_subset(forked.subset_managers['mem'].get_appropriate_id(candidate))
+                pin = cpu_subset.get_simulated_pin() # Set by deploy on the forked subset
+                result['cpu'] = {'subset': cpu_subset.get_oversubscription_id(), 'res': [cpu.get_cpu_id() for cpu in cpu_subset.get_res()],
+                    'pin': pin.to_cpuset_str() if pin is not None else None}
+                result['mem'] = {'subset': mem_subset.get_oversubscription_id(), 'res': [list(mem_tuple) for mem_tuple in mem_subset.get_res()]}
+            results.append(result)
+        return {'vm': results, 'status': forked.status()}
+
+    def __get_free_name(self, name : str):
+        """Return a name derived from the given one and not used by a hosted VM
+        ----------
+
+        Parameters
+        ----------
+        name : str
+            Preferred name
+
+        Returns
+        -------
+        name : str
+            Free name
+        """
+        free_name, suffix = name, 0
+        while self.registry.get_vm_by_name(free_name) is not None:
+            suffix += 1
+            free_name = name + '-' + str(suffix)
+        return free_name
 
     def __str__(self):
         return ''.join([str(subset_manager) + '\n' for subset_manager in self.subset_managers.values()])
\ No newline at end of file
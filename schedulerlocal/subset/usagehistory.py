@@ -0,0 +1,281 @@
+import numpy as np
+
+class UsageHistory(object):
+    """
+    A UsageHistory keeps timestamped usage records over a monitoring window in a NumPy ring buffer
+    Records are appended in timestamp order: both append and expiration cost O(1) (amortized when the buffer grows),
+    statistics are computed on the window without building intermediate lists
+    ...
+
+    Attributes
+    ----------
+    capacity : int (optional)
+        Initial count of records kept before the buffer grows. Default to 64
+
+    Public Methods
+    -------
+    append()
+        Add a record
+    expire()
+        Drop records older than a timestamp
+    get_timestamps()/get_values()
+        Return records of the window, from the oldest to the newest one
+    last()/max()/mean()/std()
+        Window statistics
+    """
+
+    def __init__(self, **kwargs):
+        capacity = max(1, kwargs['capacity']) if 'capacity' in kwargs else 64
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.values = self.build_values(capacity)
+        self.start = 0 # Position of the oldest record
+        self.size  = 0
+
+    def build_values(self, capacity : int):
+        """Return an empty storage for capacity records, records being on the last axis. May be reimplemented
+        ----------
+
+        Parameters
+        ----------
+        capacity : int
+            Count of records
+
+        Returns
+        -------
+        values : np.ndarray
+            Storage
+        """
+        return np.full(capacity, np.nan, dtype=np.float64)
+
+    def append(self, timestamp : int, value : float):
+        """Add a record, newer than existing ones
+        ----------
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp key
+        value : float
+            The record
+        """
+        position = self.allocate(timestamp) # May grow values
+        self.values[..., position] = value
+
+    def allocate(self, timestamp : int):
+        """Reserve the position of a new record, growing the buffer if full
+        ----------
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp key
+
+        Returns
+        -------
+        position : int
+            Position of the record on the last axis of values
+        """
+        if self.size == len(self.timestamps): self.__grow()
+        position = (self.start + self.size) % len(self.timestamps)
+        self.timestamps[position] = timestamp
+        self.values[..., position] = np.nan
+        self.size += 1
+        return position
+
+    def __grow(self):
+        """Double buffer capacity, records being reordered from position 0
+        ----------
+        """
+        window = self.get_window()
+        capacity = 2*len(self.timestamps)
+        timestamps, values = np.zeros(capacity, dtype=np.int64), self.build_values(capacity)
+        timestamps[:self.size] = self.timestamps[window]
+        values[..., :self.size] = self.values[..., window]
+        self.timestamps, self.values, self.start = timestamps, values, 0
+
+    def expire(self, oldest : int):
+        """Drop records older than a timestamp. Records being ordered, only expired ones are visited
+        ----------
+
+        Parameters
+        ----------
+        oldest : int
+            Oldest timestamp kept
+        """
+        while self.size > 0 and self.timestamps[self.start] < oldest:
+            self.start = (self.start + 1) % len(self.timestamps)
+            self.size -= 1
+
+    def get_window(self):
+        """Return positions of records, from the oldest to the newest one
+        ----------
+
+        Returns
+        -------
+        positions : np.ndarray or slice
+            Positions on the last axis of values
+        """
+        end = self.start + self.size
+        if end <= len(self.timestamps): return slice(self.start, end)
+        return np.r_[self.start:len(self.timestamps), 0:end - len(self.timestamps)]
+
+    def get_timestamps(self):
+        """Return timestamps of the window, from the oldest to the newest one
+        ----------
+        """
+        return self.timestamps[self.get_window()]
+
+    def get_values(self):
+        """Return records of the window, from the oldest to the newest one
+        ----------
+        """
+        return self.values[..., self.get_window()]
+
+    def last(self):
+        """Return the newest record, None if empty
+        ----------
+        """
+        if self.size == 0: return None
+        return float(self.values[(self.start + self.size - 1) % len(self.timestamps)])
+
+    def max(self):
+        """Return the highest record of the window, None if empty
+        ----------
+        """
+        if self.size == 0: return None
+        return float(np.max(self.get_values()))
+
+    def mean(self):
+        """Return the average record of the window, None if empty
+        ----------
+        """
+        if self.size == 0: return None
+        return float(np.mean(self.get_values()))
+
+    def std(self):
+        """Return the standard deviation of records of the window, None if empty
+        ----------
+        """
+        if self.size == 0: return None
+        return float(np.std(self.get_values()))
+
+    def __len__(self):
+        return self.size
+
+class ConsumersUsageHistory(UsageHistory):
+    """
+    A ConsumersUsageHistory keeps usage records of several consumers, sampled at the same timestamps, in a 2-D ring buffer
+    (one row per consumer, one column per timestamp). Missing records are stored as NaN
+    ...
+
+    Attributes
+    ----------
+    capacity : int (optional)
+        Initial count of timestamps kept before the buffer grows. Default to 64
+
+    Public Methods reimplemented/introduced
+    -------
+    append()
+        Add records of a timestamp
+    remove()/retain()
+        Drop history of consumers
+    count()/get_consumer_values()
+        Records of a consumer
+    max_per_consumer()
+        Highest record of each consumer on the window
+    """
+
+    def __init__(self, **kwargs):
+        self.row_of = dict() # consumer uuid -> row
+        self.free_rows = list()
+        super().__init__(**kwargs)
+        self.free_rows = list(range(self.values.shape[0] - 1, -1, -1)) # Lowest rows are attributed first
+
+    def build_values(self, capacity : int):
+        return np.full((max(1, len(self.row_of) + len(self.free_rows)), capacity), np.nan, dtype=np.float64)
+
+    def append(self, timestamp : int, consumers_usage : dict):
+        """Add records of a timestamp
+        ----------
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp key
+        consumers_usage : dict
+            Record per consumer uuid, None values being skipped
+        """
+        for consumer_uuid, value in consumers_usage.items():
+            if value is not None and consumer_uuid not in self.row_of: self.__add_row(consumer_uuid)
+        position = self.allocate(timestamp)
+        for consumer_uuid, value in consumers_usage.items():
+            if value is not None: self.values[self.row_of[consumer_uuid], position] = value
+
+    def __add_row(self, consumer_uuid : str):
+        """Attribute a row to a consumer, doubling rows if none is free
+        ----------
+        """
+        if not self.free_rows:
+            rows = self.values.shape[0]
+            self.values = np.concatenate([self.values, np.full_like(self.values, np.nan)], axis=0)
+            self.free_rows = list(range(2*rows - 1, rows - 1, -1))
+        self.row_of[consumer_uuid] = self.free_rows.pop()
+
+    def remove(self, consumer_uuid : str):
+        """Drop history of a consumer, if any
+        ----------
+
+        Parameters
+        ----------
+        consumer_uuid : str
+            The consumer uuid
+        """
+        if consumer_uuid not in self.row_of: return
+        row = self.row_of.pop(consumer_uuid)
+        self.values[row, :] = np.nan
+        self.free_rows.append(row)
+
+    def retain(self, consumer_uuid_list : list):
+        """Drop history of consumers not in list
+        ----------
+
+        Parameters
+        ----------
+        consumer_uuid_list : list
+            uuid of consumers to keep
+        """
+        kept = set(consumer_uuid_list)
+        for consumer_uuid in [consumer_uuid for consumer_uuid in self.row_of if consumer_uuid not in kept]: self.remove(consumer_uuid)
+
+    def count(self, consumer_uuid : str):
+        """Return count of records of a consumer on the window
+        ----------
+        """
+        if consumer_uuid not in self.row_of: return 0
+        return int(np.count_nonzero(~np.isnan(self.values[self.row_of[consumer_uuid], self.get_window()])))
+
+    def get_consumer_values(self, consumer_uuid : str):
+        """Return records of a consumer on the window, from the oldest to the newest one
+        ----------
+        """
+        if consumer_uuid not in self.row_of: return np.zeros(0, dtype=np.float64)
+        values = self.values[self.row_of[consumer_uuid], self.get_window()]
+        return values[~np.isnan(values)]
+
+    def max_per_consumer(self):
+        """Return the highest record of each consumer on the window, computed at once for all consumers
+        ----------
+
+        Returns
+        -------
+        max : dict
+            Highest record per consumer uuid, None if consumer has no record on the window
+        """
+        if not self.row_of: return dict()
+        rows = np.fromiter(self.row_of.values(), dtype=np.intp, count=len(self.row_of))
+        window = self.values[rows][:, self.get_window()]
+        highest = np.max(np.where(np.isnan(window), -np.inf, window), axis=1, initial=-np.inf)
+        return {consumer_uuid: (float(value) if value != -np.inf else None) for consumer_uuid, value in zip(self.row_of.keys(), highest)}
+
+    def __contains__(self, consumer_uuid : str):
+        return consumer_uuid in self.row_of
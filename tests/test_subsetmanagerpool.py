@@ -0,0 +1,74 @@
+import pytest
+pytest.importorskip('libvirt')
+pytest.importorskip('vowpalwabbit')
+from schedulerlocal.node.cpuset import ServerCpuSet
+from schedulerlocal.node.memoryset import ServerMemorySet
+from schedulerlocal.node.cpumask import CpuMask
+from schedulerlocal.subset.subsetmanager import SubsetManagerPool
+from schedulerlocal.domain.domainentity import DomainEntity
+import os
+
+TOPOLOGY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'debug', 'topology_i7-1185G7.json')
+
+class StubConnector(object):
+    """Connector recording created domains, without libvirt"""
+
+    def __init__(self):
+        self.created = list()
+
+    def get_vm_alive_as_entity(self): return list()
+
+    def build_cpu_pinning(self, cpu_list : list, host_config : int):
+        return CpuMask(size=host_config, cpu_ids=[cpu.get_cpu_id() for cpu in cpu_list])
+
+    def update_cpu_pinning(self, vm : DomainEntity, virDomain = None): pass
+
+    def create_vm(self, vm : DomainEntity):
+        self.created.append((vm.get_name(), vm.get_cpu_pin()))
+        vm.set_uuid('uuid-' + vm.get_name())
+        return (True, None)
+
+    def delete_vm(self, vm : DomainEntity): return (True, None)
+
+class StubEndpoints(object):
+
+    def is_live(self): return False
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('debug')
+    for name, value in {'OVSB_CRITICAL_SIZE': '6', 'SCL_ACT_MONITORING': '3600', 'SCL_ACT_LEARNING': '300', 'SCL_ACT_LEEWAY': '5',\
+        'SCL_PLACEMENT': 'distance', 'SCL_ACT_CHECKPOINT': '', 'SCL_PINNING_WINDOW': '0'}.items(): monkeypatch.setenv(name, value)
+    with open(TOPOLOGY, 'r') as f: topology = f.read()
+    cpuset = ServerCpuSet().load_from_json(topology).build_distances()
+    memset = ServerMemorySet().load_from_json(topology)
+    return SubsetManagerPool(connector=StubConnector(), endpoint_pool=StubEndpoints(), cpuset=cpuset, memset=memset, offline=False)
+
+def test_deploy_on_new_subset_is_pinned(pool):
+    for oversubscription in [1.0, 2.0, 3.0]:
+        success, reason = pool.deploy(DomainEntity(name='x' + str(oversubscription), cpu=2, mem=1024**2, cpu_ratio=oversubscription, qcow2='q'))
+        assert success, reason
+    assert [name for name, __ in pool.connector.created] == ['x1.0', 'x2.0', 'x3.0']
+    for name, pin in pool.connector.created: assert pin is not None, name
+
+def test_simulate_on_new_subset(pool):
+    simulation = pool.simulate([DomainEntity(name='s', cpu=2, mem=1024**2, cpu_ratio=2.0)])
+    assert simulation['vm'][0]['success']
+    assert simulation['vm'][0]['cpu']['pin'] is not None
+    assert pool.list_vm() == list()
+    assert not os.path.exists('debug/predictor.csv')
+
+def test_simulate_unnamed_candidates_do_not_collide(pool):
+    success, reason = pool.deploy(DomainEntity(name='candidate0', cpu=2, mem=1024**2, cpu_ratio=1.0, qcow2='q'))
+    assert success, reason
+    simulation = pool.simulate([DomainEntity(cpu=2, mem=1024**2, cpu_ratio=1.0), DomainEntity(cpu=2, mem=1024**2, cpu_ratio=1.0)])
+    assert [result['success'] for result in simulation['vm']] == [True, True]
+
+def test_deploy_batch_on_empty_pool(pool):
+    vm_list = [DomainEntity(name='b' + str(index), cpu=2, mem=1024**2, cpu_ratio=[1.0, 2.0][index % 2], qcow2='q') for index in range(4)]
+    vm_list.append(DomainEntity(name='b0', cpu=2, mem=1024**2, cpu_ratio=1.0, qcow2='q'))
+    results = pool.deploy_batch(vm_list)
+    assert [result['success'] for result in results] == [True, True, True, True, False]
+    assert sorted(pool.list_vm()) == ['b0', 'b1', 'b2', 'b3']
+    for name, pin in pool.connector.created: assert pin is not None, name